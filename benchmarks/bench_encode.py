@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Encoder benchmarks.
+
+Runs ``encode_bytes`` (what ``encode_bytes_to_wav`` and the CLI use) over a
+matrix of payload sizes, 4/8-FSK, bit depths, channel counts and sample
+rates, and records wall time, samples/sec and per-stage times as JSON.
+``compare`` checks a run against a stored baseline and exits 1 when any
+case got slower than the threshold allows.
+
+Examples:
+  python benchmarks/bench_encode.py run --quick --out bench.json
+  python benchmarks/bench_encode.py run --sizes 64,1024 --rates 48000 --out bench.json
+  python benchmarks/bench_encode.py compare baseline.json bench.json --threshold 0.15
+
+Each case runs in a scratch directory with its own history DB and a fresh
+payload per iteration, so dedupe never short-circuits a measurement.
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from ghostlink import __main__ as encoder
+from ghostlink.profiling import SpanRecorder, listen
+from ghostlink.profiles import freq_profile
+
+SIZES = (16, 256, 1024)
+ORDERS = (4, 8)
+BIT_DEPTHS = (16, 24, 32)
+CHANNELS = (1, 2)
+RATES = (16000, 48000, 96000)
+
+QUICK = {"sizes": (16, 256), "orders": ORDERS, "bit_depths": (16,), "channels": (1,), "rates": (48000,)}
+
+
+def _csv_ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def case_key(case: Dict[str, int]) -> str:
+    return (f"bytes={case['size']} fsk={case['order']} bits={case['bit_depth']} "
+            f"ch={case['channels']} sr={case['samplerate']}")
+
+
+def matrix(sizes, orders, bit_depths, channels, rates) -> List[Dict[str, int]]:
+    return [
+        {"size": n, "order": o, "bit_depth": b, "channels": c, "samplerate": sr}
+        for n, o, b, c, sr in itertools.product(sizes, orders, bit_depths, channels, rates)
+    ]
+
+
+def run_case(case: Dict[str, int], args: argparse.Namespace, rng: random.Random) -> Dict[str, Any]:
+    """Encode ``args.iterations`` fresh payloads for one case and summarise."""
+    dense = case["order"] == 8
+    walls: List[float] = []
+    stages: Dict[str, List[float]] = {}
+    spans: Dict[str, List[float]] = {}
+    frames = 0
+    for i in range(args.warmup + args.iterations):
+        payload = bytes(rng.randrange(32, 127) for _ in range(case["size"]))
+        recorder = SpanRecorder()
+        out_dir = tempfile.mkdtemp(dir=".")
+        with listen(recorder):
+            result = encoder.encode_bytes(
+                payload, out_dir, "bench", samplerate=case["samplerate"], baud=args.baud,
+                amp=0.06, dense=dense, mix_profile="streaming", gap_ms=0.0,
+                preamble_s=args.preamble, interleave_depth=4, repeats=args.repeats,
+                ramp_ms=5.0, bit_depth=case["bit_depth"], channels=case["channels"],
+            )
+        shutil.rmtree(out_dir)
+        if result.skipped:
+            raise RuntimeError("benchmark payload was deduplicated")
+        if i < args.warmup:
+            continue
+        symbols = encoder.frames_symbols(encoder.build_frames(payload), case["order"], 4)
+        frames = encoder.pcm_frame_count(len(symbols), len(freq_profile(dense, "streaming")),
+                                         case["samplerate"], args.baud, args.preamble, 0.0, args.repeats)
+        walls.append(result.timings["total"])
+        for stage, seconds in result.timings.items():
+            stages.setdefault(stage, []).append(seconds)
+        for name, entry in recorder.spans.items():
+            spans.setdefault(name, []).append(entry["seconds"])
+
+    wall = statistics.median(walls)
+    synth = statistics.median(stages["synth"])
+    return {
+        "key": case_key(case),
+        "params": dict(case, baud=args.baud, repeats=args.repeats, preamble=args.preamble),
+        "iterations": args.iterations,
+        "frames": frames,
+        "wall_s": wall,
+        "samples_per_s": frames / wall if wall else 0.0,
+        "synth_samples_per_s": frames / synth if synth else 0.0,
+        "stages": {k: statistics.median(v) for k, v in stages.items()},
+        "spans": {k: statistics.median(v) for k, v in spans.items()},
+    }
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    axes = dict(QUICK) if args.quick else {
+        "sizes": SIZES, "orders": ORDERS, "bit_depths": BIT_DEPTHS, "channels": CHANNELS, "rates": RATES,
+    }
+    for axis in axes:
+        if getattr(args, axis):
+            axes[axis] = _csv_ints(getattr(args, axis))
+    cases = matrix(**axes)
+    rng = random.Random(args.seed)
+    results = []
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="ghostlink_bench_") as scratch:
+        # The history DB lives in the working directory
+        os.chdir(scratch)
+        try:
+            for i, case in enumerate(cases, start=1):
+                res = run_case(case, args, rng)
+                results.append(res)
+                print(f"[{i}/{len(cases)}] {res['key']}: {res['wall_s'] * 1000:.1f} ms, "
+                      f"{res['samples_per_s'] / 1e6:.2f} Msamples/s", file=sys.stderr)
+        finally:
+            os.chdir(cwd)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "cases": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"[i] Wrote {len(results)} cases to {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    return 0
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            min_delta_s: float) -> List[Dict[str, Any]]:
+    """Rows for every case/metric present in both reports, flagged if regressed.
+
+    A metric regresses when it is more than ``threshold`` (fractional)
+    slower than the baseline *and* at least ``min_delta_s`` slower, so
+    sub-millisecond stages do not trip on noise.
+    """
+    base_cases = {c["key"]: c for c in baseline["cases"]}
+    rows = []
+    for case in current["cases"]:
+        base = base_cases.get(case["key"])
+        if base is None:
+            continue
+        metrics = [("wall", base["wall_s"], case["wall_s"])]
+        metrics += [(f"stage:{k}", v, case["stages"][k]) for k, v in base["stages"].items() if k in case["stages"]]
+        for name, old, new in metrics:
+            ratio = new / old if old else 1.0
+            rows.append({
+                "key": case["key"], "metric": name, "baseline_s": old, "current_s": new, "ratio": ratio,
+                "regressed": ratio > 1.0 + threshold and new - old >= min_delta_s,
+            })
+    return rows
+
+
+def cmd_compare(args: argparse.Namespace) -> int:
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+    rows = compare(baseline, current, args.threshold, args.min_delta_ms / 1000.0)
+    if not rows:
+        print("[!] No cases in common between the two reports.")
+        return 2
+    regressed = [r for r in rows if r["regressed"]]
+    for r in rows:
+        if r["regressed"] or args.all:
+            flag = "REGRESSED" if r["regressed"] else "ok"
+            print(f"{flag:9} {r['key']} {r['metric']}: {r['baseline_s'] * 1000:.2f} ms -> "
+                  f"{r['current_s'] * 1000:.2f} ms ({r['ratio']:.2f}x)")
+    print(f"[i] {len(rows)} metrics compared, {len(regressed)} regressed (threshold +{args.threshold:.0%})")
+    return 1 if regressed else 0
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="GhostLink encoder benchmarks.",
+                                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    sub = p.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run the benchmark matrix.",
+                         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    run.add_argument("--quick", action="store_true", help="Small matrix: 48 kHz, 16-bit mono only.")
+    run.add_argument("--sizes", help=f"Payload sizes in bytes (default {','.join(map(str, SIZES))}).")
+    run.add_argument("--orders", help="FSK orders, 4 and/or 8.")
+    run.add_argument("--bit-depths", dest="bit_depths", help="Bit depths out of 16,24,32.")
+    run.add_argument("--channels", help="Channel counts, 1 and/or 2.")
+    run.add_argument("--rates", help=f"Sample rates (default {','.join(map(str, RATES))}).")
+    run.add_argument("--iterations", type=int, default=3, help="Measured encodes per case (median reported).")
+    run.add_argument("--warmup", type=int, default=1, help="Unmeasured encodes per case.")
+    run.add_argument("--baud", type=float, default=90.0, help="Symbol rate.")
+    run.add_argument("--repeats", type=int, default=2, help="Payload repeats.")
+    run.add_argument("--preamble", type=float, default=0.8, help="Preamble seconds.")
+    run.add_argument("--seed", type=int, default=1234, help="Payload RNG seed.")
+    run.add_argument("--out", help="Write the JSON report here instead of stdout.")
+
+    cmp_ = sub.add_parser("compare", help="Compare a run against a baseline.",
+                          formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    cmp_.add_argument("baseline", help="Baseline JSON report.")
+    cmp_.add_argument("current", help="JSON report to check.")
+    cmp_.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown as a fraction.")
+    cmp_.add_argument("--min-delta-ms", type=float, default=2.0,
+                      help="Ignore slowdowns smaller than this many milliseconds.")
+    cmp_.add_argument("--all", action="store_true", help="Print every metric, not just regressions.")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+    if args.command == "run":
+        return cmd_run(args)
+    return cmd_compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
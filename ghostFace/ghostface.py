@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+GhostFace command line
+
+Commands:
+  serve: production server; preforked gunicorn workers with threads
+  dev:   Flask development server with the reloader (single process)
+
+Examples:
+  python ghostface.py serve --workers 4 --threads 8
+  python ghostface.py serve --bind 127.0.0.1:8080 --timeout 600
+  python ghostface.py dev --port 5001
+
+`serve` imports the app, ghostlink and its synthesis/decoder caches once in
+the master process; workers are forked afterwards and inherit them warm.
+"""
+
+import argparse
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# ghostFace is not a package; make its modules importable from anywhere
+sys.path.insert(0, str(Path(__file__).parent.resolve()))
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        prog="ghostface",
+        description="GhostFace web interface and API server.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    sub = p.add_subparsers(dest="command", required=True)
+
+    serve = sub.add_parser("serve", help="Production server with preforked workers.",
+                           formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    serve.add_argument("--bind", default="0.0.0.0:5001", help="Address to listen on (host:port).")
+    serve.add_argument("--workers", type=int, default=os.cpu_count() or 2,
+                       help="Worker processes; each runs encodes independently.")
+    serve.add_argument("--threads", type=int, default=4, help="Request threads per worker.")
+    serve.add_argument("--timeout", type=int, default=300,
+                       help="Seconds a request may run before its worker is restarted.")
+    serve.add_argument("--graceful-timeout", type=int, default=30,
+                       help="Seconds workers get to finish in-flight requests on shutdown.")
+    serve.add_argument("--keepalive", type=int, default=5, help="Keep-alive seconds.")
+    serve.add_argument("--max-requests", type=int, default=0,
+                       help="Recycle a worker after this many requests (0=never).")
+    serve.add_argument("--log-level", default="info", help="gunicorn log level.")
+
+    dev = sub.add_parser("dev", help="Flask development server with the reloader.",
+                         formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    dev.add_argument("--host", default="0.0.0.0", help="Address to listen on.")
+    dev.add_argument("--port", type=int, default=5001, help="Port to listen on.")
+    return p.parse_args(argv)
+
+
+def warm_caches():
+    """Import ghostlink and precompute its caches before workers fork"""
+    import ghostlink_api
+    if ghostlink_api.GHOSTLINK_AVAILABLE:
+        ghostlink_api.ghostlink_main.warm_caches()
+        ghostlink_api.ghostlink_decoder.warm_caches()
+
+
+def _worker_exit(server, worker):
+    """Let running jobs finish and drop queued ones when a worker stops"""
+    import ghostlink_api
+    ghostlink_api.job_manager.shutdown()
+    ghostlink_api.publish_metrics(force=True)
+
+
+def serve(args):
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ 'ghostface serve' needs gunicorn (not available on Windows).")
+        print("Please install dependencies with: pip install -r requirements_api.txt")
+        return 1
+
+    # Workers must share job state, so point them at one SQLite file. This
+    # and the metrics directory have to be set before ghostlink_api is imported.
+    if not os.environ.get("GHOSTFACE_JOB_DB"):
+        job_db = os.path.join(tempfile.gettempdir(), f"ghostface_jobs_{os.getpid()}.db")
+        os.environ["GHOSTFACE_JOB_DB"] = job_db
+        master_pid = os.getpid()
+
+        def _remove_job_db():
+            if os.getpid() == master_pid and os.path.exists(job_db):
+                os.remove(job_db)
+
+        atexit.register(_remove_job_db)
+
+    # Each worker publishes its metrics here; /api/metrics merges them
+    if not os.environ.get("GHOSTFACE_METRICS_DIR"):
+        metrics_dir = tempfile.mkdtemp(prefix="ghostface_metrics_")
+        os.environ["GHOSTFACE_METRICS_DIR"] = metrics_dir
+        master_pid = os.getpid()
+
+        def _remove_metrics_dir():
+            if os.getpid() == master_pid:
+                shutil.rmtree(metrics_dir, ignore_errors=True)
+
+        atexit.register(_remove_metrics_dir)
+
+    from start_ghostlink_web import create_app
+    app = create_app()
+    warm_caches()
+
+    class GhostFaceServer(BaseApplication):
+        def __init__(self, application, options):
+            self.application = application
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return self.application
+
+    options = {
+        "bind": args.bind,
+        "workers": args.workers,
+        "threads": args.threads,
+        "worker_class": "gthread",
+        "timeout": args.timeout,
+        "graceful_timeout": args.graceful_timeout,
+        "keepalive": args.keepalive,
+        "max_requests": args.max_requests,
+        "loglevel": args.log_level,
+        # Load once in the master so workers fork with everything imported
+        "preload_app": True,
+        "worker_exit": _worker_exit,
+    }
+    print(f"🌐 GhostFace serving on http://{args.bind} "
+          f"({args.workers} workers x {args.threads} threads)")
+    GhostFaceServer(app, options).run()
+    return 0
+
+
+def dev(args):
+    from start_ghostlink_web import create_app
+    create_app().run(debug=True, host=args.host, port=args.port)
+    return 0
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "serve":
+        return serve(args)
+    return dev(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
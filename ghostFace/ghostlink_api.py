@@ -4,17 +4,28 @@ GhostLink Web API Backend
 Connects the web UI to the actual GhostLink Python application
 """
 
+import argparse
+import multiprocessing
 import os
+import re
 import sys
 import tempfile
 import shutil
 import subprocess
 import json
 import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Request, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 import werkzeug
+from werkzeug.exceptions import RequestEntityTooLarge
 
 # Add GhostLink to Python path (ghostFace is inside GhostLink folder)
 ghostlink_path = Path(__file__).parent.parent
@@ -24,13 +35,30 @@ sys.path.insert(0, str(ghostlink_path))
 try:
     from ghostlink import __main__ as ghostlink_main
     from ghostlink import decoder as ghostlink_decoder
+    from ghostlink import metrics as ghostlink_metrics
     GHOSTLINK_AVAILABLE = True
 except ImportError:
     GHOSTLINK_AVAILABLE = False
     ghostlink_main = None
     ghostlink_decoder = None
+    ghostlink_metrics = None
+
+# Uploads larger than this are rejected with 413
+MAX_UPLOAD_BYTES = int(float(os.environ.get("GHOSTFACE_MAX_UPLOAD_MB", "256")) * 1024 * 1024)
+# Uploads stay in memory up to this size and spill to a temp file above it
+UPLOAD_SPOOL_BYTES = int(float(os.environ.get("GHOSTFACE_UPLOAD_SPOOL_MB", "16")) * 1024 * 1024)
+
+
+class GhostRequest(Request):
+    """Request that buffers file uploads in memory up to UPLOAD_SPOOL_BYTES"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_BYTES, mode="rb+")
+
 
 app = Flask(__name__)
+app.request_class = GhostRequest
+app.config["MAX_CONTENT_LENGTH"] = MAX_UPLOAD_BYTES
 CORS(app)  # Enable CORS for web interface
 
 # Configure logging
@@ -38,11 +66,7 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class GhostLinkAPI:
-    def __init__(self):
-        self.temp_dir = Path(tempfile.mkdtemp(prefix="ghostlink_web_"))
-        logger.info(f"Initialized GhostLink API with temp directory: {self.temp_dir}")
-    
-    def encode_text(self, text, output_dir, **kwargs):
+    def encode_text(self, text, output_dir, progress=None, **kwargs):
         """Encode text using GhostLink"""
         if not GHOSTLINK_AVAILABLE:
             return {"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}
@@ -55,39 +79,16 @@ class GhostLinkAPI:
             # Prepare arguments for GhostLink
             args = self._prepare_encode_args("text", text, str(output_path), **kwargs)
             
-            # Run encoding
-            result = ghostlink_main.main_with_args(args)
-            
-            if result == 0:
-                # Find the generated file - prefer the main file (not slow versions)
-                wav_files = list(output_path.glob("*.wav"))
-                if wav_files:
-                    # Sort files by modification time (newest first)
-                    wav_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                    
-                    # Look for the main file (without "slow" in the name) among the newest files
-                    main_file = None
-                    for wav_file in wav_files:
-                        if "slow" not in wav_file.name:
-                            main_file = wav_file
-                            break
-                    
-                    # If no main file found, use the newest file
-                    if not main_file:
-                        main_file = wav_files[0]
-                    
-                    logger.info(f"Selected file: {main_file.name}")
-                    return {"success": True, "file": str(main_file)}
-                else:
-                    return {"success": False, "error": "No output file generated"}
-            else:
-                return {"success": False, "error": f"Encoding failed with code {result}"}
+            # Run encoding; the result names the exact files written
+            return self._single_result(ghostlink_main.encode_with_args(args, progress=progress))
                 
+        except SystemExit:
+            return {"success": False, "error": "Invalid encoding parameters"}
         except Exception as e:
             logger.error(f"Encode error: {e}")
             return {"success": False, "error": str(e)}
     
-    def encode_file(self, file_path, output_dir, **kwargs):
+    def encode_file(self, file_path, output_dir, progress=None, **kwargs):
         """Encode a file using GhostLink"""
         if not GHOSTLINK_AVAILABLE:
             return {"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}
@@ -97,37 +98,15 @@ class GhostLinkAPI:
             output_path.mkdir(parents=True, exist_ok=True)
             
             args = self._prepare_encode_args("file", file_path, str(output_path), **kwargs)
-            result = ghostlink_main.main_with_args(args)
-            
-            if result == 0:
-                wav_files = list(output_path.glob("*.wav"))
-                if wav_files:
-                    # Sort files by modification time (newest first)
-                    wav_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-                    
-                    # Look for the main file (without "slow" in the name) among the newest files
-                    main_file = None
-                    for wav_file in wav_files:
-                        if "slow" not in wav_file.name:
-                            main_file = wav_file
-                            break
-                    
-                    # If no main file found, use the newest file
-                    if not main_file:
-                        main_file = wav_files[0]
-                    
-                    logger.info(f"Selected file: {main_file.name}")
-                    return {"success": True, "file": str(main_file)}
-                else:
-                    return {"success": False, "error": "No output file generated"}
-            else:
-                return {"success": False, "error": f"Encoding failed with code {result}"}
+            return self._single_result(ghostlink_main.encode_with_args(args, progress=progress))
                 
+        except SystemExit:
+            return {"success": False, "error": "Invalid encoding parameters"}
         except Exception as e:
             logger.error(f"Encode file error: {e}")
             return {"success": False, "error": str(e)}
     
-    def encode_directory(self, input_dir, output_dir, **kwargs):
+    def encode_directory(self, input_dir, output_dir, progress=None, **kwargs):
         """Encode all text files in a directory using GhostLink"""
         if not GHOSTLINK_AVAILABLE:
             return {"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}
@@ -137,54 +116,58 @@ class GhostLinkAPI:
             output_path.mkdir(parents=True, exist_ok=True)
             
             args = self._prepare_encode_args("dir", input_dir, str(output_path), **kwargs)
-            result = ghostlink_main.main_with_args(args)
-            
-            if result == 0:
-                wav_files = list(output_path.glob("*.wav"))
-                return {"success": True, "files": [str(f) for f in wav_files]}
-            else:
-                return {"success": False, "error": f"Encoding failed with code {result}"}
+            results = ghostlink_main.encode_with_args(args, progress=progress)
+            return {
+                "success": True,
+                "files": [r.wav_path for r in results if r.ok],
+                "results": [r.to_dict() for r in results],
+            }
                 
+        except SystemExit:
+            return {"success": False, "error": "Invalid encoding parameters"}
         except Exception as e:
             logger.error(f"Encode directory error: {e}")
             return {"success": False, "error": str(e)}
     
-    def decode_file(self, file_path, **kwargs):
-        """Decode a WAV file using GhostLink"""
+    def _single_result(self, results):
+        """Convert the encoder result for a text/file encode into a response"""
+        if not results:
+            return {"success": False, "error": "No output file generated"}
+        res = results[0]
+        if not res.ok:
+            return {"success": False, "error": res.error}
+        logger.info(f"Selected file: {Path(res.wav_path).name}")
+        return {
+            "success": True,
+            "file": res.wav_path,
+            "midi": res.midi_path,
+            "variants": res.variants,
+            "sha256": res.sha256,
+            "skipped": res.skipped,
+            "timings": res.timings,
+        }
+    
+    def decode_file(self, source, **kwargs):
+        """Decode a WAV path or binary file-like object using GhostLink"""
         if not GHOSTLINK_AVAILABLE:
             return {"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}
         
         try:
-            args = self._prepare_decode_args(file_path, **kwargs)
-            result = ghostlink_decoder.main_with_args(args)
-            
-            if result == 0:
-                # The decoder prints to stdout, so we need to capture it
-                # For now, we'll use subprocess to capture output
-                cmd = [
-                    sys.executable, "-m", "ghostlink.decoder",
-                    file_path,
-                    "--verbose" if kwargs.get("verbose", False) else ""
-                ]
-                
-                # Add other arguments
-                if kwargs.get("baud"):
-                    cmd.extend(["--baud", str(kwargs["baud"])])
-                if kwargs.get("preamble"):
-                    cmd.extend(["--preamble", str(kwargs["preamble"])])
-                if kwargs.get("sparse"):
-                    cmd.append("--sparse")
-                if kwargs.get("mix_profile"):
-                    cmd.extend(["--mix-profile", kwargs["mix_profile"]])
-                
-                result = subprocess.run(cmd, capture_output=True, text=True, cwd=str(ghostlink_path))
-                
-                if result.returncode == 0:
-                    return {"success": True, "decoded_text": result.stdout.strip()}
-                else:
-                    return {"success": False, "error": result.stderr.strip()}
-            else:
-                return {"success": False, "error": f"Decoding failed with code {result}"}
+            args = self._prepare_decode_args(source, **kwargs)
+            if not 1 <= args.interleave <= 64:
+                return {"success": False, "error": "interleave depth must be 1..64"}
+            if not 1 <= args.repeats <= 16:
+                return {"success": False, "error": "repeats must be 1..16"}
+            msg = ghostlink_decoder.decode_wav(
+                args.wav,
+                baud=args.baud,
+                dense=not args.sparse,
+                mix_profile=args.mix_profile,
+                preamble_s=args.preamble,
+                interleave_depth=args.interleave,
+                repeats=args.repeats,
+            )
+            return {"success": True, "decoded_text": ghostlink_decoder.ascii_only(msg)}
                 
         except Exception as e:
             logger.error(f"Decode error: {e}")
@@ -192,7 +175,7 @@ class GhostLinkAPI:
     
     def _prepare_encode_args(self, mode, input_arg, output_dir, **kwargs):
         """Prepare arguments for GhostLink encoding"""
-        args = type('Args', (), {})()
+        args = argparse.Namespace()
         args.mode = mode
         args.input = input_arg
         args.outdir = output_dir
@@ -213,10 +196,10 @@ class GhostLinkAPI:
         args.verbose = kwargs.get("verbose", True)
         return args
     
-    def _prepare_decode_args(self, file_path, **kwargs):
+    def _prepare_decode_args(self, source, **kwargs):
         """Prepare arguments for GhostLink decoding"""
-        args = type('Args', (), {})()
-        args.wav = file_path
+        args = argparse.Namespace()
+        args.wav = source
         args.baud = kwargs.get("baud", 90)
         args.dense = kwargs.get("dense", True)
         args.sparse = kwargs.get("sparse", False)
@@ -227,76 +210,429 @@ class GhostLinkAPI:
         args.verbose = kwargs.get("verbose", True)
         return args
 
+class JobQueueFull(Exception):
+    """Raised when the job queue cannot accept another job"""
+
+
+class Job:
+    """A background encode tracked by the JobManager"""
+
+    FINISHED = ("done", "failed", "cancelled")
+
+    def __init__(self, kind):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.progress = {"stage": None, "input": None, "file_index": 0, "file_total": 0, "percent": 0.0}
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.future = None
+
+    @classmethod
+    def from_row(cls, row):
+        """Rebuild a job snapshot stored by another worker process"""
+        job = cls(row[1])
+        job.id = row[0]
+        job.status, job.created, job.started, job.finished = row[2:6]
+        job.progress = json.loads(row[6])
+        job.result = json.loads(row[7]) if row[7] else None
+        job.error = row[8]
+        return job
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": dict(self.progress),
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def _pid_alive(pid):
+    """Whether process ``pid`` is still running on this host"""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill(pid, 0) would send a console control event there; there are no prefork siblings either
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobManager:
+    """Runs encodes on a bounded worker pool and tracks their progress.
+
+    Jobs receive a ``progress`` callback which the encoder invokes per file
+    and per stage; cancellation is honoured at the next such boundary.
+
+    With ``state_db`` set, job state is mirrored to a SQLite file so that
+    every worker process of a prefork server can report on and cancel jobs
+    running in its siblings. Each row records the process that owns it;
+    on startup, queued or running rows whose owner has exited are marked
+    failed so they no longer count against the queue limit.
+    """
+
+    def __init__(self, workers=2, max_pending=32, keep_finished=200, state_db=None):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.keep_finished = keep_finished
+        self.state_db = state_db
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ghostface-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        if state_db:
+            self._db_init()
+
+    def submit(self, kind, task):
+        """Queue ``task(progress=...)`` and return its Job"""
+        with self._lock:
+            active = self._active_count()
+            if active >= self.workers + self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({active} active jobs)")
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._prune()
+            self._save(job)
+        job.future = self._executor.submit(self._run, job, task)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.state_db:
+            with self._connect() as conn:
+                row = conn.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            job = Job.from_row(row) if row else None
+        return job
+
+    def list(self):
+        if self.state_db:
+            with self._connect() as conn:
+                rows = conn.execute(f"SELECT {self._COLUMNS} FROM jobs ORDER BY created").fetchall()
+            return [Job.from_row(row) for row in rows]
+        with self._lock:
+            return list(self._jobs.values())
+
+    def queue_depth(self):
+        if self.state_db:
+            with self._connect() as conn:
+                return conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+        with self._lock:
+            return sum(1 for j in self._jobs.values() if j.status == "queued")
+
+    def cancel(self, job_id):
+        """Request cancellation; returns False if the job already finished"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            if not self.state_db:
+                return False
+            # Owned by another worker; it checks the flag at its next boundary
+            with self._connect() as conn:
+                cur = conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status IN ('queued', 'running')",
+                    (job_id,))
+            return cur.rowcount > 0
+        if job.status in Job.FINISHED:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            # Never started, so nothing else will finish it
+            self._finish(job, "cancelled")
+        return True
+
+    def shutdown(self):
+        """Cancel queued jobs and wait for running ones to finish"""
+        with self._lock:
+            pending = [j for j in self._jobs.values() if j.status == "queued"]
+        for job in pending:
+            self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+    # -- state ---------------------------------------------------------
+
+    _COLUMNS = "id, kind, status, created, started, finished, progress, result, error"
+
+    def _connect(self):
+        return sqlite3.connect(self.state_db, timeout=10)
+
+    def _db_init(self):
+        with self._connect() as conn:
+            conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                progress TEXT NOT NULL,
+                result TEXT,
+                error TEXT,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                owner INTEGER
+            )
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "owner" not in columns:
+                try:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN owner INTEGER")
+                except sqlite3.OperationalError:
+                    pass  # a sibling worker added it first
+            self._fail_orphans(conn)
+
+    def _fail_orphans(self, conn):
+        """Mark unfinished jobs left behind by exited processes as failed"""
+        rows = conn.execute("SELECT id, owner FROM jobs WHERE status IN ('queued', 'running')").fetchall()
+        orphans = [job_id for job_id, owner in rows if owner is None or not _pid_alive(owner)]
+        conn.executemany(
+            "UPDATE jobs SET status = 'failed', finished = ?, error = ? "
+            "WHERE id = ? AND status IN ('queued', 'running')",
+            [(time.time(), "Server process exited before the job finished", job_id) for job_id in orphans])
+        if orphans:
+            logger.warning(f"Marked {len(orphans)} orphaned job(s) as failed")
+
+    def _save(self, job):
+        """Mirror a job to the shared state DB (caller holds the lock)"""
+        if not self.state_db:
+            return
+        with self._connect() as conn:
+            conn.execute("""
+            INSERT INTO jobs (id, kind, status, created, started, finished, progress, result, error, owner)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET status = excluded.status, started = excluded.started,
+                finished = excluded.finished, progress = excluded.progress,
+                result = excluded.result, error = excluded.error
+            """, (job.id, job.kind, job.status, job.created, job.started, job.finished,
+                  json.dumps(job.progress), json.dumps(job.result) if job.result is not None else None,
+                  job.error, os.getpid()))
+
+    def _active_count(self):
+        if self.state_db:
+            with self._connect() as conn:
+                return conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+        return sum(1 for j in self._jobs.values() if j.status not in Job.FINISHED)
+
+    def _cancel_requested(self, job):
+        if job.cancel_event.is_set():
+            return True
+        if self.state_db:
+            with self._connect() as conn:
+                row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job.id,)).fetchone()
+            if row and row[0]:
+                job.cancel_event.set()
+                return True
+        return False
+
+    def _prune(self):
+        finished = [j.id for j in self._jobs.values() if j.status in Job.FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.keep_finished)]:
+            del self._jobs[job_id]
+        if self.state_db:
+            with self._connect() as conn:
+                conn.execute("""
+                DELETE FROM jobs WHERE id IN (
+                    SELECT id FROM jobs WHERE status IN ('done', 'failed', 'cancelled')
+                    ORDER BY finished DESC LIMIT -1 OFFSET ?
+                )
+                """, (self.keep_finished,))
+
+    # -- execution -----------------------------------------------------
+
+    def _finish(self, job, status, result=None, error=None):
+        with self._lock:
+            job.status = status
+            job.result = result
+            job.error = error
+            job.finished = time.time()
+            if status == "done":
+                job.progress["percent"] = 100.0
+            self._save(job)
+
+    def _run(self, job, task):
+        if self._cancel_requested(job):
+            self._finish(job, "cancelled")
+            return
+        with self._lock:
+            job.status = "running"
+            job.started = time.time()
+            self._save(job)
+        try:
+            result = task(progress=lambda event, info: self._on_progress(job, event, info))
+        except Exception as e:
+            if job.cancel_event.is_set():
+                self._finish(job, "cancelled")
+            else:
+                logger.error(f"Job {job.id} failed: {e}")
+                self._finish(job, "failed", error=str(e))
+            return
+        if job.cancel_event.is_set():
+            self._finish(job, "cancelled", result=result)
+        elif result.get("success"):
+            self._finish(job, "done", result=result)
+        else:
+            self._finish(job, "failed", result=result, error=result.get("error"))
+
+    def _on_progress(self, job, event, info):
+        if self._cancel_requested(job):
+            raise ghostlink_main.EncodeCancelled(f"job {job.id} cancelled")
+        with self._lock:
+            progress = job.progress
+            if event in ("file", "file_done"):
+                # "file" is sent as a file starts, "file_done" once it has finished
+                progress["file_index"] = info["index"]
+                progress["file_total"] = max(info["total"], info["index"])
+                progress["input"] = info["input"]
+                progress["stage"] = None
+                done_stages = len(ghostlink_main.ENCODE_STAGES) if event == "file_done" else 0
+            else:
+                progress["stage"] = info["stage"]
+                done_stages = ghostlink_main.ENCODE_STAGES.index(info["stage"])
+            total = max(1, progress["file_total"])
+            per_file = done_stages / len(ghostlink_main.ENCODE_STAGES)
+            progress["percent"] = round(100.0 * (max(0, progress["file_index"] - 1) + per_file) / total, 1)
+            self._save(job)
+
+
 # Initialize the API
 ghostlink_api = GhostLinkAPI()
+job_manager = JobManager(
+    workers=int(os.environ.get("GHOSTFACE_JOB_WORKERS", "2")),
+    max_pending=int(os.environ.get("GHOSTFACE_JOB_QUEUE", "32")),
+    state_db=os.environ.get("GHOSTFACE_JOB_DB") or None,
+)
+
+
+# Process pool used by /api/batch; see _get_batch_pool
+BATCH_WORKERS = int(os.environ.get("GHOSTFACE_BATCH_WORKERS", str(os.cpu_count() or 2)))
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+SLOW_VARIANT_RE = re.compile(r"_slow\d+\.wav$")
+
+
+def _submit_job(kind, task):
+    """Queue a task and return the 202 response pointing at its status"""
+    try:
+        job = job_manager.submit(kind, task)
+    except JobQueueFull as e:
+        return jsonify({"success": False, "error": str(e)}), 503
+    return jsonify({"success": True, "job_id": job.id, "status_url": f"/api/jobs/{job.id}"}), 202
+
+def _encode_params(data):
+    """Extract encoding parameters from a JSON payload"""
+    return {
+        "samplerate": data.get("samplerate", 48000),
+        "baud": data.get("baud", 90),
+        "amp": data.get("amp", 0.06),
+        "dense": data.get("fsk_mode") == "dense",
+        "sparse": data.get("fsk_mode") == "sparse",
+        "mix_profile": data.get("mix_profile", "streaming"),
+        "gap": data.get("gap", 0),
+        "preamble": data.get("preamble", 0.8),
+        "interleave": data.get("interleave", 4),
+        "repeats": data.get("repeats", 2),
+        "ramp": data.get("ramp", 5),
+        "bit_depth": data.get("bit_depth", 16),
+        "channels": data.get("channels", 1),
+        "verbose": True
+    }
+
+def _decode_params(data):
+    """Extract decoding parameters from a JSON payload"""
+    return {
+        "baud": float(data.get("baud", 90)),
+        "dense": data.get("fsk_mode") == "dense",
+        "sparse": data.get("fsk_mode") == "sparse",
+        "mix_profile": data.get("mix_profile", "streaming"),
+        "preamble": float(data.get("preamble", 0.8)),
+        "interleave": int(data.get("interleave", 4)),
+        "repeats": int(data.get("repeats", 2)),
+        "verbose": True
+    }
+
+def _encode_task(data):
+    """Validate an /api/encode payload.
+
+    Returns ``(task, None)`` where ``task(progress=None)`` runs the encode,
+    or ``(None, error_response)``.
+    """
+    mode = data.get("mode")
+    ghostlink_dir = data.get("ghostlink_dir")
+    output_dir = data.get("output_dir")
+    
+    if not all([mode, ghostlink_dir, output_dir]):
+        return None, (jsonify({"success": False, "error": "Missing required parameters"}), 400)
+    
+    params = _encode_params(data)
+    
+    # Only add custom filename for text and file modes (not dir mode)
+    if mode in ["text", "file"]:
+        custom_filename = data.get("custom_filename")
+        logger.info(f"Custom filename received: '{custom_filename}' for mode: {mode}")
+        if custom_filename and custom_filename.strip():
+            params["out_name"] = custom_filename
+            logger.info(f"Setting out_name to: '{custom_filename}'")
+        else:
+            logger.info("No custom filename provided or empty")
+    else:
+        logger.info(f"Custom filename not supported for mode: {mode}")
+    
+    if mode == "text":
+        text = data.get("text")
+        if not text:
+            return None, (jsonify({"success": False, "error": "No text provided"}), 400)
+        return (lambda progress=None: ghostlink_api.encode_text(text, output_dir, progress=progress, **params)), None
+        
+    elif mode == "file":
+        file_path = data.get("file_path")
+        if not file_path:
+            return None, (jsonify({"success": False, "error": "No file path provided"}), 400)
+        return (lambda progress=None: ghostlink_api.encode_file(file_path, output_dir, progress=progress, **params)), None
+        
+    elif mode == "dir":
+        input_dir = data.get("input_dir")
+        if not input_dir:
+            return None, (jsonify({"success": False, "error": "No input directory provided"}), 400)
+        return (lambda progress=None: ghostlink_api.encode_directory(input_dir, output_dir, progress=progress, **params)), None
+        
+    return None, (jsonify({"success": False, "error": f"Unknown mode: {mode}"}), 400)
 
 @app.route('/api/encode', methods=['POST'])
 def encode():
-    """Encode text, file, or directory"""
+    """Encode text, file, or directory.
+
+    With ``"async": true`` the encode is queued as a background job and a
+    job ID is returned immediately; poll ``/api/jobs/<id>`` for progress.
+    """
     try:
         data = request.get_json()
         
         if not data:
             return jsonify({"success": False, "error": "No data provided"}), 400
         
-        mode = data.get("mode")
-        ghostlink_dir = data.get("ghostlink_dir")
-        output_dir = data.get("output_dir")
-        
-        if not all([mode, ghostlink_dir, output_dir]):
-            return jsonify({"success": False, "error": "Missing required parameters"}), 400
+        task, error = _encode_task(data)
+        if error:
+            return error
         
-        # Extract encoding parameters
-        params = {
-            "samplerate": data.get("samplerate", 48000),
-            "baud": data.get("baud", 90),
-            "amp": data.get("amp", 0.06),
-            "dense": data.get("fsk_mode") == "dense",
-            "sparse": data.get("fsk_mode") == "sparse",
-            "mix_profile": data.get("mix_profile", "streaming"),
-            "gap": data.get("gap", 0),
-            "preamble": data.get("preamble", 0.8),
-            "interleave": data.get("interleave", 4),
-            "repeats": data.get("repeats", 2),
-            "ramp": data.get("ramp", 5),
-            "bit_depth": data.get("bit_depth", 16),
-            "channels": data.get("channels", 1),
-            "verbose": True
-        }
-        
-        # Only add custom filename for text and file modes (not dir mode)
-        if mode in ["text", "file"]:
-            custom_filename = data.get("custom_filename")
-            logger.info(f"Custom filename received: '{custom_filename}' for mode: {mode}")
-            if custom_filename and custom_filename.strip():
-                params["out_name"] = custom_filename
-                logger.info(f"Setting out_name to: '{custom_filename}'")
-            else:
-                logger.info("No custom filename provided or empty")
-        else:
-            logger.info(f"Custom filename not supported for mode: {mode}")
-        
-        if mode == "text":
-            text = data.get("text")
-            if not text:
-                return jsonify({"success": False, "error": "No text provided"}), 400
-            result = ghostlink_api.encode_text(text, output_dir, **params)
-            
-        elif mode == "file":
-            file_path = data.get("file_path")
-            if not file_path:
-                return jsonify({"success": False, "error": "No file path provided"}), 400
-            result = ghostlink_api.encode_file(file_path, output_dir, **params)
-            
-        elif mode == "dir":
-            input_dir = data.get("input_dir")
-            if not input_dir:
-                return jsonify({"success": False, "error": "No input directory provided"}), 400
-            result = ghostlink_api.encode_directory(input_dir, output_dir, **params)
-            
-        else:
-            return jsonify({"success": False, "error": f"Unknown mode: {mode}"}), 400
+        if data.get("async"):
+            return _submit_job(f"encode-{data['mode']}", task)
         
+        result = task()
         logger.info(f"API returning result: {result}")
         return jsonify(result)
         
@@ -304,9 +640,82 @@ def encode():
         logger.error(f"Encode API error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/encode/stream', methods=['POST'])
+def encode_stream():
+    """Render text and stream the audio back while it is synthesized.
+
+    Nothing is written to disk or the history DB. ``"format": "pcm"``
+    returns headerless PCM instead of a WAV file.
+    """
+    if not GHOSTLINK_AVAILABLE:
+        return jsonify({"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}), 503
+    try:
+        data = request.get_json()
+        if not data or not data.get("text"):
+            return jsonify({"success": False, "error": "No text provided"}), 400
+        fmt = data.get("format", "wav")
+        if fmt not in ("wav", "pcm"):
+            return jsonify({"success": False, "error": f"Unknown format: {fmt}"}), 400
+        
+        args = ghostlink_api._prepare_encode_args(
+            "text", data["text"], "",
+            samplerate=int(data.get("samplerate", 48000)),
+            baud=float(data.get("baud", 90)),
+            amp=float(data.get("amp", 0.06)),
+            sparse=data.get("fsk_mode") == "sparse",
+            mix_profile=data.get("mix_profile", "streaming"),
+            gap=float(data.get("gap", 0)),
+            preamble=float(data.get("preamble", 0.8)),
+            interleave=int(data.get("interleave", 4)),
+            repeats=int(data.get("repeats", 2)),
+            ramp=float(data.get("ramp", 5)),
+            bit_depth=int(data.get("bit_depth", 16)),
+            channels=int(data.get("channels", 1)),
+        )
+        try:
+            ghostlink_main.validate_args(args)
+        except SystemExit:
+            return jsonify({"success": False, "error": "Invalid encoding parameters"}), 400
+        
+        total, chunks = ghostlink_main.stream_wav(
+            args.input.encode("utf-8"),
+            samplerate=args.samplerate,
+            baud=args.baud,
+            amp=args.amp,
+            dense=not args.sparse,
+            mix_profile=args.mix_profile,
+            gap_ms=args.gap,
+            preamble_s=args.preamble,
+            interleave_depth=args.interleave,
+            repeats=args.repeats,
+            ramp_ms=args.ramp,
+            bit_depth=args.bit_depth,
+            channels=args.channels,
+            raw=fmt == "pcm",
+        )
+        headers = {
+            "Content-Length": str(total),
+            "X-GhostLink-Samplerate": str(args.samplerate),
+            "X-GhostLink-Channels": str(args.channels),
+            "X-GhostLink-Bit-Depth": str(args.bit_depth),
+        }
+        if fmt == "wav":
+            headers["Content-Disposition"] = 'inline; filename="ghostlink.wav"'
+        mimetype = "audio/wav" if fmt == "wav" else "application/octet-stream"
+        return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+        
+    except Exception as e:
+        logger.error(f"Encode stream API error: {e}")
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @app.route('/api/decode', methods=['POST'])
 def decode():
-    """Decode a WAV file"""
+    """Decode an uploaded WAV file.
+
+    The upload is decoded straight from the request's file stream, which
+    stays in memory up to ``GHOSTFACE_UPLOAD_SPOOL_MB`` and spills to an
+    anonymous temporary file above that.
+    """
     try:
         # Handle file upload
         if 'file' not in request.files:
@@ -316,12 +725,6 @@ def decode():
         if file.filename == '':
             return jsonify({"success": False, "error": "No file selected"}), 400
         
-        # Save uploaded file to temp directory
-        import tempfile
-        temp_dir = Path(tempfile.mkdtemp(prefix="ghostlink_decode_"))
-        file_path = temp_dir / file.filename
-        file.save(str(file_path))
-        
         ghostlink_dir = request.form.get("ghostlink_dir")
         
         if not ghostlink_dir:
@@ -339,24 +742,207 @@ def decode():
             "verbose": True
         }
         
-        result = ghostlink_api.decode_file(str(file_path), **params)
-        
-        # Clean up temp file
-        try:
-            file_path.unlink()
-            temp_dir.rmdir()
-        except:
-            pass
-        
-        return jsonify(result)
+        return jsonify(ghostlink_api.decode_file(file.stream, **params))
         
+    except RequestEntityTooLarge:
+        raise
     except Exception as e:
         logger.error(f"Decode API error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.errorhandler(413)
+def upload_too_large(e):
+    """Reject uploads above MAX_CONTENT_LENGTH"""
+    limit = app.config.get("MAX_CONTENT_LENGTH")
+    return jsonify({"success": False, "error": f"Upload exceeds the {limit} byte limit"}), 413
+
+# Shared by all server processes: each writes its own metrics snapshot here
+# and /api/metrics sums them. Unset means single process.
+METRICS_DIR = os.environ.get("GHOSTFACE_METRICS_DIR") or None
+METRICS_PUBLISH_INTERVAL = 1.0
+_metrics_published = 0.0
+
+
+def publish_metrics(force=False):
+    """Write this process's metrics snapshot to METRICS_DIR (throttled)"""
+    global _metrics_published
+    if not METRICS_DIR or not GHOSTLINK_AVAILABLE:
+        return
+    now = time.monotonic()
+    if not force and now - _metrics_published < METRICS_PUBLISH_INTERVAL:
+        return
+    _metrics_published = now
+    path = os.path.join(METRICS_DIR, f"{os.getpid()}.json")
+    try:
+        with open(path + ".tmp", "w") as f:
+            json.dump(ghostlink_metrics.METRICS.snapshot(), f)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.warning(f"[!] Failed to publish metrics: {e}")
+
+@app.after_request
+def _publish_after_request(response):
+    publish_metrics()
+    return response
+
+def _collect_metrics():
+    """Metrics for every server process plus the job gauges"""
+    merged = ghostlink_metrics.Metrics()
+    if METRICS_DIR:
+        publish_metrics(force=True)
+        for snap_path in Path(METRICS_DIR).glob("*.json"):
+            try:
+                merged.merge(json.loads(snap_path.read_text()))
+            except (OSError, ValueError):
+                continue  # mid-write or removed; picked up on the next scrape
+    else:
+        merged.merge(ghostlink_metrics.METRICS.snapshot())
+    # Job state is shared between workers, so report it once rather than summed
+    merged.set_gauge("ghostface_job_queue_depth", job_manager.queue_depth())
+    merged.set_gauge("ghostface_jobs_active", job_manager._active_count())
+    return merged
+
+def _get_batch_pool():
+    """Process pool for batch fan-out, created lazily in each server process"""
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS,
+                                              mp_context=multiprocessing.get_context("spawn"))
+        return _batch_pool
+
+def _batch_files(batch_mode, input_dir, data):
+    """Inputs for a batch: every candidate in input_dir, or just ``files``"""
+    if data.get("files"):
+        return [str(Path(input_dir) / f) for f in data["files"]]
+    if batch_mode == "encode":
+        # Top level only: outputs are named after the file, so nested duplicates would collide
+        return ghostlink_main.list_text_files(input_dir, recursive=False)
+    wavs = sorted(str(p) for p in Path(input_dir).glob("*.wav") if p.is_file())
+    if not data.get("include_variants"):
+        # Slowed companions are not decodable at the original baud
+        wavs = [w for w in wavs if not SLOW_VARIANT_RE.search(w)]
+    return wavs
+
+def _batch_plan(batch_mode, data):
+    """Validate a batch payload.
+
+    Returns ``(plan, None)`` where ``plan`` is a list of ``(file, fn, args)``
+    calls to fan out, or ``(None, error_response)``. Listed files that are
+    missing get ``fn=None`` and are reported as failed without running.
+    """
+    input_dir = data.get("input_dir")
+    output_dir = data.get("output_dir")
+    if not input_dir or not Path(input_dir).is_dir():
+        return None, (jsonify({"success": False, "error": "Input directory not found"}), 400)
+    
+    plan = []
+    if batch_mode == "encode":
+        if not output_dir:
+            return None, (jsonify({"success": False, "error": "Missing output directory"}), 400)
+        params = _encode_params(data)
+        try:
+            # Validate once up front; the per-file calls then cannot exit
+            ghostlink_main.validate_args(ghostlink_api._prepare_encode_args("text", "", output_dir, **params))
+        except SystemExit:
+            return None, (jsonify({"success": False, "error": "Invalid encoding parameters"}), 400)
+        Path(output_dir).mkdir(parents=True, exist_ok=True)
+        for path in _batch_files(batch_mode, input_dir, data):
+            if not Path(path).is_file():
+                plan.append((path, None, ()))
+                continue
+            args = ghostlink_api._prepare_encode_args("file", path, output_dir, **params)
+            plan.append((path, ghostlink_main.encode_with_args, (args,)))
+    else:
+        args = ghostlink_api._prepare_decode_args(None, **_decode_params(data))
+        if not 1 <= args.interleave <= 64 or not 1 <= args.repeats <= 16:
+            return None, (jsonify({"success": False, "error": "Invalid decoding parameters"}), 400)
+        for path in _batch_files(batch_mode, input_dir, data):
+            if not Path(path).is_file():
+                plan.append((path, None, ()))
+                continue
+            plan.append((path, ghostlink_decoder.decode_wav,
+                         (path, args.baud, not args.sparse, args.mix_profile,
+                          args.preamble, args.interleave, args.repeats)))
+    return plan, None
+
+def _batch_outcome(path, future):
+    """Turn a finished batch future into a per-file result record"""
+    try:
+        value, snapshot = future.result()
+    except (Exception, SystemExit) as e:
+        ghostlink_metrics.METRICS.merge(getattr(e, "metrics", {}))
+        return {"file": path, "success": False, "error": str(e) or type(e).__name__}
+    # Work done in the pool child counts towards this process's metrics
+    ghostlink_metrics.METRICS.merge(snapshot)
+    if isinstance(value, bytes):
+        return {"file": path, "success": True, "decoded_text": ghostlink_decoder.ascii_only(value)}
+    res = value[0] if value else None
+    if res is None:
+        return {"file": path, "success": False, "error": "No output file generated"}
+    return dict(res.to_dict(), file=path, success=res.ok)
+
+def _run_batch(plan):
+    """Fan the plan out on the process pool, yielding results as they finish"""
+    global _batch_pool
+    pool = _get_batch_pool()
+    futures = {pool.submit(ghostlink_metrics.call_with_metrics, fn, *args): path
+               for path, fn, args in plan if fn is not None}
+    done = 0
+    try:
+        for path, fn, _ in plan:
+            if fn is None:
+                done += 1
+                yield {"file": path, "success": False, "error": "File not found",
+                       "index": done, "total": len(plan)}
+        for future in as_completed(futures):
+            done += 1
+            record = _batch_outcome(futures[future], future)
+            record.update(index=done, total=len(plan))
+            yield record
+    finally:
+        # Client went away or the job was cancelled: drop work not yet started
+        for future in futures:
+            future.cancel()
+        if any(isinstance(f.exception(), BrokenProcessPool) for f in futures if f.done() and not f.cancelled()):
+            # A child died; start a fresh pool for the next batch
+            with _batch_pool_lock:
+                if _batch_pool is pool:
+                    _batch_pool = None
+
+def _batch_summary(records, total):
+    failed = [r["file"] for r in records if not r["success"]]
+    return {"done": True, "total": total, "succeeded": len(records) - len(failed), "failed": failed}
+
+def _stream_batch(plan):
+    records = []
+    for record in _run_batch(plan):
+        records.append(record)
+        yield json.dumps(record) + "\n"
+    yield json.dumps(_batch_summary(records, len(plan))) + "\n"
+
+def _collect_batch(plan, progress=None):
+    """Run a batch to completion (for background jobs)"""
+    records = []
+    for record in _run_batch(plan):
+        records.append(record)
+        if progress is not None:
+            # record["index"] counts finished files
+            progress("file_done", {"index": record["index"], "total": len(plan), "input": record["file"]})
+    summary = _batch_summary(records, len(plan))
+    return dict(summary, success=not summary["failed"], results=records,
+                error=f"{len(summary['failed'])} file(s) failed" if summary["failed"] else None)
+
 @app.route('/api/batch', methods=['POST'])
 def batch():
-    """Batch processing"""
+    """Batch processing.
+
+    ``encode`` and ``decode`` modes take the full parameter set, fan out
+    across a process pool and stream one NDJSON record per file as each
+    finishes, followed by a summary record listing failures; pass
+    ``files`` to rerun just those. ``encode-multiple`` is the legacy
+    single-response directory encode.
+    """
     try:
         data = request.get_json()
         
@@ -368,21 +954,67 @@ def batch():
         output_dir = data.get("output_dir")
         ghostlink_dir = data.get("ghostlink_dir")
         
+        if batch_mode in ("encode", "decode"):
+            if not ghostlink_dir:
+                return jsonify({"success": False, "error": "Missing required parameters"}), 400
+            if not GHOSTLINK_AVAILABLE:
+                return jsonify({"success": False, "error": "GhostLink not installed. Please install it first using the Install tab."}), 503
+            plan, error = _batch_plan(batch_mode, data)
+            if error:
+                return error
+            if data.get("async"):
+                return _submit_job(f"batch-{batch_mode}", lambda progress=None: _collect_batch(plan, progress))
+            return Response(stream_with_context(_stream_batch(plan)), mimetype="application/x-ndjson")
+        
         if not all([batch_mode, input_dir, output_dir, ghostlink_dir]):
             return jsonify({"success": False, "error": "Missing required parameters"}), 400
         
-        # For now, batch processing just encodes all files in the directory
         if batch_mode == "encode-multiple":
-            result = ghostlink_api.encode_directory(input_dir, output_dir)
+            task = lambda progress=None: ghostlink_api.encode_directory(input_dir, output_dir, progress=progress)
         else:
             return jsonify({"success": False, "error": f"Unsupported batch mode: {batch_mode}"}), 400
         
-        return jsonify(result)
+        if data.get("async"):
+            return _submit_job(f"batch-{batch_mode}", task)
+        
+        return jsonify(task())
         
     except Exception as e:
         logger.error(f"Batch API error: {e}")
         return jsonify({"success": False, "error": str(e)}), 500
 
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List queued, running and recently finished jobs"""
+    return jsonify({
+        "jobs": [job.to_dict() for job in job_manager.list()],
+        "queue_depth": job_manager.queue_depth(),
+    })
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Status, progress and (once finished) result of a job"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/api/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    """Cancel a queued or running job"""
+    if job_manager.get(job_id) is None:
+        return jsonify({"success": False, "error": f"Unknown job: {job_id}"}), 404
+    if not job_manager.cancel(job_id):
+        return jsonify({"success": False, "error": "Job already finished"}), 409
+    return jsonify({"success": True, "job_id": job_id})
+
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    """Prometheus text-format metrics"""
+    if not GHOSTLINK_AVAILABLE:
+        return jsonify({"success": False, "error": "GhostLink not available"}), 503
+    return Response(_collect_metrics().render_prometheus(), mimetype="text/plain; version=0.0.4")
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
@@ -477,6 +1109,5 @@ def install_all():
 if __name__ == '__main__':
     print("Starting GhostLink Web API...")
     print(f"GhostLink path: {ghostlink_path}")
-    print(f"Temp directory: {ghostlink_api.temp_dir}")
     print("API will be available at: http://localhost:5000")
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -30,6 +30,24 @@ def install_flask_dependencies():
         print(f"Error installing Flask: {e}")
         return False
 
+def create_app():
+    """Return the API app with the web interface routes attached"""
+    from flask import send_from_directory
+    from ghostlink_api import app
+    
+    web_dir = str(Path(__file__).parent.resolve())
+    
+    # Serve the web interface
+    @app.route('/')
+    def serve_web_interface():
+        return send_from_directory(web_dir, 'GhostWeb.html')
+    
+    @app.route('/<path:filename>')
+    def serve_static(filename):
+        return send_from_directory(web_dir, filename)
+    
+    return app
+
 def main():
     print("🚀 Starting GhostFace Web Interface...")
     print("📁 GhostLink path:", Path(__file__).parent.parent)
@@ -46,20 +64,7 @@ def main():
     
     # Now import Flask and start the server
     try:
-        from flask import Flask, send_from_directory
-        from ghostlink_api import app as api_app
-        
-        # Use the API app directly and add web interface routes
-        app = api_app
-        
-        # Serve the web interface
-        @app.route('/')
-        def serve_web_interface():
-            return send_from_directory('.', 'GhostWeb.html')
-        
-        @app.route('/<path:filename>')
-        def serve_static(filename):
-            return send_from_directory('.', filename)
+        app = create_app()
         
         print("🌐 Web interface: http://localhost:5001")
         print("🔌 API endpoint: http://localhost:5001/api")
@@ -72,6 +77,7 @@ def main():
         print("5. Click the action buttons to process")
         print("")
         print("Press Ctrl+C to stop the server")
+        print("(Development server. For production use: python ghostface.py serve)")
         
         app.run(debug=True, host='0.0.0.0', port=5001)
         
@@ -2,9 +2,56 @@
 
 This package exposes encoding and decoding helpers as well as the
 ``main`` function used by the ``ghostlink`` console script.
+
+Names are resolved lazily: ``import ghostlink`` loads nothing else, and
+``ghostlink.encode_bytes`` imports only the encoder, so the decoder CLI
+and library users never pay for modules they do not touch.
 """
 
-from .__main__ import *  # noqa: F401,F403
-from .profiles import freq_profile
+import importlib
+
+_EXPORTS = {
+    ".constants": ("GIB_MAGIC", "GIV_MAGIC", "HISTORY_DB"),
+    ".frame": ("FRAME_CODECS", "build_frame", "parse_frame"),
+    ".fec": ("FEC_SCHEMES",),
+    ".segments": ("DEFAULT_FRAME_SIZE", "FrameAssembler"),
+    ".profiles": ("freq_profile", "carrier_freqs", "FSK_ORDERS"),
+    ".results": ("EncodeResult", "DecodeResult"),
+    ".decoder": ("Decoder",),
+    ".metrics": ("METRICS", "record_timings", "timed"),
+    ".profiling": ("SpanRecorder", "listen", "span"),
+    ".history": ("db_init", "db_has_hash", "db_insert", "db_remove_hash",
+                 "db_save_preset", "db_get_preset", "db_list_presets"),
+    ".presets": ("save_preset", "load_preset", "list_presets"),
+    ".encoder": (
+        "ensure_dir", "format_timings", "sha256_hex",
+        "HAMMING74_ENCODE_TABLE", "hamming74_encode_nibble", "bytes_to_bits", "hamming74_encode_bytes",
+        "fec_encode_bytes", "interleave", "payload_symbols", "bits_to_symbols",
+        "raised_cosine_env", "advance_phase", "synth_tone", "boundary_phases", "symbols_to_audio", "write_wav", "wav_header",
+        "stretch_audio", "build_payload", "build_frames", "frames_symbols", "preamble", "tone_samples",
+        "pcm_frame_count", "iter_pcm", "warm_caches",
+        "SLOW_VARIANTS", "ENCODE_STAGES", "ProgressCallback", "EncodeCancelled",
+        "encode_bytes", "encode_bytes_to_wav", "stream_wav", "Encoder",
+    ),
+    ".__main__": (
+        "setup_logging", "iter_text_files", "list_text_files", "read_utf8_bytes",
+        "parse_args", "validate_args", "iter_inputs", "encode_with_args", "main_with_args", "main",
+    ),
+}
+
+_LOCATIONS = {name: module for module, names in _EXPORTS.items() for name in names}
+
+__all__ = list(_LOCATIONS)
+
+
+def __getattr__(name):
+    module = _LOCATIONS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
 
-__all__ = [name for name in globals() if not name.startswith('_')]
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
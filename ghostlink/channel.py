@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+GhostLink channel simulator: push encoder output through deterministic
+impairments and measure how the decoder copes.
+
+Impairments are applied in this order: time offset, gain, band-limiting,
+resampling, additive white Gaussian noise, clipping. Everything is seeded,
+so a trial run twice gives identical audio and identical results.
+
+Examples:
+  python -m ghostlink.channel --snr 30,20,10 --baud 90,120,180 --repeats 1,2
+  python -m ghostlink.channel --fec hamming74,rs,conv --snr 6,3,0 --repeats 1
+  python -m ghostlink.channel --resample 44100 --lowpass 8000 --clip 0.05 --offset 0.01
+"""
+
+import argparse
+import io
+import itertools
+import json
+import logging
+import math
+import random
+import struct
+import sys
+import time
+import wave
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .encoder import build_frames, frames_symbols, stream_wav
+from .decoder import decode_wav, detect_symbols, read_wav
+from .frontend import biquad, rbj
+from .profiles import FSK_ORDERS, carrier_freqs, fsk_order
+
+# ------------------------
+# Impairments
+# ------------------------
+def apply_gain(samples: List[float], gain_db: float) -> List[float]:
+    g = 10.0 ** (gain_db / 20.0)
+    return [x * g for x in samples]
+
+def lowpass(samples: List[float], sr: int, cutoff_hz: float, stages: int = 2) -> List[float]:
+    """Cascade of ``stages`` 12 dB/octave low-pass sections."""
+    coeffs = rbj("low", sr, cutoff_hz)
+    for _ in range(stages):
+        samples = biquad(samples, *coeffs)
+    return samples
+
+def highpass(samples: List[float], sr: int, cutoff_hz: float, stages: int = 2) -> List[float]:
+    """Cascade of ``stages`` 12 dB/octave high-pass sections."""
+    coeffs = rbj("high", sr, cutoff_hz)
+    for _ in range(stages):
+        samples = biquad(samples, *coeffs)
+    return samples
+
+def resample(samples: List[float], sr_in: int, sr_out: int) -> List[float]:
+    """Linear-interpolation resampler; low-passes first when downsampling."""
+    if sr_in == sr_out or not samples:
+        return list(samples)
+    if sr_out < sr_in:
+        samples = lowpass(samples, sr_in, 0.45 * sr_out)
+    n_out = int(len(samples) * sr_out / sr_in)
+    step = sr_in / sr_out
+    last = len(samples) - 1
+    out = []
+    for i in range(n_out):
+        pos = i * step
+        j = int(pos)
+        frac = pos - j
+        nxt = samples[j + 1] if j < last else samples[last]
+        out.append(samples[j] + (nxt - samples[j]) * frac)
+    return out
+
+def add_noise(samples: List[float], snr_db: float, seed: int = 0) -> List[float]:
+    """Add white Gaussian noise at ``snr_db`` relative to the signal's mean power."""
+    if not samples:
+        return []
+    power = sum(x * x for x in samples) / len(samples)
+    sigma = math.sqrt(power / (10.0 ** (snr_db / 10.0)))
+    rng = random.Random(seed)
+    return [x + rng.gauss(0.0, sigma) for x in samples]
+
+def clip(samples: List[float], level: float) -> List[float]:
+    """Hard-clip at +/-``level`` (linear, 1.0 = full scale)."""
+    return [level if x > level else -level if x < -level else x for x in samples]
+
+def time_offset(samples: List[float], sr: int, seconds: float) -> List[float]:
+    """Delay by ``seconds`` (leading silence) or, if negative, cut the start."""
+    n = int(round(abs(seconds) * sr))
+    if seconds >= 0:
+        return [0.0] * n + list(samples)
+    return list(samples[n:])
+
+@dataclass
+class ChannelConfig:
+    """One set of impairments. ``None`` leaves that impairment off."""
+
+    snr_db: Optional[float] = None
+    lowpass_hz: Optional[float] = None
+    highpass_hz: Optional[float] = None
+    gain_db: float = 0.0
+    resample_to: Optional[int] = None
+    clip_level: Optional[float] = None
+    offset_s: float = 0.0
+    seed: int = 0
+
+    def apply(self, samples: List[float], sr: int) -> Tuple[List[float], int]:
+        if self.offset_s:
+            samples = time_offset(samples, sr, self.offset_s)
+        if self.gain_db:
+            samples = apply_gain(samples, self.gain_db)
+        if self.lowpass_hz:
+            samples = lowpass(samples, sr, self.lowpass_hz)
+        if self.highpass_hz:
+            samples = highpass(samples, sr, self.highpass_hz)
+        if self.resample_to and self.resample_to != sr:
+            samples = resample(samples, sr, self.resample_to)
+            sr = self.resample_to
+        if self.snr_db is not None:
+            samples = add_noise(samples, self.snr_db, self.seed)
+        if self.clip_level is not None:
+            samples = clip(samples, self.clip_level)
+        return samples, sr
+
+def to_wav_bytes(samples: List[float], sr: int) -> bytes:
+    """16-bit mono WAV of ``samples`` (clamped to full scale)."""
+    pcm = struct.pack("<" + "h" * len(samples),
+                      *(max(-32768, min(32767, int(round(x * 32767.0)))) for x in samples))
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(sr)
+        wf.writeframes(pcm)
+    return buf.getvalue()
+
+# ------------------------
+# Trials
+# ------------------------
+@dataclass
+class TrialResult:
+    """Outcome of decoding one impaired transmission."""
+
+    params: Dict[str, Any]
+    channel: Dict[str, Any]
+    crc_ok: bool
+    symbol_errors: int
+    symbols_sent: int
+    decode_s: float
+    audio_s: float
+    error: Optional[str] = None
+
+    @property
+    def ser(self) -> float:
+        return self.symbol_errors / self.symbols_sent if self.symbols_sent else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(asdict(self), ser=self.ser)
+
+def symbol_errors(sent: List[int], received: List[int]) -> int:
+    """Mismatched positions, counting missing or extra symbols as errors."""
+    errors = sum(1 for a, b in zip(sent, received) if a != b)
+    return errors + abs(len(sent) - len(received))
+
+def run_trial(message: bytes, channel: ChannelConfig, samplerate: int = 48000, baud: float = 90.0,
+              dense: bool = True, mix_profile: str = "streaming", preamble_s: float = 0.8,
+              interleave_depth: int = 4, repeats: int = 2, amp: float = 0.06,
+              ramp_ms: float = 5.0, fec: str = "hamming74", order: Optional[int] = None) -> TrialResult:
+    """Encode ``message`` in memory, pass it through ``channel`` and decode it."""
+    _, chunks = stream_wav(message, samplerate, baud, amp, dense, mix_profile, 0.0, preamble_s,
+                           interleave_depth, repeats, ramp_ms, fec=fec, order=order)
+    samples, sr = read_wav(io.BytesIO(b"".join(chunks)))
+    samples, sr = channel.apply(samples, sr)
+    impaired = to_wav_bytes(samples, sr)
+
+    order = fsk_order(dense, order)
+    freqs = carrier_freqs(order, mix_profile, baud)
+    sent = frames_symbols(build_frames(message, fec=fec), order, interleave_depth) * max(1, repeats)
+    received = detect_symbols(samples, sr, baud, preamble_s, freqs)
+
+    error = None
+    t0 = time.perf_counter()
+    try:
+        crc_ok = decode_wav(io.BytesIO(impaired), baud, dense, mix_profile, preamble_s,
+                            interleave_depth, repeats, order=order) == message
+    except Exception as e:
+        crc_ok = False
+        error = str(e)
+    decode_s = time.perf_counter() - t0
+
+    params = {"samplerate": samplerate, "baud": baud, "order": order, "mix_profile": mix_profile,
+              "preamble_s": preamble_s, "interleave_depth": interleave_depth, "repeats": repeats,
+              "amp": amp, "fec": fec, "bytes": len(message)}
+    return TrialResult(params=params, channel=asdict(channel), crc_ok=crc_ok,
+                       symbol_errors=symbol_errors(sent, received), symbols_sent=len(sent),
+                       decode_s=decode_s, audio_s=len(samples) / sr, error=error)
+
+# ------------------------
+# CLI
+# ------------------------
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Sweep GhostLink settings through a simulated channel and report SER / CRC success.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    p.add_argument("--message", default="The quick brown fox jumps over the lazy dog",
+                   help="Text to send in every trial.")
+    p.add_argument("--samplerate", type=int, default=48000, help="Encoder sample rate (Hz).")
+    p.add_argument("--baud", default="90", help="Comma-separated symbol rates to sweep.")
+    p.add_argument("--repeats", default="2", help="Comma-separated repeat counts to sweep.")
+    p.add_argument("--snr", default="", help="Comma-separated SNRs (dB) to sweep; empty = no noise.")
+    p.add_argument("--sparse", action="store_true", help="Use 4-FSK instead of 8-FSK.")
+    p.add_argument("--carriers", type=int, choices=FSK_ORDERS, help="Carrier count; overrides --sparse.")
+    p.add_argument("--mix-profile", choices=["streaming", "studio"], default="streaming")
+    p.add_argument("--interleave", type=int, default=4, help="Interleave depth.")
+    p.add_argument("--fec", default="hamming74", help="Comma-separated FEC schemes to sweep.")
+    p.add_argument("--preamble", type=float, default=0.8, help="Preamble seconds.")
+    p.add_argument("--amp", type=float, default=0.06, help="Encoder amplitude.")
+    p.add_argument("--lowpass", type=float, help="Low-pass cutoff (Hz).")
+    p.add_argument("--highpass", type=float, help="High-pass cutoff (Hz).")
+    p.add_argument("--gain", type=float, default=0.0, help="Gain change (dB).")
+    p.add_argument("--resample", type=int, help="Resample to this rate (Hz), e.g. 44100.")
+    p.add_argument("--clip", type=float, help="Hard-clip level (linear, 1.0 = full scale).")
+    p.add_argument("--offset", type=float, default=0.0, help="Time offset (s); negative cuts the start.")
+    p.add_argument("--seed", type=int, default=0, help="Noise seed.")
+    return p.parse_args(argv)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.ERROR, format="%(message)s")
+    message = args.message.encode("utf-8")
+    snrs: List[Optional[float]] = list(_floats(args.snr)) or [None]
+    passed = total = 0
+    fecs = [f.strip() for f in args.fec.split(",") if f.strip()]
+    for fec, baud, repeats, snr in itertools.product(fecs, _floats(args.baud), _floats(args.repeats), snrs):
+        channel = ChannelConfig(snr_db=snr, lowpass_hz=args.lowpass, highpass_hz=args.highpass,
+                                gain_db=args.gain, resample_to=args.resample, clip_level=args.clip,
+                                offset_s=args.offset, seed=args.seed)
+        result = run_trial(message, channel, samplerate=args.samplerate, baud=baud,
+                           dense=not args.sparse, mix_profile=args.mix_profile,
+                           preamble_s=args.preamble, interleave_depth=args.interleave,
+                           repeats=int(repeats), amp=args.amp, fec=fec, order=args.carriers)
+        print(json.dumps(result.to_dict()))
+        total += 1
+        passed += result.crc_ok
+    print(f"[i] {passed}/{total} trials decoded with a valid CRC", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
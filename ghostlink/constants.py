@@ -2,5 +2,11 @@
 
 GIB_MAGIC = b"GIB"
 
+# Versioned frame (codec + FEC fields); see ghostlink.frame
+GIV_MAGIC = b"GIV"
+FRAME_VERSION = 2
+# Same header, body prefixed with message id / sequence / total
+SEGMENT_VERSION = 3
+
 # SQLite database file storing encode history
 HISTORY_DB = "ghostlink_history.db"
@@ -7,17 +7,32 @@ Examples:
   python -m ghostlink.decoder ./message.wav
 """
 
-import argparse
-import binascii
+import functools
 import logging
 import math
+import io
 import struct
+import time
 import wave
 import sys
 import os
-from typing import List
-from .profiles import freq_profile
-from .constants import GIB_MAGIC
+from typing import TYPE_CHECKING, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from .constants import SEGMENT_VERSION
+from .profiles import FSK_ORDERS, carrier_freqs, freq_profile, fsk_order, preamble_samples
+from .fec import FEC_NAMES, FEC_SCHEMES, fec_decode
+from .frame import V2_HEADER_LEN, V2_OVERHEAD, parse_frame, parse_segment, v2_header
+from .segments import (DEFAULT_FRAME_SIZE, FrameAssembler, bits_per_symbol, frame_bit_count, frame_symbol_count,
+                       segment_frame_len)
+from .metrics import METRICS, record_timings, timed
+from .results import DecodeResult
+from .frontend import FrontEnd, front_end
+
+if TYPE_CHECKING:
+    import argparse
+    from concurrent.futures import Executor
+
+# Anything Decoder.decode accepts: path, WAV bytes, file-like or samples
+DecodeSource = Union[str, "os.PathLike[str]", bytes, bytearray, memoryview, BinaryIO, Sequence[float]]
 
 # ------------------------
 # Logging
@@ -33,8 +48,15 @@ def setup_logging(verbose: bool) -> None:
 # ------------------------
 # Goertzel detector
 # ------------------------
+@functools.lru_cache(maxsize=64)
+def goertzel_coeffs(freqs: Tuple[float, ...], sr: int) -> Tuple[float, ...]:
+    """Goertzel recurrence coefficients for ``freqs`` at ``sr``."""
+    return tuple(2.0 * math.cos(2.0 * math.pi * f / sr) for f in freqs)
+
 def goertzel(samples: List[float], freq: float, sr: int) -> float:
-    coeff = 2.0 * math.cos(2.0 * math.pi * freq / sr)
+    return goertzel_power(samples, 2.0 * math.cos(2.0 * math.pi * freq / sr))
+
+def goertzel_power(samples: List[float], coeff: float) -> float:
     s_prev = 0.0
     s_prev2 = 0.0
     for x in samples:
@@ -44,11 +66,18 @@ def goertzel(samples: List[float], freq: float, sr: int) -> float:
     power = s_prev2 * s_prev2 + s_prev * s_prev - coeff * s_prev * s_prev2
     return power
 
+def warm_caches(samplerates: Iterable[int] = (44100, 48000)) -> None:
+    """Precompute detector coefficients for every built-in profile."""
+    for sr in samplerates:
+        for dense in (True, False):
+            for profile in ("streaming", "studio"):
+                goertzel_coeffs(tuple(freq_profile(dense, profile)), sr)
+
 # ------------------------
 # Symbol and bit helpers
 # ------------------------
 def symbols_to_bits(symbols: List[int], order: int) -> List[int]:
-    k = 2 if order == 4 else 3
+    k = bits_per_symbol(order)
     out = []
     for s in symbols:
         for j in reversed(range(k)):
@@ -88,6 +117,27 @@ def hamming74_decode_bits(bits: List[int]) -> List[int]:
         out.extend([block[2], block[4], block[5], block[6]])
     return out
 
+def fec_decode_bits(bits: List[int]) -> bytes:
+    """Inverse of the encoder's ``fec_encode_bytes`` on deinterleaved bits.
+
+    The first Hamming-coded 14 bytes are read as a v2 header; if it names
+    another FEC scheme the rest is decoded with it, otherwise the whole
+    stream is Hamming(7,4) (v1 frames and v2 + hamming74).
+    """
+    head_bits = V2_HEADER_LEN * 14
+    if len(bits) >= head_bits:
+        head = bits_to_bytes(hamming74_decode_bits(bits[:head_bits]))
+        header = v2_header(head)
+        if header is not None and header.fec != FEC_SCHEMES["hamming74"]:
+            scheme = FEC_NAMES.get(header.fec)
+            if scheme is None:
+                raise ValueError(f"unknown FEC id {header.fec}")
+            return head + fec_decode(scheme, bits[head_bits:], header.body_len + 4)
+    rem = len(bits) % 7
+    if rem:
+        bits = bits[:-rem]
+    return bits_to_bytes(hamming74_decode_bits(bits))
+
 def bits_to_bytes(bits: List[int]) -> bytes:
     out = []
     for i in range(0, len(bits), 8):
@@ -103,8 +153,13 @@ def bits_to_bytes(bits: List[int]) -> bytes:
 # ------------------------
 # WAV reader and symbol extraction
 # ------------------------
-def read_wav(path: str) -> tuple[List[float], int]:
-    with wave.open(path, "rb") as wf:
+def read_wav(source: Union[str, BinaryIO]) -> Tuple[List[float], int]:
+    """Read mono samples from a WAV path or a binary file-like object.
+
+    File-like sources (e.g. an upload stream or ``io.BytesIO``) are read in
+    place and are not closed.
+    """
+    with wave.open(source, "rb") as wf:
         channels = wf.getnchannels()
         sampwidth = wf.getsampwidth()
         sr = wf.getframerate()
@@ -150,74 +205,478 @@ def read_wav(path: str) -> tuple[List[float], int]:
         
         return samples, sr
 
-def detect_symbols(samples: List[float], sr: int, baud: float, preamble_s: float, freqs: List[float]) -> List[int]:
-    start = int(round(preamble_s * sr))
+def detect_symbols(samples: Sequence[float], sr: int, baud: float, preamble_s: float, freqs: List[float],
+                   workers: int = 1, band_limit: bool = False) -> List[int]:
+    start = preamble_samples(len(freqs), preamble_s, sr)
     sym_len = int(round(sr / baud))
+    fe = front_end(tuple(freqs), sr, sym_len) if band_limit else None
+    if fe is None:
+        return detect_windows(samples, start, sym_len, goertzel_coeffs(tuple(freqs), sr), workers)
+    return _detect_decimated(samples, fe, start, sym_len, workers)
+
+def _detect_decimated(samples: Sequence[float], fe: FrontEnd, start: int, sym_len: int,
+                      workers: int) -> List[int]:
+    """Detect on the band-limited, decimated signal; windows keep their original-rate count."""
+    count = max(0, (len(samples) - start) // sym_len) if sym_len > 0 else 0
+    return detect_windows(fe.apply(samples), start / fe.factor, sym_len / fe.factor, fe.coeffs, workers,
+                          count=count, gains=fe.gains)
+
+# Below this many symbol windows a process pool costs more than it saves
+PARALLEL_DETECT_MIN_WINDOWS = 2048
+
+def _window_bounds(start: float, sym_len: float, first: int, count: int) -> Sequence[int]:
+    """``count + 1`` sample offsets delimiting symbol windows ``first`` onwards."""
+    if isinstance(start, int) and isinstance(sym_len, int):
+        return range(start + first * sym_len, start + (first + count + 1) * sym_len, sym_len)
+    return [int(round(start + k * sym_len)) for k in range(first, first + count + 1)]
+
+def _detect_range(samples: Sequence[float], bounds: Sequence[int], coeffs: Sequence[float],
+                  gains: Optional[Sequence[float]] = None) -> List[int]:
+    """Strongest carrier in each window between consecutive ``bounds``.
+
+    ``gains`` scales each carrier's power, e.g. to undo filter droop.
+    """
+    indices = range(len(coeffs))
     symbols = []
-    i = start
-    while i + sym_len <= len(samples):
-        chunk = samples[i:i+sym_len]
-        mags = [goertzel(chunk, f, sr) for f in freqs]
-        symbols.append(int(max(range(len(mags)), key=lambda j: mags[j])))
-        i += sym_len
+    for lo, hi in zip(bounds, bounds[1:]):
+        chunk = samples[lo:hi]
+        if gains:
+            mags = [goertzel_power(chunk, c) * g for c, g in zip(coeffs, gains)]
+        else:
+            mags = [goertzel_power(chunk, c) for c in coeffs]
+        symbols.append(max(indices, key=mags.__getitem__))
     return symbols
 
+def _detect_shard(job: Tuple[str, Sequence[int], Tuple[float, ...], Optional[Tuple[float, ...]]]) -> List[int]:
+    # Module level so a process pool can pickle it; samples come from shared memory
+    from multiprocessing import shared_memory
+    name, bounds, coeffs, gains = job
+    shm = shared_memory.SharedMemory(name=name)
+    view = shm.buf.cast("d")
+    try:
+        # Goertzel loops run faster over a list than over the memoryview
+        samples = view[bounds[0]:bounds[-1]].tolist()
+    finally:
+        view.release()
+        shm.close()
+    base = bounds[0]
+    return _detect_range(samples, [b - base for b in bounds], coeffs, gains)
+
+def detect_windows(samples: Sequence[float], start: float, sym_len: float, coeffs: Sequence[float],
+                   workers: int = 1, count: Optional[int] = None,
+                   gains: Optional[Sequence[float]] = None, first: int = 0,
+                   pool: Optional["Executor"] = None) -> List[int]:
+    """Symbols for every whole ``sym_len`` window from ``start``.
+
+    ``start`` and ``sym_len`` may be fractional (after decimation); each
+    window edge is then rounded to the nearest sample. ``first`` and
+    ``count`` select a run of windows (by default all whole windows), with
+    the same edges as a single call over every window would use.
+
+    With ``workers`` above 1 and a long enough input, the samples are
+    copied once into shared memory as doubles and window-aligned shards
+    are detected on a process pool (``pool`` when given, else a new one),
+    then stitched back in order. The result is the same as the serial loop.
+    """
+    if count is None:
+        count = max(0, int((len(samples) - start) // sym_len) - first) if sym_len > 0 else 0
+    bounds = _window_bounds(start, sym_len, first, count)
+    if workers <= 1 or count < PARALLEL_DETECT_MIN_WINDOWS:
+        return _detect_range(samples, bounds, coeffs, gains)
+    import array
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import shared_memory
+    base = bounds[0]
+    data = array.array("d", samples[base:bounds[-1]])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(data) * data.itemsize))
+    try:
+        shm.buf[:len(data) * data.itemsize] = data.tobytes()
+        del data
+        # A few shards per worker evens out uneven scheduling
+        per = -(-count // (workers * 4))
+        gains = tuple(gains) if gains else None
+        jobs = [(shm.name, [b - base for b in bounds[i:i + per + 1]], tuple(coeffs), gains)
+                for i in range(0, count, per)]
+        symbols: List[int] = []
+        if pool is not None:
+            for shard in pool.map(_detect_shard, jobs):
+                symbols.extend(shard)
+            return symbols
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as own:
+            for shard in own.map(_detect_shard, jobs):
+                symbols.extend(shard)
+        return symbols
+    finally:
+        shm.close()
+        shm.unlink()
+
 # ------------------------
 # Payload extraction
 # ------------------------
 def decode_symbols(symbols: List[int], order: int, interleave_depth: int) -> bytes:
-    bits = symbols_to_bits(symbols, order)
+    return next(decode_symbol_candidates(symbols, order, interleave_depth))
+
+def _fec_decode(bits: List[int], interleave_depth: int) -> bytes:
     if interleave_depth > 1:
-        extra = len(bits) % interleave_depth
-        if extra:
-            bits = bits[:-extra]
         bits = deinterleave(bits, interleave_depth)
-    rem = len(bits) % 7
-    if rem:
-        bits = bits[:-rem]
-    decoded = hamming74_decode_bits(bits)
-    return bits_to_bytes(decoded)
+    return fec_decode_bits(bits)
+
+def decode_symbol_candidates(symbols: List[int], order: int, interleave_depth: int,
+                             timings: Optional[Dict[str, float]] = None) -> Iterator[bytes]:
+    """Yield the decoded payload for each plausible interleaved bit length.
+
+    The encoder pads the interleaved bits to a whole symbol, i.e. by fewer
+    than ``k`` bits (k = bits per symbol). Every trim below ``k`` that
+    leaves a multiple of the depth is a candidate, shortest trim first.
+    Candidates the FEC layer rejects are skipped; if all are rejected the
+    last error is raised.
+    """
+    timings = {} if timings is None else timings
+    with timed(timings, "fec"):
+        bits = symbols_to_bits(symbols, order)
+    if interleave_depth <= 1:
+        trims = range(1)
+    else:
+        k = bits_per_symbol(order)
+        extra = len(bits) % interleave_depth
+        trims = range(extra, max(k, extra + 1), interleave_depth)
+    error: Optional[ValueError] = None
+    yielded = False
+    for trim in trims:
+        try:
+            with timed(timings, "fec"):
+                payload = _fec_decode(bits[:len(bits) - trim], interleave_depth)
+        except ValueError as e:
+            error = e
+            continue
+        yielded = True
+        yield payload
+    if not yielded and error is not None:
+        raise error
 
 def parse_payload(data: bytes) -> bytes:
-    if len(data) < 3 + 4 + 4:
-        raise ValueError("payload too short")
-    if data[:3] != GIB_MAGIC:
-        raise ValueError("bad magic")
-    length = struct.unpack(">I", data[3:7])[0]
-    need = 3 + 4 + length + 4
-    if len(data) < need:
-        raise ValueError("truncated payload")
-    msg = data[7:7+length]
-    crc_recv = struct.unpack(">I", data[7+length:7+length+4])[0]
-    crc_calc = binascii.crc32(msg) & 0xFFFFFFFF
-    if crc_calc != crc_recv:
-        raise ValueError("CRC mismatch")
-    return msg
-
-def decode_wav(path: str, baud: float, dense: bool, mix_profile: str,
-               preamble_s: float, interleave_depth: int, repeats: int) -> bytes:
-    samples, sr = read_wav(path)
-    freqs = freq_profile(dense, mix_profile)
-    symbols = detect_symbols(samples, sr, baud, preamble_s, freqs)
-    order = 8 if dense else 4
-    if repeats > 1 and len(symbols) >= repeats:
-        per = len(symbols) // repeats
-        for i in range(repeats):
-            seg = symbols[i*per:(i+1)*per]
+    """Message bytes from a deinterleaved, FEC-decoded frame (v1 or v2)."""
+    return parse_frame(data)
+
+def decode_segment_frame(symbols: List[int], order: int, interleave_depth: int, frame_len: int) -> bytes:
+    """The CRC-valid v3 frame carried by one frame's worth of ``symbols``."""
+    error: Optional[ValueError] = None
+    for payload in decode_symbol_candidates(symbols, order, interleave_depth):
+        frame = payload[:frame_len]
+        try:
+            parse_segment(frame)
+            return frame
+        except ValueError as e:
+            error = error or e
+    raise error or ValueError("payload too short")
+
+def _decode_frame_job(job: Tuple[List[int], int, int, int]) -> Optional[bytes]:
+    # Module level so a process pool can pickle it
+    try:
+        return decode_segment_frame(*job)
+    except ValueError:
+        return None
+
+class SymbolStream:
+    """Symbols of one input, detected as they are asked for.
+
+    ``count`` is the number of whole symbol windows in the input; windows
+    are detected in order, on demand, and kept in :attr:`detected`, so a
+    decode that stops early never runs the detector over the rest.
+    """
+
+    def __init__(self, samples: Sequence[float], start: float, sym_len: float, coeffs: Sequence[float],
+                 count: int, workers: int = 1, gains: Optional[Sequence[float]] = None,
+                 pool: Optional["Executor"] = None) -> None:
+        self.samples = samples
+        self.start = start
+        self.sym_len = sym_len
+        self.coeffs = coeffs
+        self.count = count
+        self.workers = workers
+        self.gains = gains
+        self.pool = pool
+        self.detected: List[int] = []
+
+    def window(self, a: int, b: int) -> List[int]:
+        """Symbols ``a`` to ``b`` (clipped to :attr:`count`), detecting any not yet seen."""
+        b = min(b, self.count)
+        first = len(self.detected)
+        if b > first:
+            self.detected.extend(detect_windows(self.samples, self.start, self.sym_len, self.coeffs,
+                                                self.workers, count=b - first, gains=self.gains,
+                                                first=first, pool=self.pool))
+        return self.detected[a:b]
+
+class Decoder:
+    """Decoder for one parameter set, reusable across many inputs.
+
+    The carrier frequencies are resolved once, and the Goertzel
+    coefficients and symbol windows once per sample rate, so a service can
+    decode many files without repeating setup. :meth:`decode` accepts a
+    path, WAV bytes, a binary file-like object or a buffer of float
+    samples (with ``samplerate``).
+
+    With ``band_limit``, inputs are band-pass filtered to the carriers
+    before detection, which keeps host-track low end out at some extra
+    cost (see :mod:`ghostlink.frontend`). With ``workers`` above 1, symbol
+    detection of long inputs is sharded over that many processes.
+
+    Decoding is incremental once the samples are read: symbols are
+    detected only as far as the decode needs them. Multi-frame messages
+    (see :mod:`ghostlink.segments`) are recognised from the header of
+    their first frame; frames are then detected and validated in order
+    (in batches over ``workers`` processes) and decoding stops as soon as
+    every frame has been seen. Single-frame messages are detected repeat
+    by repeat, stopping at the first that passes its CRC. Pass the same
+    :class:`FrameAssembler` to several :meth:`decode` calls to combine a
+    transmission with resends of its missing frames.
+    """
+
+    def __init__(self, baud: float = 90.0, dense: bool = True, mix_profile: str = "streaming",
+                 preamble_s: float = 0.8, interleave_depth: int = 4, repeats: int = 2,
+                 frame_size: int = DEFAULT_FRAME_SIZE, workers: int = 1,
+                 order: Optional[int] = None, band_limit: bool = False) -> None:
+        if not 1 <= interleave_depth <= 64:
+            raise ValueError("interleave depth must be 1..64")
+        if not 1 <= repeats <= 16:
+            raise ValueError("repeats must be 1..16")
+        if frame_size < 0 or workers < 1:
+            raise ValueError("frame size must be >= 0 and workers >= 1")
+        self.baud = float(baud)
+        self.dense = dense
+        self.mix_profile = mix_profile
+        self.preamble_s = preamble_s
+        self.interleave_depth = interleave_depth
+        self.repeats = repeats
+        self.frame_size = frame_size
+        self.workers = workers
+        self.band_limit = band_limit
+        self.order = fsk_order(dense, order)
+        self.freqs = carrier_freqs(self.order, mix_profile, self.baud)
+        self._plans: Dict[int, Tuple[Tuple[float, ...], int, int]] = {}
+
+    def plan(self, sr: int) -> Tuple[Tuple[float, ...], int, int]:
+        """``(goertzel coefficients, symbol length, first symbol offset)`` at ``sr``."""
+        plan = self._plans.get(sr)
+        if plan is None:
+            plan = self._plans[sr] = (goertzel_coeffs(tuple(self.freqs), sr),
+                                      int(round(sr / self.baud)),
+                                      preamble_samples(len(self.freqs), self.preamble_s, sr))
+        return plan
+
+    def front_end(self, sr: int) -> Optional[FrontEnd]:
+        """Decimating front end used at ``sr``; ``None`` when detecting at the native rate."""
+        if not self.band_limit:
+            return None
+        return front_end(tuple(self.freqs), sr, self.plan(sr)[1])
+
+    def stream(self, samples: Sequence[float], sr: int, pool: Optional["Executor"] = None) -> SymbolStream:
+        """Lazy symbol source over ``samples``; the front end, if any, is applied here."""
+        coeffs, sym_len, start = self.plan(sr)
+        count = max(0, (len(samples) - start) // sym_len) if sym_len > 0 else 0
+        fe = self.front_end(sr)
+        if fe is None:
+            return SymbolStream(samples, start, sym_len, coeffs, count, self.workers, pool=pool)
+        return SymbolStream(fe.apply(samples), start / fe.factor, sym_len / fe.factor, fe.coeffs, count,
+                            self.workers, gains=fe.gains, pool=pool)
+
+    def detect(self, samples: Sequence[float], sr: int) -> List[int]:
+        stream = self.stream(samples, sr)
+        return stream.window(0, stream.count)
+
+    def decode(self, source: DecodeSource, samplerate: Optional[int] = None,
+               assembler: Optional[FrameAssembler] = None) -> DecodeResult:
+        """Decode ``source``; failures are reported in the result, not raised."""
+        result = DecodeResult()
+        timings = result.timings
+        t_start = time.perf_counter()
+        pool = None
+        try:
+            with timed(timings, "read"):
+                samples, sr = self._samples(source, samplerate)
+            if self.workers > 1:
+                from concurrent.futures import ProcessPoolExecutor
+                pool = ProcessPoolExecutor(max_workers=self.workers)
+            with timed(timings, "detect"):
+                stream = self.stream(samples, sr, pool)
+                per_frame = self.frame_symbols(stream)
             try:
-                payload = decode_symbols(seg, order, interleave_depth)
-                return parse_payload(payload)
-            except Exception as e:
-                logging.warning(f"[!] Repeat {i+1} failed: {e}")
-        raise ValueError("all repeats failed")
-    else:
-        payload = decode_symbols(symbols, order, interleave_depth)
-        return parse_payload(payload)
+                if per_frame is None:
+                    self._decode_repeats(stream, result)
+                    if not result.crc_ok:
+                        # The first frame's header may be the damaged part
+                        with timed(timings, "detect"):
+                            per_frame = self.frame_symbols(stream, slots=(1, 2))
+                if per_frame:
+                    result.error = None
+                    self._decode_frames(stream, per_frame, assembler or FrameAssembler(), result)
+            finally:
+                result.symbols = len(stream.detected)
+        except Exception as e:
+            result.error = str(e) or type(e).__name__
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        timings["total"] = time.perf_counter() - t_start
+        record_timings("decode", timings)
+        METRICS.inc("ghostlink_decodes_total", {"result": "ok" if result.crc_ok else "failed"})
+        return result
+
+    def _decode_repeats(self, stream: SymbolStream, result: DecodeResult) -> None:
+        """Single-frame message: detect and try each repeat until one passes its CRC."""
+        if self.repeats > 1 and stream.count >= self.repeats:
+            per = stream.count // self.repeats
+            spans = [(i * per, (i + 1) * per) for i in range(self.repeats)]
+        else:
+            spans = [(0, stream.count)]
+        for i, (a, b) in enumerate(spans, start=1):
+            with timed(result.timings, "detect"):
+                seg = stream.window(a, b)
+            try:
+                result.payload = self._decode_segment(seg, result.timings)
+                result.crc_ok = True
+                result.repeat = i
+                return
+            except ValueError as e:
+                if len(spans) > 1:
+                    logging.warning(f"[!] Repeat {i} failed: {e}")
+                result.error = str(e)
+        if len(spans) > 1:
+            result.error = "all repeats failed"
+
+    def frame_symbols(self, stream: SymbolStream, slots: Iterable[int] = (0,)) -> Optional[int]:
+        """Symbols per frame if ``stream`` carries a multi-frame message.
+
+        Every FEC scheme gives a different frame length. For each, only
+        the Hamming-coded v2 header at the start of the frame in each of
+        ``slots`` is decoded: a segment header naming that scheme and the
+        body length of a ``frame_size`` frame decides. Nothing is CRC
+        checked here, so a single-frame message costs one header decode
+        per scheme.
+        """
+        if self.frame_size <= 0:
+            return None
+        frame_len = segment_frame_len(self.frame_size)
+        sizes = {frame_symbol_count(frame_len, fec, self.order, self.interleave_depth): fec
+                 for fec in FEC_SCHEMES}
+        head_bits = V2_HEADER_LEN * 14
+        for j in slots:
+            for n in sorted(sizes):
+                symbols = stream.window(j * n, (j + 1) * n)
+                if len(symbols) < n:
+                    continue
+                fec = sizes[n]
+                bits = symbols_to_bits(symbols, self.order)[:frame_bit_count(frame_len, fec, self.interleave_depth)]
+                bits = deinterleave(bits, self.interleave_depth)
+                header = v2_header(bits_to_bytes(hamming74_decode_bits(bits[:head_bits])))
+                if (header is not None and header.version == SEGMENT_VERSION
+                        and FEC_NAMES.get(header.fec) == fec and header.body_len == frame_len - V2_OVERHEAD):
+                    return n
+        return None
+
+    def iter_frames(self, stream: SymbolStream, per_frame: int,
+                    timings: Optional[Dict[str, float]] = None) -> Iterator[Tuple[int, Optional[bytes]]]:
+        """``(index, frame or None)`` for each ``per_frame``-symbol slot, in order.
+
+        Frames are detected and validated as they are consumed: one at a
+        time, or with a pool in batches big enough to keep every worker
+        busy, so stopping the iteration stops the detector too.
+        """
+        timings = {} if timings is None else timings
+        frame_len = segment_frame_len(self.frame_size)
+        slots = stream.count // per_frame
+        batch = 1
+        if stream.pool is not None:
+            batch = max(self.workers, -(-PARALLEL_DETECT_MIN_WINDOWS // per_frame))
+        for first in range(0, slots, batch):
+            last = min(slots, first + batch)
+            with timed(timings, "detect"):
+                symbols = stream.window(first * per_frame, last * per_frame)
+            jobs = [(symbols[i:i + per_frame], self.order, self.interleave_depth, frame_len)
+                    for i in range(0, len(symbols), per_frame)]
+            with timed(timings, "fec"):
+                if stream.pool is None or len(jobs) <= 1:
+                    frames = [_decode_frame_job(job) for job in jobs]
+                else:
+                    frames = list(stream.pool.map(_decode_frame_job, jobs))
+            yield from enumerate(frames, start=first)
+
+    def _decode_frames(self, stream: SymbolStream, per_frame: int, assembler: FrameAssembler,
+                       result: DecodeResult) -> None:
+        for index, frame in self.iter_frames(stream, per_frame, result.timings):
+            if frame is None:
+                logging.warning(f"[!] Frame slot {index} failed its CRC")
+                continue
+            try:
+                assembler.add(frame)
+            except ValueError as e:
+                logging.warning(f"[!] Frame slot {index} skipped: {e}")
+                continue
+            if assembler.complete:
+                break
+        result.frames = assembler.total
+        result.missing = assembler.missing()
+        if assembler.complete:
+            result.payload = assembler.message()
+            result.crc_ok = True
+        else:
+            result.error = f"missing frames: {','.join(map(str, result.missing))}"
+
+    def _samples(self, source: DecodeSource, samplerate: Optional[int]) -> Tuple[Sequence[float], int]:
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return read_wav(io.BytesIO(source))
+        if isinstance(source, (str, os.PathLike)):
+            return read_wav(os.fspath(source))
+        if hasattr(source, "read"):
+            return read_wav(source)
+        if samplerate is None:
+            raise ValueError("samplerate is required when decoding a sample buffer")
+        return source, samplerate
+
+    def _decode_segment(self, symbols: List[int], timings: Dict[str, float]) -> bytes:
+        """Payload of one repeat, trying every bit length the padding allows.
+
+        Symbol padding can add up to ``k - 1`` bits after the interleaved
+        block, which is ambiguous when that is not less than the depth;
+        the candidate whose CRC checks out wins.
+        """
+        error: Optional[ValueError] = None
+        for payload in decode_symbol_candidates(symbols, self.order, self.interleave_depth, timings):
+            try:
+                with timed(timings, "crc"):
+                    return parse_payload(payload)
+            except ValueError as e:
+                error = error or e
+        raise error or ValueError("payload too short")
+
+def decode_wav(path: Union[str, BinaryIO], baud: float, dense: bool, mix_profile: str,
+               preamble_s: float, interleave_depth: int, repeats: int,
+               timings: Optional[Dict[str, float]] = None,
+               frame_size: int = DEFAULT_FRAME_SIZE, workers: int = 1,
+               order: Optional[int] = None, band_limit: bool = False) -> bytes:
+    """Decode a WAV given as a path or binary file-like object.
+
+    Per-stage wall times (read, detect, fec, crc) are added to ``timings``
+    when given, and always recorded in :data:`ghostlink.metrics.METRICS`.
+    Raises ``ValueError`` when no repeat passes its CRC.
+    """
+    result = Decoder(baud, dense, mix_profile, preamble_s, interleave_depth, repeats,
+                     frame_size=frame_size, workers=workers, order=order,
+                     band_limit=band_limit).decode(path)
+    if timings is not None:
+        timings.update(result.timings)
+    if not result.crc_ok:
+        raise ValueError(result.error)
+    return result.payload
 
 # ------------------------
 # CLI
 # ------------------------
-def parse_args() -> argparse.Namespace:
+def parse_args() -> "argparse.Namespace":
+    # Imported here so library users of decode_wav do not load argparse or sqlite3
+    import argparse
+    from .presets import parse_with_preset
     p = argparse.ArgumentParser(
         description="Gibberlink decoder: recover text from FSK audio.",
         formatter_class=argparse.ArgumentDefaultsHelpFormatter,
@@ -229,18 +688,32 @@ def parse_args() -> argparse.Namespace:
     p.add_argument("--sparse", action="store_true", help="Expect sparse 4-FSK")
     p.add_argument("--mix-profile", choices=["streaming", "studio"], default="streaming",
                    help="Frequency profile")
+    p.add_argument("--carriers", type=int, choices=FSK_ORDERS,
+                   help="Carrier count the encoder used (default: 8 dense / 4 sparse)")
     p.add_argument("--interleave", type=int, default=4, help="Interleave depth")
     p.add_argument("--repeats", type=int, default=2, help="Payload repeats")
+    p.add_argument("--frame-size", type=int, default=DEFAULT_FRAME_SIZE,
+                   help="Frame size the encoder used for multi-frame messages (0=single frame only)")
+    p.add_argument("--workers", type=int, default=1, help="Processes used for symbol detection and frame validation")
+    p.add_argument("--band-limit", action="store_true",
+                   help="Band-pass and decimate to the carriers before detection (rejects host-track low end)")
+    p.add_argument("--merge", action="append", default=[], metavar="WAV",
+                   help="Further WAV (e.g. resent frames) to combine with the first; repeatable")
+    p.add_argument("--preset", metavar="NAME",
+                   help="Use settings saved by 'ghostlink tune --save NAME'; explicit options still win")
     p.add_argument("--verbose", "-v", action="store_true", help="Verbose logging")
-    return p.parse_args()
+    return parse_with_preset(p)
 
-def validate_args(args: argparse.Namespace) -> None:
+def validate_args(args: "argparse.Namespace") -> None:
     if not args.wav or not os.path.isfile(args.wav):
         raise FileNotFoundError(args.wav)
     if args.interleave < 1 or args.interleave > 64:
         raise ValueError("interleave depth must be 1..64")
     if args.repeats < 1 or args.repeats > 16:
         raise ValueError("repeats must be 1..16")
+    for extra in getattr(args, "merge", []):
+        if not os.path.isfile(extra):
+            raise FileNotFoundError(extra)
     if args.sparse and args.dense:
         raise ValueError("choose either --dense or --sparse")
     if not args.sparse:
@@ -297,20 +770,50 @@ def ascii_only(data: bytes) -> str:
 # ------------------------
 # Main
 # ------------------------
+def _decode_merged(paths: List[str], args: "argparse.Namespace", timings: Dict[str, float]) -> bytes:
+    """Pool the frames of several WAVs (a transmission and its resends)."""
+    decoder = Decoder(args.baud, args.dense and not args.sparse, args.mix_profile, args.preamble,
+                      args.interleave, args.repeats, frame_size=args.frame_size, workers=args.workers,
+                      order=getattr(args, "carriers", None),
+                      band_limit=getattr(args, "band_limit", False))
+    assembler = FrameAssembler()
+    result = DecodeResult()
+    for path in paths:
+        result = decoder.decode(path, assembler=assembler)
+        for stage, seconds in result.timings.items():
+            timings[stage] = timings.get(stage, 0.0) + seconds
+        if result.crc_ok:
+            return result.payload
+        logging.info(f"[i] {path}: {result.error}")
+    raise ValueError(result.error)
+
 def main_with_args(args) -> int:
     """Main function that accepts pre-parsed arguments (for API use)"""
     try:
         setup_logging(args.verbose)
         validate_args(args)
-        msg = decode_wav(
-            path=args.wav,
-            baud=args.baud,
-            dense=args.dense and not args.sparse,
-            mix_profile=args.mix_profile,
-            preamble_s=args.preamble,
-            interleave_depth=args.interleave,
-            repeats=args.repeats,
-        )
+        timings: Dict[str, float] = {}
+        try:
+            merge = getattr(args, "merge", [])
+            if merge:
+                msg = _decode_merged([args.wav] + merge, args, timings)
+            else:
+                msg = decode_wav(
+                    path=args.wav,
+                    baud=args.baud,
+                    dense=args.dense and not args.sparse,
+                    mix_profile=args.mix_profile,
+                    preamble_s=args.preamble,
+                    interleave_depth=args.interleave,
+                    repeats=args.repeats,
+                    timings=timings,
+                    frame_size=getattr(args, "frame_size", DEFAULT_FRAME_SIZE),
+                    workers=getattr(args, "workers", 1),
+                    order=getattr(args, "carriers", None),
+                    band_limit=getattr(args, "band_limit", False),
+                )
+        finally:
+            logging.debug(f"[i] Timings: {' '.join(f'{k}={v * 1000:.1f}ms' for k, v in timings.items())}")
         print(ascii_only(msg))
         return 0
     except KeyboardInterrupt:
@@ -0,0 +1,819 @@
+"""
+GhostLink encoder core: framing, FEC dispatch, interleaving, FSK
+synthesis, WAV output and the dedupe-aware :func:`encode_bytes` pipeline.
+
+The command line lives in ``ghostlink.__main__``; this module has no CLI
+dependencies so library users and servers import only what encoding needs.
+"""
+
+import array
+import binascii
+import functools
+import hashlib
+import logging
+import math
+import os
+import struct
+import time
+import wave
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Tuple, Iterable, Iterator, Optional
+from .profiles import PREAMBLE_MIN_TONE_S, carrier_freqs, freq_profile, fsk_order, preamble_samples
+from .constants import HISTORY_DB
+from .fec import FEC_NAMES, FEC_SCHEMES, fec_encode
+from .frame import FRAME_CODECS, V2_HEADER_LEN, build_frame, frame_codec, v2_header
+from .segments import DEFAULT_FRAME_SIZE, bits_per_symbol, select_frames, split_message
+from .metrics import METRICS, record_timings, timed
+from .midi import symbol_notes, write_midi
+from .profiling import span
+from .results import EncodeResult
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Re-exported by ``ghostlink.__main__`` (``from .encoder import *``) and the package
+__all__ = [
+    "ensure_dir", "format_timings", "sha256_hex",
+    "HAMMING74_ENCODE_TABLE", "hamming74_encode_nibble", "bytes_to_bits", "hamming74_encode_bytes",
+    "fec_encode_bytes", "interleave", "payload_symbols", "bits_to_symbols",
+    "raised_cosine_env", "advance_phase", "synth_tone", "boundary_phases", "symbols_to_audio", "write_wav",
+    "wav_header", "stretch_audio", "build_payload", "build_frames", "frames_symbols", "preamble",
+    "tone_samples", "pcm_frame_count", "iter_pcm", "warm_caches",
+    "SLOW_VARIANTS", "ENCODE_STAGES", "ProgressCallback", "EncodeCancelled",
+    "encode_bytes", "encode_bytes_to_wav", "stream_wav", "Encoder",
+]
+
+# ------------------------
+# Helpers
+# ------------------------
+def ensure_dir(path: str) -> None:
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
+
+def format_timings(timings: Dict[str, float]) -> str:
+    return " ".join(f"{stage}={seconds * 1000:.1f}ms" for stage, seconds in timings.items())
+
+def sha256_hex(b: bytes) -> str:
+    return hashlib.sha256(b).hexdigest()
+
+# ------------------------
+# Hamming(7,4) FEC
+# ------------------------
+def _calc_hamming74(nibble: int) -> Tuple[int, int, int, int, int, int, int]:
+    """Return Hamming(7,4) encoding for a single nibble."""
+    d3 = (nibble >> 3) & 1
+    d2 = (nibble >> 2) & 1
+    d1 = (nibble >> 1) & 1
+    d0 = nibble & 1
+    p1 = d3 ^ d2 ^ d0
+    p2 = d3 ^ d1 ^ d0
+    p3 = d2 ^ d1 ^ d0
+    return p1, p2, d3, p3, d2, d1, d0
+
+
+# Precompute all 16 possible encoded nibbles for fast lookup
+HAMMING74_ENCODE_TABLE: Tuple[Tuple[int, ...], ...] = tuple(
+    _calc_hamming74(n) for n in range(16)
+)
+
+
+def hamming74_encode_nibble(nibble: int) -> List[int]:
+    """Encode a nibble using Hamming(7,4) with a table lookup."""
+    if nibble < 0 or nibble > 0xF:
+        raise ValueError("Nibble must be 0..15")
+    return list(HAMMING74_ENCODE_TABLE[nibble])
+
+def bytes_to_bits(b: bytes) -> List[int]:
+    bits = []
+    for byte in b:
+        for i in range(8):
+            bits.append((byte >> (7 - i)) & 1)
+    return bits
+
+def hamming74_encode_bytes(b: bytes) -> List[int]:
+    bits = bytes_to_bits(b)
+    # To nibbles
+    nibs = []
+    for i in range(0, len(bits), 4):
+        chunk = bits[i:i+4]
+        if len(chunk) < 4:
+            chunk += [0] * (4 - len(chunk))
+        nibble = (chunk[0] << 3) | (chunk[1] << 2) | (chunk[2] << 1) | (chunk[3] << 0)
+        nibs.append(nibble)
+    out = []
+    for n in nibs:
+        out.extend(HAMMING74_ENCODE_TABLE[n])
+    return out
+
+def fec_encode_bytes(payload: bytes) -> List[int]:
+    """Channel-code a frame with the FEC its header names.
+
+    v1 frames and v2 frames marked ``hamming74`` are Hamming(7,4) coded
+    end to end. Otherwise only the v2 header is, and the body + CRC use
+    the selected :mod:`ghostlink.fec` scheme.
+    """
+    header = v2_header(payload)
+    scheme = FEC_NAMES.get(header.fec) if header else "hamming74"
+    if scheme == "hamming74":
+        return hamming74_encode_bytes(payload)
+    return hamming74_encode_bytes(payload[:V2_HEADER_LEN]) + fec_encode(scheme, payload[V2_HEADER_LEN:])
+
+def interleave(bits: List[int], depth: int) -> List[int]:
+    if depth <= 1:
+        return bits
+    rows = depth
+    cols = (len(bits) + rows - 1) // rows
+    padded = bits + [0] * (rows * cols - len(bits))
+    # Read by columns
+    out = []
+    for c in range(cols):
+        for r in range(rows):
+            out.append(padded[r * cols + c])
+    return out
+
+def payload_symbols(payload: bytes, order: int, interleave_depth: int) -> List[int]:
+    """FEC-encode, interleave and map a framed payload to FSK symbols."""
+    with span("fec"):
+        bits = fec_encode_bytes(payload)
+    if interleave_depth > 1:
+        with span("interleave"):
+            bits = interleave(bits, interleave_depth)
+    with span("symbols"):
+        return bits_to_symbols(bits, order)
+
+# ------------------------
+# Symbol mapping (4/8/16/32-FSK)
+# ------------------------
+def bits_to_symbols(bits: List[int], order: int) -> List[int]:
+    k = bits_per_symbol(order)
+    bits_copy = bits[:]
+    pad = (-len(bits_copy)) % k
+    if pad:
+        bits_copy += [0] * pad
+    symbols = []
+    for i in range(0, len(bits_copy), k):
+        val = 0
+        for j in range(k):
+            val = (val << 1) | bits_copy[i + j]
+        symbols.append(val)  # 0..order-1
+    return symbols
+
+# ------------------------
+# Audio synthesis
+# ------------------------
+@functools.lru_cache(maxsize=256)
+def raised_cosine_env(total_samples: int, ramp_samples: int) -> Tuple[float, ...]:
+    """Per-symbol envelope; cached since every symbol of a run shares it."""
+    if ramp_samples <= 0 or 2 * ramp_samples >= total_samples:
+        return (1.0,) * total_samples
+    env = [0.0] * total_samples
+    for n in range(ramp_samples):
+        env[n] = 0.5 * (1 - math.cos(math.pi * (n / ramp_samples)))
+    for n in range(ramp_samples, total_samples - ramp_samples):
+        env[n] = 1.0
+    for n in range(total_samples - ramp_samples, total_samples):
+        k = total_samples - 1 - n
+        env[n] = 0.5 * (1 - math.cos(math.pi * (k / ramp_samples)))
+    return tuple(env)
+
+def advance_phase(phase: float, freq: float, n_samples: int, sr: int) -> float:
+    """Phase after ``n_samples`` of ``freq`` starting at ``phase``, wrapped to 2*pi.
+
+    Closed form, so the phase at any symbol boundary follows from the
+    preceding symbols without rendering them.
+    """
+    return math.fmod(phase + (2.0 * math.pi / sr) * freq * n_samples, 2.0 * math.pi)
+
+def synth_tone(freq: float, sr: int, duration_s: float, amp: float,
+               phase0: float, ramp_ms: float = 5.0, bit_depth: int = 16) -> Tuple[bytes, float]:
+    """``duration_s`` of ``freq`` from ``phase0``; returns PCM and the end phase.
+
+    The end phase comes from :func:`advance_phase` rather than the
+    per-sample accumulator, so it does not depend on how rendering is split.
+    """
+    total = max(1, int(round(duration_s * sr)))
+    end_phase = advance_phase(phase0, freq, total, sr)
+    ramp = int((ramp_ms / 1000.0) * sr)
+    env = raised_cosine_env(total, ramp)
+    two_pi_over_sr = 2.0 * math.pi / sr
+    out = []
+    phase = phase0
+    
+    if bit_depth == 32:
+        # 32-bit float format
+        for i in range(total):
+            s = math.sin(phase) * amp * env[i]
+            out.append(s)  # Keep as float for 32-bit
+            phase += two_pi_over_sr * freq
+            if phase > 1e6:
+                phase = math.fmod(phase, 2.0 * math.pi)
+        return struct.pack("<" + "f" * len(out), *out), end_phase
+    elif bit_depth == 24:
+        # 24-bit PCM format
+        pcm_bytes = bytearray()
+        for i in range(total):
+            s = math.sin(phase) * amp * env[i]
+            val = max(-8388608, min(8388607, int(round(s * 8388607.0))))
+            # Pack as 3 bytes little-endian
+            pcm_bytes.extend(struct.pack("<i", val)[:3])  # Take first 3 bytes of 4-byte int
+            phase += two_pi_over_sr * freq
+            if phase > 1e6:
+                phase = math.fmod(phase, 2.0 * math.pi)
+        return bytes(pcm_bytes), end_phase
+    else:
+        # 16-bit PCM format (original)
+        for i in range(total):
+            s = math.sin(phase) * amp * env[i]
+            val = max(-32768, min(32767, int(round(s * 32767.0))))
+            out.append(val)
+            phase += two_pi_over_sr * freq
+            if phase > 1e6:
+                phase = math.fmod(phase, 2.0 * math.pi)
+        return struct.pack("<" + "h" * len(out), *out), end_phase
+
+# Below this many symbols a process pool costs more than it saves
+PARALLEL_SYNTH_MIN_SYMBOLS = 1024
+
+def boundary_phases(symbols: List[int], freqs: List[float], sr: int, baud: float,
+                    phase0: float = 0.0, gap_ms: float = 0.0) -> List[float]:
+    """Start phase of every symbol, plus the end phase, without synthesis.
+
+    Uses the same :func:`advance_phase` steps as :func:`synth_tone`, so a
+    segment rendered from ``phases[i]`` matches serial rendering exactly.
+    """
+    n_symbol = tone_samples(1.0 / float(baud), sr)
+    gap_s = max(0.0, gap_ms / 1000.0)
+    n_gap = tone_samples(gap_s, sr) if gap_s > 0 else 0
+    phases = [phase0]
+    phase = phase0
+    for s in symbols:
+        phase = advance_phase(phase, freqs[s], n_symbol, sr)
+        if n_gap:
+            phase = advance_phase(phase, 0.0, n_gap, sr)
+        phases.append(phase)
+    return phases
+
+def _render_job(job: Tuple[Any, ...]) -> bytes:
+    # Module level so a process pool can pickle it
+    symbols, freqs, sr, baud, amp, phase0, gap_ms, ramp_ms, bit_depth = job
+    return symbols_to_audio(symbols, freqs, sr, baud, amp, phase0, gap_ms, ramp_ms, bit_depth)[0]
+
+def symbols_to_audio(symbols: List[int], freqs: List[float], sr: int, baud: float,
+                     amp: float, phase0: float = 0.0,
+                     gap_ms: float = 0.0, ramp_ms: float = 5.0, bit_depth: int = 16,
+                     workers: int = 1, pool: Optional["Executor"] = None) -> Tuple[bytes, float]:
+    """PCM for ``symbols`` starting at ``phase0``; returns PCM and the end phase.
+
+    With ``workers`` above 1 and at least :data:`PARALLEL_SYNTH_MIN_SYMBOLS`
+    symbols, the stream is cut into segments whose start phases come from
+    :func:`boundary_phases` and the segments are rendered on ``pool`` (a
+    new process pool when not given). The bytes are identical to serial
+    rendering.
+    """
+    if workers > 1 and len(symbols) >= PARALLEL_SYNTH_MIN_SYMBOLS:
+        from concurrent.futures import ProcessPoolExecutor
+        phases = boundary_phases(symbols, freqs, sr, baud, phase0, gap_ms)
+        # A few segments per worker evens out uneven scheduling
+        per = -(-len(symbols) // (workers * 4))
+        jobs = [(symbols[i:i + per], list(freqs), sr, baud, amp, phases[i], gap_ms, ramp_ms, bit_depth)
+                for i in range(0, len(symbols), per)]
+        if pool is not None:
+            return b"".join(pool.map(_render_job, jobs)), phases[-1]
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as own:
+            return b"".join(own.map(_render_job, jobs)), phases[-1]
+    sym_dur = 1.0 / float(baud)
+    gap_s = max(0.0, gap_ms / 1000.0)
+    buff = bytearray()
+    phase = phase0
+    for s in symbols:
+        f = freqs[s]
+        tone, phase = synth_tone(f, sr, sym_dur, amp, phase, ramp_ms=ramp_ms, bit_depth=bit_depth)
+        buff.extend(tone)
+        if gap_s > 0:
+            silence, phase = synth_tone(0.0, sr, gap_s, 0.0, phase, ramp_ms=0.0, bit_depth=bit_depth)
+            buff.extend(silence)
+    return bytes(buff), phase
+
+def _sample_width(bit_depth: int) -> int:
+    if bit_depth == 32:
+        return 4  # 4 bytes for 32-bit float
+    if bit_depth == 24:
+        return 3  # 3 bytes for 24-bit PCM
+    return 2  # 2 bytes for 16-bit PCM
+
+def _to_stereo(pcm: bytes, bit_depth: int) -> bytes:
+    """Duplicate a mono PCM buffer into interleaved L/R frames."""
+    if bit_depth == 32:
+        # Unpack float samples, duplicate each, repack
+        sample_count = len(pcm) // 4
+        samples = struct.unpack("<" + "f" * sample_count, pcm)
+        stereo_samples = []
+        for sample in samples:
+            stereo_samples.extend([sample, sample])  # L, R
+        return struct.pack("<" + "f" * len(stereo_samples), *stereo_samples)
+    elif bit_depth == 24:
+        # For 24-bit, manually duplicate each 3-byte sample
+        stereo_pcm = bytearray()
+        for i in range(0, len(pcm), 3):
+            sample_bytes = pcm[i:i+3]
+            stereo_pcm.extend(sample_bytes)  # L channel
+            stereo_pcm.extend(sample_bytes)  # R channel
+        return bytes(stereo_pcm)
+    else:
+        # Unpack 16-bit samples, duplicate each, repack
+        sample_count = len(pcm) // 2
+        samples = struct.unpack("<" + "h" * sample_count, pcm)
+        stereo_samples = []
+        for sample in samples:
+            stereo_samples.extend([sample, sample])  # L, R
+        return struct.pack("<" + "h" * len(stereo_samples), *stereo_samples)
+
+def write_wav(path: str, sr: int, pcm: bytes, bit_depth: int = 16, channels: int = 1) -> None:
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(_sample_width(bit_depth))
+        wf.setframerate(sr)
+        
+        if channels == 2:
+            # For stereo, duplicate mono signal to both channels
+            pcm = _to_stereo(pcm, bit_depth)
+        
+        wf.writeframes(pcm)
+
+def wav_header(sr: int, n_frames: int, bit_depth: int = 16, channels: int = 1) -> bytes:
+    """Return the 44-byte RIFF header ``write_wav`` produces for ``n_frames``.
+
+    Lets callers emit a correctly sized header before any PCM exists.
+    """
+    width = _sample_width(bit_depth)
+    data_len = n_frames * channels * width
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_len) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, channels, sr,
+                                sr * channels * width, channels * width, width * 8)
+        + b"data" + struct.pack("<I", data_len)
+    )
+
+
+def stretch_audio(samples: bytes, factor: float) -> bytes:
+    """Resample PCM data to ``factor`` of its original speed.
+
+    ``factor`` < 1.0 slows the audio. Linear interpolation is used between
+    adjacent samples to avoid artifacts.
+    """
+    if factor <= 0:
+        raise ValueError("factor must be positive")
+
+    src = array.array("h")
+    src.frombytes(samples)
+    n = len(src)
+    if n == 0:
+        return b""
+
+    out_len = int(round(n / factor))
+    out = array.array("h", [0] * out_len)
+    for i in range(out_len):
+        pos = i * factor
+        i0 = int(math.floor(pos))
+        frac = pos - i0
+        if i0 >= n - 1:
+            sample = src[-1]
+        else:
+            s0 = src[i0]
+            s1 = src[i0 + 1]
+            sample = int(round(s0 + (s1 - s0) * frac))
+        out[i] = sample
+    return out.tobytes()
+
+# ------------------------
+# Framing / payload
+# ------------------------
+def build_payload(user_bytes: bytes, codec: str = "auto", fec: str = "hamming74") -> bytes:
+    """Frame ``user_bytes``; see :mod:`ghostlink.frame` for the codecs."""
+    return build_frame(user_bytes, codec, fec)
+
+def build_frames(user_bytes: bytes, codec: str = "auto", fec: str = "hamming74",
+                 frame_size: int = DEFAULT_FRAME_SIZE, resend: Optional[Iterable[int]] = None) -> List[bytes]:
+    """Frames to transmit: one frame, or the segments listed in ``resend``
+    (all if ``None``) when the message needs several; see :mod:`ghostlink.segments`."""
+    frames = split_message(user_bytes, frame_size, codec, fec)
+    if resend is not None and len(frames) == 1:
+        raise ValueError("resend needs a message split into several frames")
+    return select_frames(frames, resend)
+
+def frames_symbols(frames: List[bytes], order: int, interleave_depth: int) -> List[int]:
+    """Symbols of each frame coded and interleaved on its own, back to back."""
+    symbols: List[int] = []
+    for frame in frames:
+        symbols.extend(payload_symbols(frame, order, interleave_depth))
+    return symbols
+
+def preamble(freqs: List[float], sr: int, amp: float, seconds: float, bit_depth: int = 16) -> Tuple[bytes, float]:
+    if seconds <= 0:
+        return b"", 0.0
+    per = max(PREAMBLE_MIN_TONE_S, seconds / len(freqs))
+    out = bytearray()
+    phase = 0.0
+    for f in freqs:
+        t, phase = synth_tone(f, sr, per, amp, phase, bit_depth=bit_depth)
+        out.extend(t)
+    return bytes(out), phase
+
+def tone_samples(duration_s: float, sr: int) -> int:
+    """Number of samples ``synth_tone`` renders for ``duration_s``."""
+    return max(1, int(round(duration_s * sr)))
+
+def pcm_frame_count(n_symbols: int, n_freqs: int, sr: int, baud: float, preamble_s: float,
+                    gap_ms: float, repeats: int) -> int:
+    """Exact number of frames the encoder renders, computed without synthesis."""
+    frames = preamble_samples(n_freqs, preamble_s, sr)
+    per_symbol = tone_samples(1.0 / float(baud), sr)
+    gap_s = max(0.0, gap_ms / 1000.0)
+    if gap_s > 0:
+        per_symbol += tone_samples(gap_s, sr)
+    return frames + per_symbol * n_symbols * max(1, repeats)
+
+def iter_pcm(symbols: List[int], freqs: List[float], sr: int, baud: float, amp: float,
+             preamble_s: float, gap_ms: float, ramp_ms: float, repeats: int,
+             bit_depth: int = 16, channels: int = 1, chunk_symbols: int = 64,
+             workers: int = 1, pool: Optional["Executor"] = None) -> Iterator[bytes]:
+    """Render the preamble and repeated symbol stream chunk by chunk.
+
+    Concatenating the chunks gives the same PCM as the one-shot encoder;
+    at most ``chunk_symbols`` symbols are held in memory at a time. With
+    ``workers`` above 1 each chunk is rendered in one parallel pass (see
+    :func:`symbols_to_audio`), so chunks grow to at least
+    ``workers * PARALLEL_SYNTH_MIN_SYMBOLS`` symbols to keep the pool busy.
+    All chunks share ``pool``, or one pool for the life of the iterator.
+    """
+    phase = 0.0
+    if preamble_s > 0.0:
+        pre_pcm, phase = preamble(freqs, sr, amp, preamble_s, bit_depth=bit_depth)
+        yield _to_stereo(pre_pcm, bit_depth) if channels == 2 else pre_pcm
+    step = max(1, chunk_symbols)
+    own = None
+    if workers > 1:
+        step = max(step, workers * PARALLEL_SYNTH_MIN_SYMBOLS)
+        if pool is None and len(symbols) >= PARALLEL_SYNTH_MIN_SYMBOLS:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = own = ProcessPoolExecutor(max_workers=workers)
+    try:
+        for _ in range(max(1, repeats)):
+            for i in range(0, len(symbols), step):
+                tones, phase = symbols_to_audio(symbols[i:i + step], freqs, sr, baud, amp, phase,
+                                                gap_ms=gap_ms, ramp_ms=ramp_ms, bit_depth=bit_depth,
+                                                workers=workers, pool=pool)
+                yield _to_stereo(tones, bit_depth) if channels == 2 else tones
+    finally:
+        if own is not None:
+            own.shutdown()
+
+def warm_caches(samplerates: Iterable[int] = (44100, 48000), baud: float = 90.0,
+                ramp_ms: float = 5.0, preamble_s: float = 0.8) -> None:
+    """Precompute synthesis envelopes for common settings.
+
+    Servers call this once before forking workers so every worker starts
+    with the caches populated.
+    """
+    for sr in samplerates:
+        raised_cosine_env(tone_samples(1.0 / float(baud), sr), int((ramp_ms / 1000.0) * sr))
+        for dense in (True, False):
+            n = len(freq_profile(dense, "streaming"))
+            raised_cosine_env(tone_samples(max(PREAMBLE_MIN_TONE_S, preamble_s / n), sr), int(0.005 * sr))
+
+# ------------------------
+# Core encode
+# ------------------------
+# Speed factor -> filename suffix for the slowed companion WAVs
+SLOW_VARIANTS = {0.75: "slow25", 0.5: "slow50", 0.25: "slow100", 0.1: "slow1000"}
+
+# Stages reported to progress callbacks, in the order they run
+ENCODE_STAGES = ("payload", "synth", "wav", "midi", "variants", "db")
+
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class EncodeCancelled(Exception):
+    """Raised from a progress callback to stop an encode in progress."""
+
+
+def existing_outputs(wav_path: str) -> Tuple[Optional[str], Dict[str, str]]:
+    """Return the MIDI and slowed-variant paths that exist next to ``wav_path``."""
+    stem = os.path.splitext(wav_path)[0]
+    mid_path = stem + ".mid"
+    variants = {}
+    for suffix in SLOW_VARIANTS.values():
+        slow_path = f"{stem}_{suffix}.wav"
+        if os.path.isfile(slow_path):
+            variants[suffix] = slow_path
+    return (mid_path if os.path.isfile(mid_path) else None), variants
+
+
+def encode_bytes(user_bytes: bytes, out_dir: str, base_name_hint: str,
+                 samplerate: int, baud: float, amp: float,
+                 dense: bool, mix_profile: str,
+                 gap_ms: float, preamble_s: float, interleave_depth: int,
+                 repeats: int, ramp_ms: float, bit_depth: int = 16, channels: int = 1,
+                 out_name: Optional[str] = None,
+                 progress: Optional[ProgressCallback] = None,
+                 midi_merge: bool = False, codec: str = "auto",
+                 fec: str = "hamming74", frame_size: int = DEFAULT_FRAME_SIZE,
+                 resend: Optional[Iterable[int]] = None, order: Optional[int] = None,
+                 workers: int = 1, pool: Optional["Executor"] = None) -> EncodeResult:
+    """Encode ``user_bytes`` and return an :class:`EncodeResult` describing
+    exactly which files were written (or reused by dedupe).
+
+    ``progress`` is called as ``progress("stage", {"input": ..., "stage": ...})``
+    when each of :data:`ENCODE_STAGES` begins. It may raise
+    :class:`EncodeCancelled` to abandon the encode at that boundary.
+    ``midi_merge`` writes runs of the same carrier as one long MIDI note.
+    ``codec`` selects the payload compression (``"auto"`` keeps the
+    shortest frame) and ``fec`` the error-correcting code. Messages whose
+    compressed body exceeds ``frame_size`` bytes are sent as independent
+    segment frames; ``resend`` limits the output to those sequence numbers.
+    ``order`` (16 or 32) selects a higher-order carrier set instead of
+    ``dense``; see :func:`ghostlink.profiles.carrier_freqs`. ``workers``
+    above 1 renders long payloads on a process pool (same bytes): ``pool``
+    when given, so a caller encoding many inputs starts it once.
+    Finer-grained steps are reported as :mod:`ghostlink.profiling` spans.
+    """
+    # sqlite3 is only loaded once something is actually encoded
+    from .history import db_has_hash, db_init, db_insert, db_remove_hash
+
+    t_start = time.perf_counter()
+    result = EncodeResult(input_ref=base_name_hint)
+    timings = result.timings
+    order = fsk_order(dense, order)
+    freqs = carrier_freqs(order, mix_profile, baud)
+
+    def stage(name: str) -> None:
+        if progress is not None:
+            progress("stage", {"input": base_name_hint, "stage": name})
+
+    stage("payload")
+    with timed(timings, "payload"), span("frame"):
+        frames = build_frames(user_bytes, codec, fec, frame_size, resend)
+        payload = b"".join(frames)
+        framed_hash = sha256_hex(payload)
+        crc_hex = f"{binascii.crc32(user_bytes) & 0xFFFFFFFF:08x}"
+    result.sha256 = framed_hash
+    result.crc32_hex = crc_hex
+    result.frames = len(frames)
+
+    ensure_dir(out_dir)
+    db_path = os.path.abspath(HISTORY_DB)
+
+    with timed(timings, "db"), span("db_lookup"):
+        db_init(db_path)
+        exists, prior_path = db_has_hash(db_path, framed_hash)
+    if exists:
+        if prior_path and os.path.isfile(prior_path):
+            logging.info(f"[i] Duplicate payload detected (sha256={framed_hash[:12]}). Skipping; existing file: {prior_path}")
+            result.wav_path = prior_path
+            result.midi_path, result.variants = existing_outputs(prior_path)
+            result.skipped = True
+            timings["total"] = time.perf_counter() - t_start
+            METRICS.inc("ghostlink_dedupe_total", {"result": "hit"})
+            METRICS.inc("ghostlink_encodes_total", {"result": "skipped"})
+            record_timings("encode", timings)
+            return result
+        # Stale entry: hash exists in DB but file is missing
+        logging.info(
+            f"[i] Stale DB entry detected for sha256={framed_hash[:12]} (missing file: {prior_path}). Cleaning up."
+        )
+        try:
+            db_remove_hash(db_path, framed_hash)
+        except Exception as e:
+            logging.warning(f"[!] Failed to remove stale DB entry: {e}")
+    METRICS.inc("ghostlink_dedupe_total", {"result": "miss"})
+
+    # FEC + interleave
+    with timed(timings, "payload"):
+        symbols = frames_symbols(frames, order, interleave_depth)
+
+    total_symbols = len(symbols) * max(1, repeats)
+    est_s = total_symbols / baud + preamble_s
+    logging.info(f"[i] Mode={order}-FSK | Freqs={','.join(f'{f:.0f}' for f in freqs)}Hz "
+                 f"| SR={samplerate}Hz | Baud={baud:.1f} | Amp={amp:.3f} | {bit_depth}-bit {'stereo' if channels == 2 else 'mono'} "
+                 f"| FEC={fec} | Interleave={interleave_depth} | Repeats={repeats}")
+    logging.info(f"[i] Payload bytes={len(user_bytes)} | Framed bytes≈{len(payload)} ({frame_codec(payload)}) "
+                 f"| Frames={len(frames)} "
+                 f"| Symbols={len(symbols)} "
+                 f"| Est duration≈{est_s:.1f}s")
+
+    # Synthesize
+    stage("synth")
+    with timed(timings, "synth"), span("synth"):
+        pcm = b"".join(iter_pcm(symbols, freqs, samplerate, baud, amp, preamble_s, gap_ms, ramp_ms,
+                                repeats, bit_depth=bit_depth, chunk_symbols=len(symbols), workers=workers,
+                                pool=pool))
+
+    # Determine output filename
+    safe_hint = "".join(c for c in base_name_hint if c.isalnum() or c in ("-", "_"))[:40] or "msg"
+    if out_name:
+        if not out_name.lower().endswith(".wav"):
+            out_name = f"{out_name}.wav"
+    else:
+        out_name = f"{safe_hint}_{framed_hash[:12]}.wav"
+    logging.info(f"[i] Output filename: {out_name}")
+    out_path = os.path.join(out_dir, out_name)
+
+    stage("wav")
+    with timed(timings, "wav"), span("write_wav"):
+        try:
+            write_wav(out_path, samplerate, pcm, bit_depth=bit_depth, channels=channels)
+        except Exception as e:
+            logging.error(f"[x] Failed to write WAV: {e}")
+            raise
+    result.wav_path = out_path
+
+    # Write MIDI sequence mirroring the symbol frequencies
+    stage("midi")
+    with timed(timings, "midi"), span("midi"):
+        try:
+            mid_path = os.path.splitext(out_path)[0] + ".mid"
+            write_midi(mid_path, symbol_notes(symbols, freqs, repeats), baud, merge_repeats=midi_merge)
+            result.midi_path = mid_path
+        except Exception as e:
+            logging.warning(f"[!] Failed to write MIDI: {e}")
+
+    # Read back the written WAV for further processing
+    stage("variants")
+    with timed(timings, "variants"):
+        try:
+            with span("readback"), wave.open(out_path, "rb") as wf:
+                read_sr = wf.getframerate()
+                channels = wf.getnchannels()
+                pcm_data = wf.readframes(wf.getnframes())
+        except Exception as e:
+            logging.error(f"[x] Failed to read back WAV: {e}")
+            raise
+
+        if channels != 1:
+            logging.warning(f"[!] Unexpected channel count: {channels}")
+
+        # Generate slowed variants
+        for factor, suffix in SLOW_VARIANTS.items():
+            try:
+                with span("stretch"):
+                    stretched = stretch_audio(pcm_data, factor)
+                slow_path = os.path.splitext(out_path)[0] + f"_{suffix}.wav"
+                with span("write_variant"):
+                    write_wav(slow_path, read_sr, stretched)
+                result.variants[suffix] = slow_path
+                logging.info(f"[i] Wrote: {os.path.abspath(slow_path)} (speed={factor:.2f})")
+            except Exception as e:
+                logging.warning(f"[!] Failed to write slowed WAV {suffix}: {e}")
+
+    # Log run
+    stage("db")
+    with timed(timings, "db"), span("db_insert"):
+        try:
+            db_insert(db_path, mode="encode", input_ref=base_name_hint, h=framed_hash, bytes_len=len(user_bytes),
+                      samplerate=samplerate, baud=baud, amp=amp, dense=dense, mix_profile=mix_profile,
+                      freqs=freqs, wav_path=out_path, crc_hex=crc_hex)
+        except Exception as e:
+            logging.warning(f"[!] Failed to log to SQLite: {e}")
+
+    timings["total"] = time.perf_counter() - t_start
+    METRICS.inc("ghostlink_encodes_total", {"result": "created"})
+    record_timings("encode", timings)
+    logging.info(f"[i] Wrote: {os.path.abspath(out_path)} (sha256={framed_hash})")
+    return result
+
+
+def encode_bytes_to_wav(user_bytes: bytes, out_dir: str, base_name_hint: str,
+                        samplerate: int, baud: float, amp: float,
+                        dense: bool, mix_profile: str,
+                        gap_ms: float, preamble_s: float, interleave_depth: int,
+                        repeats: int, ramp_ms: float, bit_depth: int = 16, channels: int = 1,
+                        out_name: Optional[str] = None) -> Tuple[str, bool]:
+    """
+    Returns (output_path, skipped_by_dedupe)
+    """
+    result = encode_bytes(
+        user_bytes, out_dir, base_name_hint, samplerate, baud, amp, dense, mix_profile,
+        gap_ms, preamble_s, interleave_depth, repeats, ramp_ms,
+        bit_depth=bit_depth, channels=channels, out_name=out_name,
+    )
+    return result.wav_path, result.skipped
+
+def stream_wav(user_bytes: bytes, samplerate: int, baud: float, amp: float,
+               dense: bool, mix_profile: str, gap_ms: float, preamble_s: float,
+               interleave_depth: int, repeats: int, ramp_ms: float,
+               bit_depth: int = 16, channels: int = 1, raw: bool = False,
+               chunk_symbols: int = 64, codec: str = "auto",
+               fec: str = "hamming74", frame_size: int = DEFAULT_FRAME_SIZE,
+               resend: Optional[Iterable[int]] = None,
+               order: Optional[int] = None) -> Tuple[int, Iterator[bytes]]:
+    """Render ``user_bytes`` as a stream of WAV (or raw PCM if ``raw``) chunks.
+
+    Returns ``(total_bytes, chunks)``. The size is known before synthesis
+    starts, so the WAV header comes first and is already correct. Nothing
+    touches disk or the history DB.
+    """
+    order = fsk_order(dense, order)
+    freqs = carrier_freqs(order, mix_profile, baud)
+    symbols = frames_symbols(build_frames(user_bytes, codec, fec, frame_size, resend),
+                             order, interleave_depth)
+
+    n_frames = pcm_frame_count(len(symbols), len(freqs), samplerate, baud, preamble_s, gap_ms, repeats)
+    header = b"" if raw else wav_header(samplerate, n_frames, bit_depth=bit_depth, channels=channels)
+    total = len(header) + n_frames * channels * _sample_width(bit_depth)
+
+    def chunks() -> Iterator[bytes]:
+        if header:
+            yield header
+        yield from iter_pcm(symbols, freqs, samplerate, baud, amp, preamble_s, gap_ms, ramp_ms,
+                            repeats, bit_depth=bit_depth, channels=channels, chunk_symbols=chunk_symbols)
+
+    return total, chunks()
+
+
+class Encoder:
+    """In-memory encoder configured once and reused for many messages.
+
+    Frequencies, the symbol envelope and the preamble PCM are computed in
+    the constructor; :meth:`encode_pcm` and :meth:`encode_wav` then only
+    synthesise the payload symbols. Output is identical to
+    :func:`stream_wav` with the same settings, whatever ``workers`` is.
+    With ``workers`` above 1, long messages are rendered on ``pool`` if
+    given, otherwise on a pool started for each message. Nothing touches
+    disk, the history DB, MIDI or the slowed variants.
+    """
+
+    def __init__(self, samplerate: int = 48000, baud: float = 90.0, amp: float = 0.06,
+                 dense: bool = True, mix_profile: str = "streaming", gap_ms: float = 0.0,
+                 preamble_s: float = 0.8, interleave_depth: int = 4, repeats: int = 2,
+                 ramp_ms: float = 5.0, bit_depth: int = 16, channels: int = 1, codec: str = "auto",
+                 fec: str = "hamming74", frame_size: int = DEFAULT_FRAME_SIZE,
+                 order: Optional[int] = None, workers: int = 1,
+                 pool: Optional["Executor"] = None) -> None:
+        if not 16000 <= samplerate <= 192000:
+            raise ValueError("samplerate must be in 16k..192k")
+        if not 10 < baud <= 2000:
+            raise ValueError("baud must be in (10,2000]")
+        if not 0.0 < amp <= 1.0:
+            raise ValueError("amp must be in (0,1]")
+        if not 1 <= interleave_depth <= 64:
+            raise ValueError("interleave depth must be 1..64")
+        if not 1 <= repeats <= 16:
+            raise ValueError("repeats must be 1..16")
+        if bit_depth not in (16, 24, 32) or channels not in (1, 2):
+            raise ValueError("bit depth must be 16/24/32 and channels 1/2")
+        if codec not in FRAME_CODECS:
+            raise ValueError(f"codec must be one of {', '.join(FRAME_CODECS)}")
+        if fec not in FEC_SCHEMES:
+            raise ValueError(f"fec must be one of {', '.join(FEC_SCHEMES)}")
+        if frame_size < 0 or workers < 1:
+            raise ValueError("frame size must be >= 0 and workers >= 1")
+        self.samplerate = samplerate
+        self.baud = float(baud)
+        self.amp = amp
+        self.dense = dense
+        self.mix_profile = mix_profile
+        self.gap_ms = gap_ms
+        self.preamble_s = preamble_s
+        self.interleave_depth = interleave_depth
+        self.repeats = repeats
+        self.ramp_ms = ramp_ms
+        self.bit_depth = bit_depth
+        self.channels = channels
+        self.codec = codec
+        self.fec = fec
+        self.frame_size = frame_size
+        self.workers = workers
+        self.pool = pool
+
+        self.order = fsk_order(dense, order)
+        self.freqs = carrier_freqs(self.order, mix_profile, self.baud)
+        # Warm the shared symbol envelope and render the fixed preamble once
+        raised_cosine_env(tone_samples(1.0 / self.baud, samplerate), int((ramp_ms / 1000.0) * samplerate))
+        self._preamble_pcm, self._preamble_phase = preamble(self.freqs, samplerate, amp, preamble_s,
+                                                            bit_depth=bit_depth)
+        if channels == 2:
+            self._preamble_pcm = _to_stereo(self._preamble_pcm, bit_depth)
+
+    def symbols(self, user_bytes: bytes, resend: Optional[Iterable[int]] = None) -> List[int]:
+        """FSK symbols for one pass of ``user_bytes`` (before repeats)."""
+        frames = build_frames(user_bytes, self.codec, self.fec, self.frame_size, resend)
+        return frames_symbols(frames, self.order, self.interleave_depth)
+
+    def frame_count(self, user_bytes: bytes, resend: Optional[Iterable[int]] = None) -> int:
+        return pcm_frame_count(len(self.symbols(user_bytes, resend)), len(self.freqs), self.samplerate,
+                               self.baud, self.preamble_s, self.gap_ms, self.repeats)
+
+    def encode_pcm(self, user_bytes: bytes, resend: Optional[Iterable[int]] = None) -> bytes:
+        """Raw little-endian PCM frames for ``user_bytes``."""
+        tones, _ = symbols_to_audio(self.symbols(user_bytes, resend) * self.repeats, self.freqs, self.samplerate,
+                                    self.baud, self.amp, self._preamble_phase, gap_ms=self.gap_ms,
+                                    ramp_ms=self.ramp_ms, bit_depth=self.bit_depth, workers=self.workers,
+                                    pool=self.pool)
+        if self.channels == 2:
+            tones = _to_stereo(tones, self.bit_depth)
+        return self._preamble_pcm + tones
+
+    def encode_wav(self, user_bytes: bytes, resend: Optional[Iterable[int]] = None) -> bytes:
+        """Complete WAV file for ``user_bytes``."""
+        pcm = self.encode_pcm(user_bytes, resend)
+        n_frames = len(pcm) // (self.channels * _sample_width(self.bit_depth))
+        return wav_header(self.samplerate, n_frames, bit_depth=self.bit_depth, channels=self.channels) + pcm
@@ -0,0 +1,317 @@
+"""Selectable forward error correction for the body of v2 frames.
+
+Hamming(7,4) stays in the encoder/decoder modules (it also protects every
+frame header). This module adds two higher-gain codes:
+
+* ``rs``: Reed-Solomon over GF(256) with :data:`RS_NSYM` parity bytes per
+  block of up to 255 bytes (RS(255,239), shortened for the last block).
+  Corrects up to 8 byte errors per block at ~7% overhead on long bodies.
+* ``conv``: rate-1/2, K=7 convolutional code (the 171/133 octal pair),
+  punctured to rate 2/3 and decoded with hard-decision Viterbi. 50%
+  overhead versus Hamming's 75%, with far better random-error gain.
+
+Both are table driven: the GF(256) log/antilog tables, the RS generator
+and the per-state trellis outputs are built once at import.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+# Scheme name -> id carried in the v2 frame header
+FEC_SCHEMES: Dict[str, int] = {"hamming74": 0, "rs": 1, "conv": 2}
+FEC_NAMES = {v: k for k, v in FEC_SCHEMES.items()}
+
+RS_NSYM = 16
+RS_BLOCK = 255
+
+CONV_K = 7
+CONV_POLYS = (0o171, 0o133)
+# Per pair of input bits send (g1, g2) for the first and only g1 for the second
+CONV_PUNCTURE = ((1, 1), (1, 0))
+
+# ------------------------
+# Bit helpers
+# ------------------------
+def _to_bits(data: bytes) -> List[int]:
+    return [(byte >> (7 - i)) & 1 for byte in data for i in range(8)]
+
+def _from_bits(bits: Sequence[int]) -> bytes:
+    out = bytearray()
+    for i in range(0, len(bits) - 7, 8):
+        byte = 0
+        for b in bits[i:i+8]:
+            byte = (byte << 1) | b
+        out.append(byte)
+    return bytes(out)
+
+# ------------------------
+# GF(256) tables (primitive polynomial x^8+x^4+x^3+x^2+1)
+# ------------------------
+GF_EXP = [0] * 512
+GF_LOG = [0] * 256
+_x = 1
+for _i in range(255):
+    GF_EXP[_i] = _x
+    GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11D
+for _i in range(255, 512):
+    GF_EXP[_i] = GF_EXP[_i - 255]
+del _x, _i
+
+def gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[b]]
+
+def gf_div(a: int, b: int) -> int:
+    if b == 0:
+        raise ZeroDivisionError("GF(256) division by zero")
+    if a == 0:
+        return 0
+    return GF_EXP[(GF_LOG[a] + 255 - GF_LOG[b]) % 255]
+
+def gf_pow(a: int, power: int) -> int:
+    return GF_EXP[(GF_LOG[a] * power) % 255]
+
+def gf_poly_scale(p: List[int], x: int) -> List[int]:
+    return [gf_mul(c, x) for c in p]
+
+def gf_poly_add(p: List[int], q: List[int]) -> List[int]:
+    r = [0] * max(len(p), len(q))
+    for i, c in enumerate(p):
+        r[i + len(r) - len(p)] = c
+    for i, c in enumerate(q):
+        r[i + len(r) - len(q)] ^= c
+    return r
+
+def gf_poly_mul(p: List[int], q: List[int]) -> List[int]:
+    r = [0] * (len(p) + len(q) - 1)
+    for j, qj in enumerate(q):
+        for i, pi in enumerate(p):
+            r[i + j] ^= gf_mul(pi, qj)
+    return r
+
+def gf_poly_eval(p: Sequence[int], x: int) -> int:
+    """Evaluate ``p`` (highest degree first) at ``x`` by Horner's rule."""
+    y = p[0]
+    for c in p[1:]:
+        y = gf_mul(y, x) ^ c
+    return y
+
+def _rs_generator(nsym: int) -> List[int]:
+    g = [1]
+    for i in range(nsym):
+        g = gf_poly_mul(g, [1, GF_EXP[i]])
+    return g
+
+_RS_GEN_LOG = [GF_LOG[c] for c in _rs_generator(RS_NSYM)]
+
+# ------------------------
+# Reed-Solomon
+# ------------------------
+def rs_encode_block(data: bytes) -> bytes:
+    """Systematic RS block: ``data`` followed by :data:`RS_NSYM` parity bytes."""
+    if len(data) > RS_BLOCK - RS_NSYM:
+        raise ValueError("RS block too long")
+    rem = list(data) + [0] * RS_NSYM
+    gen = _RS_GEN_LOG
+    for i in range(len(data)):
+        coef = rem[i]
+        if coef:
+            lc = GF_LOG[coef]
+            for j in range(1, len(gen)):
+                rem[i + j] ^= GF_EXP[lc + gen[j]]
+    return bytes(data) + bytes(rem[len(data):])
+
+def _rs_syndromes(block: Sequence[int]) -> List[int]:
+    # Leading 0 keeps the indexing of the classic BM formulation
+    return [0] + [gf_poly_eval(block, GF_EXP[i]) for i in range(RS_NSYM)]
+
+def _rs_error_locator(synd: List[int]) -> List[int]:
+    """Berlekamp-Massey."""
+    err_loc = [1]
+    old_loc = [1]
+    for i in range(RS_NSYM):
+        k = i + 1
+        delta = synd[k]
+        for j in range(1, len(err_loc)):
+            delta ^= gf_mul(err_loc[-(j + 1)], synd[k - j])
+        old_loc = old_loc + [0]
+        if delta:
+            if len(old_loc) > len(err_loc):
+                new_loc = gf_poly_scale(old_loc, delta)
+                old_loc = gf_poly_scale(err_loc, gf_div(1, delta))
+                err_loc = new_loc
+            err_loc = gf_poly_add(err_loc, gf_poly_scale(old_loc, delta))
+    while err_loc and err_loc[0] == 0:
+        del err_loc[0]
+    if (len(err_loc) - 1) * 2 > RS_NSYM:
+        raise ValueError("too many RS errors")
+    return err_loc
+
+def _rs_error_positions(err_loc: List[int], n: int) -> List[int]:
+    """Chien search over the ``n`` positions of a (possibly shortened) block."""
+    rev = err_loc[::-1]
+    pos = [n - 1 - i for i in range(n) if gf_poly_eval(rev, gf_pow(2, i)) == 0]
+    if len(pos) != len(err_loc) - 1:
+        raise ValueError("too many RS errors")
+    return pos
+
+def _rs_correct(block: List[int], synd: List[int], err_pos: List[int]) -> List[int]:
+    """Forney algorithm: error magnitudes at ``err_pos``."""
+    coef_pos = [len(block) - 1 - p for p in err_pos]
+    loc = [1]
+    for p in coef_pos:
+        loc = gf_poly_mul(loc, gf_poly_add([1], [gf_pow(2, p), 0]))
+    # Error evaluator: (S(x) * Lambda(x)) mod x^(nsym+1)
+    product = gf_poly_mul(synd[::-1], loc)
+    evaluator = product[len(product) - len(loc):][::-1]
+    xs = [GF_EXP[p] for p in coef_pos]
+    fixed = list(block)
+    for i, xi in enumerate(xs):
+        xi_inv = gf_div(1, xi)
+        denom = 1
+        for j, xj in enumerate(xs):
+            if j != i:
+                denom = gf_mul(denom, 1 ^ gf_mul(xi_inv, xj))
+        if denom == 0:
+            raise ValueError("RS correction failed")
+        y = gf_mul(xi, gf_poly_eval(evaluator[::-1], xi_inv))
+        fixed[err_pos[i]] ^= gf_div(y, denom)
+    return fixed
+
+def rs_decode_block(block: bytes) -> bytes:
+    """Data bytes of one RS block, correcting up to ``RS_NSYM // 2`` errors."""
+    if len(block) <= RS_NSYM:
+        raise ValueError("RS block too short")
+    symbols = list(block)
+    synd = _rs_syndromes(symbols)
+    if any(synd):
+        err_pos = _rs_error_positions(_rs_error_locator(synd), len(symbols))
+        symbols = _rs_correct(symbols, synd, err_pos)
+        if any(_rs_syndromes(symbols)):
+            raise ValueError("RS correction failed")
+    return bytes(symbols[:-RS_NSYM])
+
+def rs_encode(data: bytes) -> bytes:
+    step = RS_BLOCK - RS_NSYM
+    return b"".join(rs_encode_block(data[i:i+step]) for i in range(0, len(data), step))
+
+def rs_encoded_len(n: int) -> int:
+    return n + RS_NSYM * -(-n // (RS_BLOCK - RS_NSYM))
+
+def rs_decode(data: bytes, n: int) -> bytes:
+    """First ``n`` data bytes of an :func:`rs_encode` stream."""
+    if len(data) < rs_encoded_len(n):
+        raise ValueError("truncated payload")
+    out = bytearray()
+    pos = 0
+    while len(out) < n:
+        k = min(RS_BLOCK - RS_NSYM, n - len(out))
+        out += rs_decode_block(data[pos:pos + k + RS_NSYM])
+        pos += k + RS_NSYM
+    return bytes(out)
+
+# ------------------------
+# Convolutional code + Viterbi
+# ------------------------
+_STATES = 1 << (CONV_K - 1)
+
+def _parity(x: int) -> int:
+    return bin(x).count("1") & 1
+
+# _CONV_OUT[state][bit] = (g1 << 1) | g2 for input ``bit`` in ``state``
+_CONV_OUT: Tuple[Tuple[int, int], ...] = tuple(
+    tuple((_parity(((s << 1) | b) & CONV_POLYS[0]) << 1) | _parity(((s << 1) | b) & CONV_POLYS[1])
+          for b in (0, 1))
+    for s in range(_STATES)
+)
+
+def conv_encoded_len(n_bits: int) -> int:
+    steps = n_bits + CONV_K - 1
+    per = [sum(p) for p in CONV_PUNCTURE]
+    return sum(per[t % len(per)] for t in range(steps))
+
+def conv_encode_bits(bits: Sequence[int]) -> List[int]:
+    """Encode ``bits`` plus a zero tail that returns the register to state 0."""
+    out: List[int] = []
+    state = 0
+    mask = _STATES - 1
+    for t, b in enumerate(list(bits) + [0] * (CONV_K - 1)):
+        o = _CONV_OUT[state][b]
+        keep = CONV_PUNCTURE[t % len(CONV_PUNCTURE)]
+        if keep[0]:
+            out.append(o >> 1)
+        if keep[1]:
+            out.append(o & 1)
+        state = ((state << 1) | b) & mask
+    return out
+
+def conv_decode_bits(bits: Sequence[int], n_bits: int) -> List[int]:
+    """Hard-decision Viterbi decode of the first ``n_bits`` input bits."""
+    steps = n_bits + CONV_K - 1
+    if len(bits) < conv_encoded_len(n_bits):
+        raise ValueError("truncated payload")
+    inf = 1 << 30
+    metrics = [0] + [inf] * (_STATES - 1)
+    decisions: List[bytes] = []
+    half = _STATES >> 1
+    pos = 0
+    for t in range(steps):
+        keep = CONV_PUNCTURE[t % len(CONV_PUNCTURE)]
+        r1 = bits[pos] if keep[0] else None
+        pos += keep[0]
+        r2 = bits[pos] if keep[1] else None
+        pos += keep[1]
+        # Branch cost for each of the four (g1, g2) outputs; punctured bits cost nothing
+        cost = [(0 if r1 is None else (o >> 1) ^ r1) + (0 if r2 is None else (o & 1) ^ r2)
+                for o in range(4)]
+        new = [inf] * _STATES
+        choice = bytearray(_STATES)
+        for ns in range(_STATES):
+            b = ns & 1
+            p0 = ns >> 1
+            p1 = p0 | half
+            m0 = metrics[p0] + cost[_CONV_OUT[p0][b]]
+            m1 = metrics[p1] + cost[_CONV_OUT[p1][b]]
+            if m1 < m0:
+                new[ns] = m1
+                choice[ns] = 1
+            else:
+                new[ns] = m0
+        metrics = new
+        decisions.append(bytes(choice))
+    # The tail forces the encoder back to state 0
+    state = 0
+    out = [0] * steps
+    for t in range(steps - 1, -1, -1):
+        out[t] = state & 1
+        state = (state >> 1) | (half if decisions[t][state] else 0)
+    return out[:n_bits]
+
+# ------------------------
+# Dispatch
+# ------------------------
+def encoded_bits(scheme: str, n_bytes: int) -> int:
+    """Coded length in bits of ``n_bytes`` under ``scheme``."""
+    if scheme == "rs":
+        return rs_encoded_len(n_bytes) * 8
+    if scheme == "conv":
+        return conv_encoded_len(n_bytes * 8)
+    raise ValueError(f"unknown FEC scheme: {scheme}")
+
+def fec_encode(scheme: str, data: bytes) -> List[int]:
+    if scheme == "rs":
+        return _to_bits(rs_encode(data))
+    if scheme == "conv":
+        return conv_encode_bits(_to_bits(data))
+    raise ValueError(f"unknown FEC scheme: {scheme}")
+
+def fec_decode(scheme: str, bits: Sequence[int], n_bytes: int) -> bytes:
+    """First ``n_bytes`` of data from coded ``bits`` (extra trailing bits ignored)."""
+    if len(bits) < encoded_bits(scheme, n_bytes):
+        raise ValueError("truncated payload")
+    if scheme == "rs":
+        return rs_decode(_from_bits(bits[:encoded_bits(scheme, n_bytes)]), n_bytes)
+    return _from_bits(conv_decode_bits(bits, n_bytes * 8))
@@ -0,0 +1,257 @@
+"""GhostLink frame formats and payload codecs.
+
+Three frame layouts are understood:
+
+* v1 (``GIB``): magic + length(4) + data + crc32(data)(4). Still the
+  smallest choice for short or incompressible messages.
+* v2 (``GIV``): magic + version(1) + codec(1) + fec(1) + raw length(4) +
+  body length(4) + body + crc32(4) over everything after the magic. The
+  14-byte header is always Hamming(7,4) coded so a decoder can read the
+  FEC id; body and CRC use the scheme it names (see :mod:`ghostlink.fec`).
+* v3: a v2 header whose body starts with message id(4) + sequence(2) +
+  total(2) + chunk length(2), followed by one fixed-size slice of the
+  compressed message. Built and reassembled by :mod:`ghostlink.segments`.
+
+The body of a v2 frame is the message run through one of :data:`CODECS`.
+:func:`build_frame` with ``codec="auto"`` tries every applicable codec and
+keeps the shortest frame; :func:`parse_frame` accepts either layout and
+returns the original bytes.
+"""
+
+import binascii
+import struct
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .constants import FRAME_VERSION, GIB_MAGIC, GIV_MAGIC, SEGMENT_VERSION
+from .fec import FEC_SCHEMES
+
+# Codec name -> id carried in the v2 header
+CODECS: Dict[str, int] = {"none": 0, "zlib": 1, "lzma": 2, "ascii7": 3}
+CODEC_NAMES = {v: k for k, v in CODECS.items()}
+
+# Everything build_frame accepts; "v1" forces the legacy layout
+FRAME_CODECS = ("auto", "v1") + tuple(CODECS)
+
+_V2_HEADER = struct.Struct(">BBBII")
+V2_HEADER_LEN = len(GIV_MAGIC) + _V2_HEADER.size
+V2_OVERHEAD = V2_HEADER_LEN + 4
+
+
+_SEGMENT = struct.Struct(">IHHH")
+SEGMENT_HEADER_LEN = _SEGMENT.size
+
+
+class V2Header(NamedTuple):
+    version: int
+    codec: int
+    fec: int
+    raw_len: int
+    body_len: int
+
+
+class SegmentInfo(NamedTuple):
+    msg_id: int
+    seq: int
+    total: int
+    chunk_len: int
+
+# Never inflate more than this, whatever a corrupted header claims
+MAX_RAW_LEN = 16 * 1024 * 1024
+
+# ------------------------
+# Codecs
+# ------------------------
+def _lzma_filters() -> List[Dict[str, int]]:
+    import lzma
+    # Payloads are small; a 1 MiB dictionary keeps encoder memory modest
+    return [{"id": lzma.FILTER_LZMA2, "preset": 9 | lzma.PRESET_EXTREME, "dict_size": 1 << 20}]
+
+def pack_ascii7(data: bytes) -> bytes:
+    """Pack 7-bit characters MSB-first, 8 characters per 7 bytes."""
+    acc = nbits = 0
+    out = bytearray()
+    for b in data:
+        if b > 0x7F:
+            raise ValueError("ascii7 codec needs 7-bit input")
+        acc = (acc << 7) | b
+        nbits += 7
+        if nbits >= 8:
+            nbits -= 8
+            out.append((acc >> nbits) & 0xFF)
+    if nbits:
+        out.append((acc << (8 - nbits)) & 0xFF)
+    return bytes(out)
+
+def unpack_ascii7(body: bytes, count: int) -> bytes:
+    if len(body) * 8 < count * 7:
+        raise ValueError("ascii7 body too short")
+    acc = nbits = 0
+    out = bytearray()
+    it = iter(body)
+    while len(out) < count:
+        if nbits < 7:
+            acc = (acc << 8) | next(it)
+            nbits += 8
+        nbits -= 7
+        out.append((acc >> nbits) & 0x7F)
+    return bytes(out)
+
+def compress(data: bytes, codec: str) -> bytes:
+    if codec == "none":
+        return data
+    if codec == "zlib":
+        c = zlib.compressobj(9, zlib.DEFLATED, -15)  # raw deflate: no zlib header/adler
+        return c.compress(data) + c.flush()
+    if codec == "lzma":
+        import lzma
+        return lzma.compress(data, format=lzma.FORMAT_RAW, filters=_lzma_filters())
+    if codec == "ascii7":
+        return pack_ascii7(data)
+    raise ValueError(f"unknown codec: {codec}")
+
+def decompress(body: bytes, codec_id: int, raw_len: int) -> bytes:
+    if raw_len > MAX_RAW_LEN:
+        raise ValueError("payload too large")
+    codec = CODEC_NAMES.get(codec_id)
+    if codec == "none":
+        data = body
+    elif codec == "zlib":
+        try:
+            data = zlib.decompressobj(-15).decompress(body, raw_len)
+        except zlib.error as e:
+            raise ValueError(f"zlib body is corrupt: {e}") from e
+    elif codec == "lzma":
+        import lzma
+        try:
+            d = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=_lzma_filters())
+            data = d.decompress(body, raw_len)
+        except (lzma.LZMAError, EOFError) as e:
+            raise ValueError(f"lzma body is corrupt: {e}") from e
+    elif codec == "ascii7":
+        data = unpack_ascii7(body, raw_len)
+    else:
+        raise ValueError(f"unknown codec id {codec_id}")
+    if len(data) != raw_len:
+        raise ValueError("decompressed length mismatch")
+    return data
+
+def codec_applies(data: bytes, codec: str) -> bool:
+    return codec != "ascii7" or all(b < 0x80 for b in data)
+
+def best_codec(data: bytes) -> Tuple[str, bytes]:
+    """``(codec, body)`` for the applicable codec with the shortest body."""
+    best = ("none", data)
+    for name in ("ascii7", "zlib", "lzma"):
+        if codec_applies(data, name):
+            body = compress(data, name)
+            if len(body) < len(best[1]):
+                best = (name, body)
+    return best
+
+# ------------------------
+# Frames
+# ------------------------
+def build_v1(data: bytes) -> bytes:
+    length = struct.pack(">I", len(data))
+    crc = struct.pack(">I", binascii.crc32(data) & 0xFFFFFFFF)
+    return GIB_MAGIC + length + data + crc
+
+def build_v2(data: bytes, codec: str = "none", fec: str = "hamming74") -> bytes:
+    body = compress(data, codec)
+    head = _V2_HEADER.pack(FRAME_VERSION, CODECS[codec], FEC_SCHEMES[fec], len(data), len(body)) + body
+    return GIV_MAGIC + head + struct.pack(">I", binascii.crc32(head) & 0xFFFFFFFF)
+
+def build_frame(data: bytes, codec: str = "auto", fec: str = "hamming74") -> bytes:
+    """Frame ``data``; ``"auto"`` keeps the shortest of v1 and every v2 codec.
+
+    Only Hamming(7,4) can protect a v1 frame, so any other ``fec`` always
+    gets a v2 frame (codec ``"none"`` if nothing compresses).
+    """
+    if fec not in FEC_SCHEMES:
+        raise ValueError(f"unknown FEC scheme: {fec}")
+    if codec == "v1":
+        if fec != "hamming74":
+            raise ValueError("v1 frames only support hamming74 FEC")
+        return build_v1(data)
+    if codec != "auto":
+        if not codec_applies(data, codec):
+            raise ValueError(f"{codec} codec cannot carry this payload")
+        return build_v2(data, codec, fec)
+    best = build_v1(data) if fec == "hamming74" else build_v2(data, "none", fec)
+    for name in ("ascii7", "zlib", "lzma"):
+        if codec_applies(data, name):
+            frame = build_v2(data, name, fec)
+            if len(frame) < len(best):
+                best = frame
+    return best
+
+def build_v3(chunk: bytes, size: int, codec: str, fec: str, raw_len: int,
+             msg_id: int, seq: int, total: int) -> bytes:
+    """One segment frame; ``chunk`` is zero-padded to ``size`` bytes."""
+    if len(chunk) > size:
+        raise ValueError("segment chunk larger than the frame size")
+    body = _SEGMENT.pack(msg_id, seq, total, len(chunk)) + chunk + bytes(size - len(chunk))
+    head = _V2_HEADER.pack(SEGMENT_VERSION, CODECS[codec], FEC_SCHEMES[fec], raw_len, len(body)) + body
+    return GIV_MAGIC + head + struct.pack(">I", binascii.crc32(head) & 0xFFFFFFFF)
+
+def v2_header(frame: bytes) -> Optional[V2Header]:
+    """Header fields of a v2 frame, or ``None`` for anything else."""
+    if len(frame) < V2_HEADER_LEN or frame[:3] != GIV_MAGIC:
+        return None
+    return V2Header(*_V2_HEADER.unpack_from(frame, 3))
+
+def frame_codec(frame: bytes) -> str:
+    """Codec name of a frame built by :func:`build_frame` (``"v1"`` for GIB)."""
+    if frame[:3] == GIV_MAGIC and len(frame) > 4:
+        return CODEC_NAMES.get(frame[4], "unknown")
+    return "v1"
+
+def parse_frame(data: bytes) -> bytes:
+    """Original message bytes from a v1 or v2 frame (trailing padding ignored)."""
+    if len(data) < 3 + 4 + 4:
+        raise ValueError("payload too short")
+    magic = data[:3]
+    if magic == GIB_MAGIC:
+        length = struct.unpack(">I", data[3:7])[0]
+        need = 3 + 4 + length + 4
+        if len(data) < need:
+            raise ValueError("truncated payload")
+        msg = data[7:7+length]
+        crc_recv = struct.unpack(">I", data[7+length:7+length+4])[0]
+        if binascii.crc32(msg) & 0xFFFFFFFF != crc_recv:
+            raise ValueError("CRC mismatch")
+        return msg
+    if magic != GIV_MAGIC:
+        raise ValueError("bad magic")
+    header, body = _checked_v2(data)
+    if header.version == SEGMENT_VERSION:
+        raise ValueError("segment frame needs reassembly")
+    if header.version != FRAME_VERSION:
+        raise ValueError(f"unsupported frame version {header.version}")
+    return decompress(body, header.codec, header.raw_len)
+
+def _checked_v2(data: bytes) -> Tuple[V2Header, bytes]:
+    """Header and body of a GIV frame whose CRC checks out."""
+    if len(data) < V2_OVERHEAD:
+        raise ValueError("payload too short")
+    header = V2Header(*_V2_HEADER.unpack_from(data, 3))
+    end = V2_HEADER_LEN + header.body_len
+    if len(data) < end + 4:
+        raise ValueError("truncated payload")
+    crc_recv = struct.unpack(">I", data[end:end+4])[0]
+    if binascii.crc32(data[3:end]) & 0xFFFFFFFF != crc_recv:
+        raise ValueError("CRC mismatch")
+    return header, data[V2_HEADER_LEN:end]
+
+def parse_segment(data: bytes) -> Tuple[V2Header, SegmentInfo, bytes]:
+    """Header, segment fields and chunk of a v3 frame (CRC checked)."""
+    if data[:3] != GIV_MAGIC:
+        raise ValueError("bad magic")
+    header, body = _checked_v2(data)
+    if header.version != SEGMENT_VERSION or len(body) < SEGMENT_HEADER_LEN:
+        raise ValueError("not a segment frame")
+    info = SegmentInfo(*_SEGMENT.unpack_from(body))
+    if info.seq >= info.total or info.chunk_len > len(body) - SEGMENT_HEADER_LEN:
+        raise ValueError("bad segment header")
+    return header, info, body[SEGMENT_HEADER_LEN:SEGMENT_HEADER_LEN + info.chunk_len]
@@ -0,0 +1,172 @@
+"""Low-end rejection front end for symbol detection.
+
+Payloads mixed low under music share the capture with the host's bass
+and low mids, which leak into the Goertzel bins through their sidelobes.
+The front end band-passes the input to the carriers before detection:
+it halves the rate with 19-tap half-band low-pass stages for as long as
+each stage keeps aliases :data:`ALIAS_REJECTION_DB` below the carriers,
+then high-passes below the lowest carrier at the reduced rate. Decimating
+first keeps the high-pass and the Goertzel loops short.
+
+The filters' response at each carrier is known, so their power loss is
+undone with per-carrier gains. The decimation factor, filter
+coefficients, Goertzel coefficients and gains are computed once per
+(carriers, sample rate, symbol length) in :func:`front_end`.
+
+This is a rejection filter, not a speed-up. In pure Python each filter
+pass costs more than the Goertzel work the lower rate saves, so detection
+with it is slower: about 1.2x at 48 kHz and up to 2.5x at 96 kHz for 4
+or 8 carriers. It is opt-in.
+"""
+
+import functools
+import math
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+# Each half-band stage keeps aliases at least this far below the carriers
+ALIAS_REJECTION_DB = 60.0
+
+# Odd-tap pairs of the half-band filter (19 taps)
+HALFBAND_PAIRS = 5
+
+# Decimated symbol windows keep at least this many samples
+MIN_WINDOW_SAMPLES = 8
+
+# High-pass corner, as a fraction of the lowest carrier
+HIGHPASS_RATIO = 0.6
+
+Biquad = Tuple[float, float, float, float, float]
+
+# ------------------------
+# Filters
+# ------------------------
+def biquad(samples: Sequence[float], b0: float, b1: float, b2: float, a1: float, a2: float) -> List[float]:
+    out = []
+    x1 = x2 = y1 = y2 = 0.0
+    for x in samples:
+        y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x2, x1 = x1, x
+        y2, y1 = y1, y
+        out.append(y)
+    return out
+
+def rbj(kind: str, sr: float, cutoff_hz: float) -> Biquad:
+    """Butterworth-Q (1/sqrt(2)) low/high-pass biquad coefficients."""
+    w0 = 2.0 * math.pi * cutoff_hz / sr
+    alpha = math.sin(w0) / math.sqrt(2.0)
+    cos_w0 = math.cos(w0)
+    if kind == "low":
+        b0 = b2 = (1.0 - cos_w0) / 2.0
+        b1 = 1.0 - cos_w0
+    else:
+        b0 = b2 = (1.0 + cos_w0) / 2.0
+        b1 = -(1.0 + cos_w0)
+    a0 = 1.0 + alpha
+    return b0 / a0, b1 / a0, b2 / a0, -2.0 * cos_w0 / a0, (1.0 - alpha) / a0
+
+def biquad_gain(coeffs: Biquad, freq: float, sr: float) -> float:
+    """Magnitude response of a biquad at ``freq``."""
+    b0, b1, b2, a1, a2 = coeffs
+    w = 2.0 * math.pi * freq / sr
+    num = math.hypot(b0 + b1 * math.cos(w) + b2 * math.cos(2 * w), b1 * math.sin(w) + b2 * math.sin(2 * w))
+    den = math.hypot(1.0 + a1 * math.cos(w) + a2 * math.cos(2 * w), a1 * math.sin(w) + a2 * math.sin(2 * w))
+    return num / den
+
+def halfband_taps(pairs: int = HALFBAND_PAIRS) -> Tuple[float, Tuple[float, ...]]:
+    """Centre tap and odd taps ``h1, h3, ...`` of a Blackman-windowed half-band low-pass.
+
+    The even taps other than the centre are zero, which is what makes
+    half-band decimation cheap. Normalised to unity gain at DC.
+    """
+    width = 2 * pairs
+    odd = []
+    for i in range(pairs):
+        k = 2 * i + 1
+        window = 0.42 + 0.5 * math.cos(math.pi * k / width) + 0.08 * math.cos(2.0 * math.pi * k / width)
+        odd.append(math.sin(math.pi * k / 2.0) / (math.pi * k) * window)
+    norm = 0.5 + 2.0 * sum(odd)
+    return 0.5 / norm, tuple(h / norm for h in odd)
+
+_HALFBAND = halfband_taps()
+
+def halfband_gain(freq: float, sr: float) -> float:
+    """Magnitude response of :func:`halfband_decimate` at ``freq`` (before decimation)."""
+    centre, odd = _HALFBAND
+    w = 2.0 * math.pi * freq / sr
+    return abs(centre + sum(2.0 * h * math.cos(w * (2 * i + 1)) for i, h in enumerate(odd)))
+
+def halfband_rejection(sr: float, lo: float, hi: float) -> float:
+    """How far (dB) halving ``sr`` keeps aliases below the band ``lo..hi``."""
+    fold = sr / 2.0
+    if fold - hi <= hi:
+        return 0.0
+    grid = [lo + (hi - lo) * i / 64 for i in range(65)]
+    passband = min(halfband_gain(f, sr) for f in grid)
+    alias = max(halfband_gain(fold - f, sr) for f in grid)
+    return 20.0 * math.log10(passband / max(alias, 1e-12))
+
+def halfband_decimate(samples: Sequence[float]) -> List[float]:
+    """Half-band low-pass keeping every second output.
+
+    Output ``j`` is centred on input ``2 * j`` (zeros are assumed outside
+    the input), so input position ``p`` maps to ``p / 2``.
+    """
+    centre, (h1, h3, h5, h7, h9) = _HALFBAND
+    # odd[j + 5] is input 2j + 1; padded so every window stays in range
+    odd = [0.0] * HALFBAND_PAIRS + list(samples[1::2]) + [0.0] * HALFBAND_PAIRS
+    return [centre * x + h1 * (a1 + b1) + h3 * (a3 + b3) + h5 * (a5 + b5) + h7 * (a7 + b7) + h9 * (a9 + b9)
+            for x, a1, b1, a3, b3, a5, b5, a7, b7, a9, b9
+            in zip(samples[0::2], odd[5:], odd[4:], odd[6:], odd[3:], odd[7:], odd[2:], odd[8:], odd[1:],
+                   odd[9:], odd[0:])]
+
+# ------------------------
+# Plans
+# ------------------------
+class FrontEnd(NamedTuple):
+    """Decimation and filters for one carrier set at one sample rate."""
+
+    factor: int
+    rate: float
+    highpass: Biquad
+    coeffs: Tuple[float, ...]
+    gains: Tuple[float, ...]
+
+    def apply(self, samples: Sequence[float]) -> List[float]:
+        """Band-limited samples at :attr:`rate`."""
+        factor = 1
+        while factor < self.factor:
+            samples = halfband_decimate(samples)
+            factor *= 2
+        return biquad(samples, *self.highpass)
+
+def decimation_factor(sr: int, lo: float, hi: float, sym_len: int) -> int:
+    """Largest power of two the band ``lo..hi`` can be decimated by without aliasing."""
+    factor, rate = 1, float(sr)
+    while (sym_len // (2 * factor) >= MIN_WINDOW_SAMPLES
+           and halfband_rejection(rate, lo, hi) >= ALIAS_REJECTION_DB):
+        factor, rate = factor * 2, rate / 2.0
+    return factor
+
+@functools.lru_cache(maxsize=64)
+def front_end(freqs: Tuple[float, ...], sr: int, sym_len: int) -> Optional[FrontEnd]:
+    """Front end for ``freqs`` in ``sym_len``-sample symbols at ``sr``.
+
+    ``None`` when no half-band stage keeps aliases far enough below the
+    carriers (or their one-baud sidebands), in which case detection runs
+    on the raw samples.
+    """
+    baud = sr / sym_len
+    factor = decimation_factor(sr, min(freqs) - baud, max(freqs) + baud, sym_len)
+    if factor < 2:
+        return None
+    rate = sr / factor
+    highpass = rbj("high", rate, HIGHPASS_RATIO * min(freqs))
+    coeffs = tuple(2.0 * math.cos(2.0 * math.pi * f / rate) for f in freqs)
+    gains = []
+    for f in freqs:
+        gain, stage_rate = biquad_gain(highpass, f, rate), float(sr)
+        while stage_rate > rate:
+            gain *= halfband_gain(f, stage_rate)
+            stage_rate /= 2.0
+        gains.append(1.0 / gain ** 2)
+    return FrontEnd(factor, rate, highpass, coeffs, tuple(gains))
@@ -0,0 +1,178 @@
+"""SQLite history of encodes, used for dedupe, named encoder presets, and the dir-mode stat cache."""
+
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Seconds a connection waits for another process's write lock before "database is locked"
+DB_TIMEOUT_S = 30.0
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """Connection that tolerates other processes using the same DB.
+
+    ghostFace batch workers and ``ghostlink watch`` workers encode in
+    parallel; WAL lets their reads run alongside a write, and the timeout
+    makes concurrent writers wait their turn instead of failing.
+    """
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT_S)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+# ------------------------
+# SQLite logging & dedupe
+# ------------------------
+def db_init(db_path: str) -> None:
+    conn = _connect(db_path)
+    try:
+        conn.execute("""
+        CREATE TABLE IF NOT EXISTS encodes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts_utc INTEGER NOT NULL,
+            mode TEXT NOT NULL,
+            input_ref TEXT NOT NULL,
+            framed_sha256 TEXT NOT NULL UNIQUE,
+            bytes_len INTEGER NOT NULL,
+            samplerate INTEGER NOT NULL,
+            baud REAL NOT NULL,
+            amp REAL NOT NULL,
+            dense INTEGER NOT NULL,
+            mix_profile TEXT NOT NULL,
+            freqs TEXT NOT NULL,
+            wav_path TEXT NOT NULL,
+            crc32_hex TEXT NOT NULL
+        );
+        """)
+        conn.commit()
+    finally:
+        conn.close()
+
+def db_has_hash(db_path: str, h: str) -> Tuple[bool, str]:
+    conn = _connect(db_path)
+    try:
+        cur = conn.execute("SELECT wav_path FROM encodes WHERE framed_sha256 = ?", (h,))
+        row = cur.fetchone()
+        if row:
+            return True, row[0]
+        return False, ""
+    finally:
+        conn.close()
+
+def db_insert(db_path: str, mode: str, input_ref: str, h: str, bytes_len: int,
+              samplerate: int, baud: float, amp: float, dense: bool, mix_profile: str,
+              freqs: List[float], wav_path: str, crc_hex: str) -> None:
+    conn = _connect(db_path)
+    try:
+        conn.execute("""
+        INSERT INTO encodes
+        (ts_utc, mode, input_ref, framed_sha256, bytes_len, samplerate, baud, amp, dense, mix_profile, freqs, wav_path, crc32_hex)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            int(time.time()), mode, input_ref, h, bytes_len, samplerate, float(baud),
+            float(amp), 1 if dense else 0, mix_profile,
+            ",".join(f"{x:.2f}" for x in freqs),
+            os.path.abspath(wav_path), crc_hex
+        ))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def db_remove_hash(db_path: str, h: str) -> None:
+    conn = _connect(db_path)
+    try:
+        conn.execute("DELETE FROM encodes WHERE framed_sha256 = ?", (h,))
+        conn.commit()
+    finally:
+        conn.close()
+
+# ------------------------
+# Presets
+# ------------------------
+def _presets_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS presets (
+        name TEXT PRIMARY KEY,
+        ts_utc INTEGER NOT NULL,
+        params TEXT NOT NULL
+    );
+    """)
+
+def db_save_preset(db_path: str, name: str, params: Dict[str, Any]) -> None:
+    """Store ``params`` under ``name``, replacing any preset of that name."""
+    conn = _connect(db_path)
+    try:
+        _presets_table(conn)
+        conn.execute("INSERT OR REPLACE INTO presets (name, ts_utc, params) VALUES (?, ?, ?)",
+                     (name, int(time.time()), json.dumps(params, sort_keys=True)))
+        conn.commit()
+    finally:
+        conn.close()
+
+def db_get_preset(db_path: str, name: str) -> Optional[Dict[str, Any]]:
+    conn = _connect(db_path)
+    try:
+        _presets_table(conn)
+        row = conn.execute("SELECT params FROM presets WHERE name = ?", (name,)).fetchone()
+        return json.loads(row[0]) if row else None
+    finally:
+        conn.close()
+
+def db_list_presets(db_path: str) -> List[str]:
+    conn = _connect(db_path)
+    try:
+        _presets_table(conn)
+        return [row[0] for row in conn.execute("SELECT name FROM presets ORDER BY name")]
+    finally:
+        conn.close()
+
+# ------------------------
+# Stat cache
+# ------------------------
+# One row per (input path, settings): the file's size and mtime when it was
+# last encoded and what that produced. Dir mode skips a file whose size and
+# mtime still match without opening it.
+StatEntry = Tuple[int, int, str, str, int, str]  # size, mtime_ns, framed_sha256, crc32_hex, frames, wav_path
+
+def _stat_cache_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS stat_cache (
+        path TEXT NOT NULL,
+        settings TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        framed_sha256 TEXT NOT NULL,
+        crc32_hex TEXT NOT NULL,
+        frames INTEGER NOT NULL,
+        wav_path TEXT NOT NULL,
+        PRIMARY KEY (path, settings)
+    );
+    """)
+
+def db_load_stat_cache(db_path: str, settings: str) -> Dict[str, StatEntry]:
+    """Every cached file encoded with ``settings``, keyed by absolute path."""
+    conn = _connect(db_path)
+    try:
+        _stat_cache_table(conn)
+        cur = conn.execute("""
+        SELECT path, size, mtime_ns, framed_sha256, crc32_hex, frames, wav_path
+        FROM stat_cache WHERE settings = ?
+        """, (settings,))
+        return {row[0]: tuple(row[1:]) for row in cur}
+    finally:
+        conn.close()
+
+def db_put_stats(db_path: str, settings: str, rows: Iterable[Tuple[str, StatEntry]]) -> None:
+    """Store ``(path, entry)`` rows for ``settings`` in one transaction."""
+    conn = _connect(db_path)
+    try:
+        _stat_cache_table(conn)
+        conn.executemany("""
+        INSERT OR REPLACE INTO stat_cache
+        (path, settings, size, mtime_ns, framed_sha256, crc32_hex, frames, wav_path)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, ((path, settings) + tuple(entry) for path, entry in rows))
+        conn.commit()
+    finally:
+        conn.close()
@@ -0,0 +1,173 @@
+"""Process-wide counters and stage-latency histograms for GhostLink.
+
+The encoder and decoder time each of their stages into a plain dict (which
+ends up on the returned result) and then record the totals here, so the CLI
+and GhostFace report the same numbers. :meth:`Metrics.render_prometheus`
+produces the Prometheus text exposition format.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "ghostlink_stage_seconds": "Time spent in each encode/decode stage.",
+    "ghostlink_encodes_total": "Encodes by outcome (created, skipped, failed).",
+    "ghostlink_decodes_total": "Decodes by outcome (ok, failed).",
+    "ghostlink_dedupe_total": "History DB dedupe lookups (hit, miss).",
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _fmt_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.gauges: Dict[Tuple[str, Labels], float] = {}
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[Tuple[str, Labels], List[float]] = {}
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1.0) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        with self._lock:
+            self.gauges[(name, _labels(labels))] = value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = [0.0] * (len(BUCKETS) + 2)
+            for i, bound in enumerate(BUCKETS):
+                if value <= bound:
+                    hist[i] += 1
+            hist[len(BUCKETS)] += 1
+            hist[len(BUCKETS) + 1] += value
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    # -- cross-process aggregation ------------------------------------
+
+    def snapshot(self) -> Dict[str, List[Any]]:
+        """JSON-serialisable copy of every series."""
+        with self._lock:
+            return {
+                "counters": [[n, list(map(list, l)), v] for (n, l), v in self.counters.items()],
+                "gauges": [[n, list(map(list, l)), v] for (n, l), v in self.gauges.items()],
+                "histograms": [[n, list(map(list, l)), list(h)] for (n, l), h in self.histograms.items()],
+            }
+
+    def merge(self, snap: Dict[str, List[Any]]) -> None:
+        """Add another process's :meth:`snapshot` into this registry."""
+        with self._lock:
+            for name, labels, value in snap.get("counters", []):
+                key = (name, tuple(map(tuple, labels)))
+                self.counters[key] = self.counters.get(key, 0.0) + value
+            for name, labels, value in snap.get("gauges", []):
+                key = (name, tuple(map(tuple, labels)))
+                self.gauges[key] = self.gauges.get(key, 0.0) + value
+            for name, labels, values in snap.get("histograms", []):
+                key = (name, tuple(map(tuple, labels)))
+                hist = self.histograms.setdefault(key, [0.0] * (len(BUCKETS) + 2))
+                for i, v in enumerate(values):
+                    hist[i] += v
+
+    # -- exposition -----------------------------------------------------
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+            histograms = {k: list(v) for k, v in self.histograms.items()}
+        out: List[str] = []
+
+        def header(name: str, kind: str) -> None:
+            if name in HELP:
+                out.append(f"# HELP {name} {HELP[name]}")
+            out.append(f"# TYPE {name} {kind}")
+
+        for kind, series in (("counter", counters), ("gauge", gauges)):
+            for name in sorted({n for n, _ in series}):
+                header(name, kind)
+                for (n, labels), value in sorted(series.items()):
+                    if n == name:
+                        out.append(f"{name}{_fmt_labels(labels)} {value:g}")
+        for name in sorted({n for n, _ in histograms}):
+            header(name, "histogram")
+            for (n, labels), hist in sorted(histograms.items()):
+                if n != name:
+                    continue
+                for bound, count in zip(BUCKETS, hist):
+                    out.append(f"{name}_bucket{_fmt_labels(labels, ('le', f'{bound:g}'))} {count:g}")
+                out.append(f"{name}_bucket{_fmt_labels(labels, ('le', '+Inf'))} {hist[len(BUCKETS)]:g}")
+                out.append(f"{name}_sum{_fmt_labels(labels)} {hist[len(BUCKETS) + 1]:.6f}")
+                out.append(f"{name}_count{_fmt_labels(labels)} {hist[len(BUCKETS)]:g}")
+        return "\n".join(out) + "\n"
+
+
+# Registry shared by everything in this process
+METRICS = Metrics()
+
+
+@contextmanager
+def timed(timings: Dict[str, float], stage: str) -> Iterator[None]:
+    """Add the wall time of the block to ``timings[stage]``."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def record_timings(op: str, timings: Dict[str, float]) -> None:
+    """Record one operation's per-stage timings into :data:`METRICS`."""
+    for stage, seconds in timings.items():
+        METRICS.observe("ghostlink_stage_seconds", seconds, {"op": op, "stage": stage})
+
+
+def call_with_metrics(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, Dict[str, List[Any]]]:
+    """Run ``fn`` and return ``(value, metrics snapshot)``.
+
+    For worker processes: the caller merges the snapshot into its own
+    registry so work done in a pool is not lost. Exceptions propagate with
+    the snapshot attached as their ``metrics`` attribute; a ``SystemExit``
+    from CLI validation is raised as a ``RuntimeError`` so it cannot take
+    the caller down with it.
+    """
+    METRICS.reset()
+    try:
+        value = fn(*args, **kwargs)
+    except Exception as e:
+        e.metrics = METRICS.snapshot()
+        raise
+    except SystemExit as e:
+        err = RuntimeError(f"exited with status {e.code}")
+        err.metrics = METRICS.snapshot()
+        raise err from None
+    return value, METRICS.snapshot()
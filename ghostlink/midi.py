@@ -0,0 +1,82 @@
+"""Minimal Standard MIDI File writer for the companion ``.mid`` output.
+
+Writes the same bytes ``mido`` produced for the encoder's single-track
+file (format 1, 480 ticks per beat, 1 s per beat, one note per symbol)
+without building a message object per note.
+"""
+
+import functools
+import math
+import struct
+from itertools import groupby
+from typing import List, Sequence, Tuple
+
+TICKS_PER_BEAT = 480
+TEMPO_US = 1_000_000  # one beat per second
+VELOCITY = 64
+
+_TEMPO_EVENT = b"\x00\xff\x51\x03" + TEMPO_US.to_bytes(3, "big")
+_END_OF_TRACK = b"\x00\xff\x2f\x00"
+
+
+def vlq(value: int) -> bytes:
+    """MIDI variable-length quantity encoding of a non-negative int."""
+    if value < 0:
+        raise ValueError("delta time must be non-negative")
+    out = [value & 0x7F]
+    value >>= 7
+    while value:
+        out.append(0x80 | (value & 0x7F))
+        value >>= 7
+    return bytes(reversed(out))
+
+
+def freq_to_note(freq: float) -> int:
+    """Nearest MIDI note number for ``freq`` (A4 = 440 Hz = 69)."""
+    return max(0, min(127, int(round(69 + 12 * math.log2(freq / 440.0)))))
+
+
+@functools.lru_cache(maxsize=32)
+def carrier_notes(freqs: Tuple[float, ...]) -> Tuple[int, ...]:
+    """Note number for each carrier of a frequency profile, indexed by symbol."""
+    return tuple(freq_to_note(f) for f in freqs)
+
+
+def note_ticks(baud: float) -> int:
+    """Length of one symbol in ticks at the fixed tempo."""
+    return max(1, round(TICKS_PER_BEAT / baud))
+
+
+def _note_event(note: int, delta: bytes) -> bytes:
+    data = bytes((note, VELOCITY))
+    return b"\x00\x90" + data + delta + b"\x80" + data
+
+
+def track_events(notes: Sequence[int], dur_ticks: int, merge_repeats: bool = False) -> bytes:
+    """Serialized note on/off pairs, one per note (or per run if merging).
+
+    Note-on and note-off alternate, so running status never applies and
+    every event carries its status byte.
+    """
+    if merge_repeats:
+        return b"".join(_note_event(note, vlq(dur_ticks * len(list(run)))) for note, run in groupby(notes))
+    events = {note: _note_event(note, vlq(dur_ticks)) for note in set(notes)}
+    return b"".join(map(events.__getitem__, notes))
+
+
+def smf_bytes(notes: Sequence[int], baud: float, merge_repeats: bool = False) -> bytes:
+    """Complete format-1 SMF with one track holding ``notes`` back to back."""
+    track = _TEMPO_EVENT + track_events(notes, note_ticks(baud), merge_repeats) + _END_OF_TRACK
+    header = b"MThd" + struct.pack(">IHHH", 6, 1, 1, TICKS_PER_BEAT)
+    return header + b"MTrk" + struct.pack(">I", len(track)) + track
+
+
+def symbol_notes(symbols: Sequence[int], freqs: Sequence[float], repeats: int = 1) -> List[int]:
+    """Note sequence for a symbol stream played ``repeats`` times."""
+    table = carrier_notes(tuple(freqs))
+    return [table[s] for s in symbols] * max(1, repeats)
+
+
+def write_midi(path: str, notes: Sequence[int], baud: float, merge_repeats: bool = False) -> None:
+    with open(path, "wb") as fh:
+        fh.write(smf_bytes(notes, baud, merge_repeats))
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+GhostLink mix: overlay an encoded payload onto a host music track.
+
+The host WAV is streamed chunk by chunk and the payload is synthesised
+alongside it, so memory stays constant however long the master is. The
+signal is placed at ``--offset`` seconds and, with ``--every``, inserted
+again at that interval for as long as whole copies fit. Its level is set
+relative to the host's RMS (measured in a first, equally streaming pass).
+Where the sum would pass ``--ceiling`` a limiter turns the mix down
+within the copy. Host audio outside the inserted copies is copied byte for
+byte, so results do not depend on the chunk size.
+
+The output has the host's sample rate, sample width and channel count;
+the signal is added to every channel.
+
+Examples:
+  ghostlink mix track.wav mixed.wav --message "trust_no_one"
+  ghostlink mix master.wav out.wav --file lyrics.txt --level -30 --offset 12 --every 60
+  python -m ghostlink.mix track.wav mixed.wav --message "hi" --preset radio --ceiling -0.3
+"""
+
+import argparse
+import array
+import logging
+import math
+import sys
+import wave
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator, List, Optional
+
+from .__main__ import add_signal_options, resolve_mode_flags, setup_logging, signal_kwargs
+from .encoder import Encoder, iter_pcm
+from .presets import parse_with_preset
+
+# Host frames read, mixed and written at a time
+MIX_CHUNK_FRAMES = 65536
+
+# Limiter gain recovers towards unity with this time constant
+LIMITER_RELEASE_MS = 50.0
+
+# Full-scale value of one sample, in the units the encoder writes, by byte width
+_FULL_SCALE = {2: 32767.0, 3: 8388607.0, 4: 1.0}
+_INT_RANGE = {2: (-32768, 32767), 3: (-8388608, 8388607)}
+
+
+@dataclass
+class MixResult:
+    """What :func:`mix_wav` wrote."""
+
+    out_path: str
+    samplerate: int
+    channels: int
+    host_s: float
+    signal_s: float
+    amp: float
+    inserts_s: List[float] = field(default_factory=list)
+    limited: int = 0
+    max_reduction_db: float = 0.0
+
+# ------------------------
+# PCM conversion
+# ------------------------
+def _unpack(raw: bytes, width: int) -> List[float]:
+    """Samples of ``raw`` in full-scale units (integers for 16/24-bit)."""
+    if width == 2:
+        return array.array("h", raw).tolist()
+    if width == 4:
+        return array.array("f", raw).tolist()
+    # 24-bit: widen to the top three bytes of an int32, then shift back down
+    n = len(raw) // 3
+    wide = bytearray(4 * n)
+    wide[1::4], wide[2::4], wide[3::4] = raw[0::3], raw[1::3], raw[2::3]
+    return [v >> 8 for v in array.array("i", bytes(wide))]
+
+def _pack(samples: List[float], width: int) -> bytes:
+    if width == 4:
+        return array.array("f", samples).tobytes()
+    lo, hi = _INT_RANGE[width]
+    ints = [max(lo, min(hi, int(round(x)))) for x in samples]
+    if width == 2:
+        return array.array("h", ints).tobytes()
+    wide = array.array("i", [v << 8 for v in ints]).tobytes()
+    out = bytearray(3 * len(ints))
+    out[0::3], out[1::3], out[2::3] = wide[1::4], wide[2::4], wide[3::4]
+    return bytes(out)
+
+def host_rms(path: str, chunk_frames: int = MIX_CHUNK_FRAMES) -> float:
+    """RMS of every channel of ``path`` relative to full scale, read in chunks."""
+    total = 0.0
+    count = 0
+    with wave.open(path, "rb") as wf:
+        width = wf.getsampwidth()
+        scale = _FULL_SCALE[width]
+        while True:
+            raw = wf.readframes(chunk_frames)
+            if not raw:
+                break
+            samples = _unpack(raw, width)
+            total += math.fsum(x * x for x in samples)
+            count += len(samples)
+    return math.sqrt(total / count) / scale if count else 0.0
+
+# ------------------------
+# Overlay
+# ------------------------
+@dataclass
+class Span:
+    """Signal for frames ``at`` .. ``at + len(samples)`` of a chunk."""
+
+    at: int
+    samples: List[float]
+    starts_copy: bool
+
+
+class Overlay:
+    """Mono signal samples on the host's timeline, read front to back.
+
+    ``render`` returns a fresh iterator of 32-bit float PCM for one copy of
+    ``length`` frames; a copy starts at every frame in ``starts``. Only the
+    chunk being mixed is held in memory.
+    """
+
+    def __init__(self, render: Callable[[], Iterator[bytes]], length: int, starts: List[int]) -> None:
+        self.render = render
+        self.length = length
+        self.starts = sorted(starts)
+        self.pos = 0
+        self._next = 0
+        self._chunks: Optional[Iterator[bytes]] = None
+        self._left = 0
+        self._buf = array.array("f")
+
+    def read(self, n: int) -> List[Span]:
+        """Spans of signal within the next ``n`` frames (none if no copy overlaps them)."""
+        spans = []
+        end = self.pos + n
+        while self.pos < end:
+            first = self._chunks is None
+            if first:
+                if self._next >= len(self.starts) or self.starts[self._next] >= end:
+                    break
+                self.pos = max(self.pos, self.starts[self._next])
+                self._chunks = self.render()
+                self._left = self.length
+                self._buf = array.array("f")
+            take = min(end - self.pos, self._left)
+            while len(self._buf) < take:
+                self._buf.frombytes(next(self._chunks))
+            spans.append(Span(self.pos - (end - n), self._buf[:take].tolist(), first))
+            del self._buf[:take]
+            self.pos += take
+            self._left -= take
+            if self._left == 0:
+                self._chunks = None
+                self._next += 1
+        self.pos = end
+        return spans
+
+
+class Limiter:
+    """Instant-attack peak limiter; the gain recovers over ``release_ms``.
+
+    Gain is set per frame from the loudest channel, so the stereo image
+    does not shift. State carries over between calls.
+    """
+
+    def __init__(self, ceiling: float, sr: int, release_ms: float = LIMITER_RELEASE_MS) -> None:
+        self.ceiling = ceiling
+        self.release = math.exp(-1000.0 / (release_ms * sr))
+        self.gain = 1.0
+        self.limited = 0
+        self.min_gain = 1.0
+
+    def reset(self) -> None:
+        self.gain = 1.0
+
+    def process(self, frames: List[float], channels: int, start: int = 0, stop: Optional[int] = None) -> None:
+        """Limit interleaved ``frames`` (frame indices ``start`` to ``stop``) in place."""
+        ceiling = self.ceiling
+        release = self.release
+        gain = self.gain
+        stop = len(frames) // channels if stop is None else stop
+        lanes = [frames[start * channels + c:stop * channels:channels] for c in range(channels)]
+        peaks = [max(map(abs, xs)) for xs in zip(*lanes)] if channels > 1 else list(map(abs, lanes[0]))
+        for j, peak in enumerate(peaks):
+            if gain == 1.0 and peak <= ceiling:
+                continue  # the common case: nothing to do
+            gain = 1.0 - (1.0 - gain) * release
+            if peak * gain > ceiling:
+                gain = ceiling / peak
+                self.limited += 1
+                self.min_gain = min(self.min_gain, gain)
+            if gain > 1.0 - 1e-9:
+                gain = 1.0
+            i = (start + j) * channels
+            for c in range(i, i + channels):
+                frames[c] *= gain
+        self.gain = gain
+
+# ------------------------
+# Mix
+# ------------------------
+def mix_wav(host_path: str, out_path: str, user_bytes: bytes, level_db: float = -24.0,
+            offset_s: float = 0.0, every_s: float = 0.0, ceiling_db: float = -1.0, limit: bool = True,
+            chunk_frames: int = MIX_CHUNK_FRAMES, **settings: Any) -> MixResult:
+    """Write ``host_path`` with ``user_bytes`` mixed in to ``out_path``.
+
+    The signal's RMS sits ``level_db`` relative to the host's RMS. The first
+    copy starts at ``offset_s``; with ``every_s`` > 0 further copies start
+    every ``every_s`` seconds while a whole copy still fits. ``settings``
+    are :class:`~ghostlink.encoder.Encoder` options; the sample rate, bit
+    depth and channels always come from the host. ``ValueError`` for
+    settings the encoder rejects or copies that would overlap or not fit.
+    """
+    with wave.open(host_path, "rb") as wf:
+        sr, channels, width, n_host = wf.getframerate(), wf.getnchannels(), wf.getsampwidth(), wf.getnframes()
+    if width not in _FULL_SCALE:
+        raise ValueError(f"unsupported host sample width: {width} bytes (16/24/32-bit only)")
+    if offset_s < 0 or every_s < 0:
+        raise ValueError("offset and interval must be >= 0")
+
+    rms = host_rms(host_path, chunk_frames)
+    if rms <= 0.0:
+        raise ValueError("host track is silent; there is no level to mix relative to")
+    # A sine's RMS is amp / sqrt(2)
+    amp = min(1.0, rms * 10 ** (level_db / 20.0) * math.sqrt(2.0))
+    enc = Encoder(samplerate=sr, amp=amp, bit_depth=32, channels=1, **settings)
+    symbols = enc.symbols(user_bytes)
+    length = enc.frame_count(user_bytes)
+
+    first = int(round(offset_s * sr))
+    step = int(round(every_s * sr))
+    if step and step < length:
+        raise ValueError(f"--every must be at least the signal length ({length / sr:.2f}s)")
+    starts = []
+    while first + length <= n_host and (step or not starts):
+        starts.append(first)
+        if not step:
+            break
+        first += step
+    if not starts:
+        raise ValueError(f"the signal ({length / sr:.2f}s) does not fit in the host after the offset "
+                         f"({n_host / sr:.2f}s)")
+
+    def render() -> Iterator[bytes]:
+        return iter_pcm(symbols, enc.freqs, sr, enc.baud, amp, enc.preamble_s, enc.gap_ms, enc.ramp_ms,
+                        enc.repeats, bit_depth=32)
+
+    overlay = Overlay(render, length, starts)
+    scale = _FULL_SCALE[width]
+    limiter = Limiter(10 ** (ceiling_db / 20.0) * scale, sr) if limit else None
+    with wave.open(host_path, "rb") as src, wave.open(out_path, "wb") as dst:
+        dst.setnchannels(channels)
+        dst.setsampwidth(width)
+        dst.setframerate(sr)
+        while True:
+            raw = src.readframes(chunk_frames)
+            if not raw:
+                break
+            spans = overlay.read(len(raw) // (channels * width))
+            if not spans:
+                # Nothing to add: pass the host through untouched
+                dst.writeframes(raw)
+                continue
+            frames = _unpack(raw, width)
+            for span in spans:
+                signal = [x * scale for x in span.samples]
+                stop = (span.at + len(signal)) * channels
+                for c in range(channels):
+                    lane = slice(span.at * channels + c, stop, channels)
+                    frames[lane] = [x + y for x, y in zip(frames[lane], signal)]
+                if limiter is not None:
+                    if span.starts_copy:
+                        limiter.reset()
+                    limiter.process(frames, channels, span.at, span.at + len(span.samples))
+            dst.writeframes(_pack(frames, width))
+
+    result = MixResult(out_path=out_path, samplerate=sr, channels=channels, host_s=n_host / sr,
+                       signal_s=length / sr, amp=amp, inserts_s=[s / sr for s in starts])
+    if limiter is not None:
+        result.limited = limiter.limited
+        result.max_reduction_db = -20.0 * math.log10(limiter.min_gain)
+    return result
+
+# ------------------------
+# CLI
+# ------------------------
+DESCRIPTION = "Mix an encoded message into a host WAV, streaming, at a level relative to the host."
+
+def add_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("host", help="Host WAV (16/24/32-bit, mono or stereo).")
+    p.add_argument("out", help="Output WAV (same format as the host).")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--message", help="Text to embed.")
+    src.add_argument("--file", help="UTF-8 file to embed.")
+    # Placement
+    p.add_argument("--level", type=float, default=-24.0, help="Signal RMS relative to the host RMS (dB).")
+    p.add_argument("--offset", type=float, default=0.0, help="Seconds into the host where the first copy starts.")
+    p.add_argument("--every", type=float, default=0.0,
+                   help="Start another copy every N seconds while whole copies fit (0 = once).")
+    p.add_argument("--ceiling", type=float, default=-1.0, help="Limiter ceiling (dBFS).")
+    p.add_argument("--no-limit", action="store_true", help="Do not limit; samples over full scale are clipped.")
+    add_signal_options(p)
+
+def check_args(p: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    resolve_mode_flags(args)
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="ghostlink mix", description=DESCRIPTION,
+                                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    add_arguments(p)
+    args = parse_with_preset(p, argv)
+    check_args(p, args)
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return main_with_args(parse_args(argv))
+
+def main_with_args(args: argparse.Namespace) -> int:
+    setup_logging(args.verbose)
+    if args.file:
+        with open(args.file, "rb") as fh:
+            message = fh.read()
+    else:
+        message = args.message.encode("utf-8")
+    settings = signal_kwargs(args)
+    try:
+        res = mix_wav(args.host, args.out, message, level_db=args.level, offset_s=args.offset,
+                      every_s=args.every, ceiling_db=args.ceiling, limit=not args.no_limit, **settings)
+    except (ValueError, OSError, wave.Error) as e:
+        logging.error(f"[x] {e}")
+        return 2
+    logging.info(f"[i] Mixed {len(res.inserts_s)} cop{'y' if len(res.inserts_s) == 1 else 'ies'} "
+                 f"({res.signal_s:.1f}s each, amp={res.amp:.4f}) at "
+                 f"{', '.join(f'{t:.1f}s' for t in res.inserts_s)} into {res.host_s:.1f}s of host")
+    if res.limited:
+        logging.warning(f"[!] Limited {res.limited} frames (up to {res.max_reduction_db:.1f} dB); "
+                        "lower --level if this is audible.")
+    logging.info(f"[i] Wrote {res.out_path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""Named encoder settings, as saved by ``ghostlink tune --save``.
+
+A preset maps CLI option names (argparse ``dest``) to values and lives in
+the history DB. ``--preset NAME`` on the encoder and decoder CLIs turns
+the preset into parser defaults, so options given explicitly still win.
+"""
+
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from .constants import HISTORY_DB
+from .history import db_get_preset, db_list_presets, db_save_preset
+
+if TYPE_CHECKING:
+    import argparse
+
+# Options a preset may set; everything else is ignored on load
+PRESET_KEYS = ("samplerate", "baud", "sparse", "carriers", "mix_profile", "preamble", "interleave",
+               "repeats", "fec")
+
+
+def save_preset(name: str, params: Dict[str, Any], db_path: Optional[str] = None) -> None:
+    if not name:
+        raise ValueError("preset name must not be empty")
+    unknown = sorted(set(params) - set(PRESET_KEYS))
+    if unknown:
+        raise ValueError(f"unknown preset keys: {', '.join(unknown)}")
+    db_save_preset(db_path or os.path.abspath(HISTORY_DB), name, params)
+
+
+def load_preset(name: str, db_path: Optional[str] = None) -> Dict[str, Any]:
+    """Settings saved under ``name``; ``ValueError`` if there is none."""
+    db_path = db_path or os.path.abspath(HISTORY_DB)
+    params = db_get_preset(db_path, name)
+    if params is None:
+        known = db_list_presets(db_path)
+        hint = f" (saved: {', '.join(known)})" if known else ""
+        raise ValueError(f"no preset named {name!r}{hint}")
+    return {k: v for k, v in params.items() if k in PRESET_KEYS}
+
+
+def list_presets(db_path: Optional[str] = None) -> List[str]:
+    return db_list_presets(db_path or os.path.abspath(HISTORY_DB))
+
+
+def _option_parsers(parser: "argparse.ArgumentParser") -> List["argparse.ArgumentParser"]:
+    """``parser`` and, recursively, the parsers of its subcommands."""
+    import argparse
+    parsers = [parser]
+    for action in parser._actions:
+        if isinstance(action, argparse._SubParsersAction):
+            for sub in action.choices.values():
+                parsers.extend(_option_parsers(sub))
+    return parsers
+
+
+def parse_with_preset(parser: "argparse.ArgumentParser", argv: Optional[List[str]] = None) -> "argparse.Namespace":
+    """Parse ``argv``, using the ``--preset`` named on it (if any) as defaults.
+
+    Each (sub)parser only takes the preset keys it has options for, so a
+    decoder never picks up ``samplerate`` or ``fec`` from an encoder preset.
+    """
+    known, _ = parser.parse_known_args(argv)
+    name = getattr(known, "preset", None)
+    if name:
+        try:
+            params = load_preset(name)
+        except ValueError as e:
+            parser.error(str(e))
+        for p in _option_parsers(parser):
+            dests = {action.dest for action in p._actions}
+            p.set_defaults(**{k: v for k, v in params.items() if k in dests})
+    args = parser.parse_args(argv)
+    if name and getattr(args, "dense", False) and getattr(args, "sparse", False):
+        args.sparse = False  # an explicit --dense beats a sparse preset
+    return args
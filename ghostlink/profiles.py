@@ -1,6 +1,15 @@
 """Shared frequency profiles for Gibberlink encoder/decoder."""
 
-from typing import List
+from typing import List, Optional
+
+# Symbol alphabets the modem supports (carriers per profile)
+FSK_ORDERS = (4, 8, 16, 32)
+
+# Lowest and highest carrier of each mix profile's codec-safe band
+PROFILE_BANDS = {"streaming": (1500.0, 5000.0), "studio": (1800.0, 6000.0)}
+
+# Shortest preamble tone, whatever the carrier count
+PREAMBLE_MIN_TONE_S = 0.05
 
 
 def freq_profile(dense: bool, profile: str) -> List[float]:
@@ -43,3 +52,47 @@ def freq_profile(dense: bool, profile: str) -> List[float]:
         4500.0,
         5700.0,
     ]
+
+
+def fsk_order(dense: bool, order: Optional[int] = None) -> int:
+    """Carrier count: ``order`` if given, else 8 (dense) or 4 (sparse)."""
+    if not order:
+        return 8 if dense else 4
+    if order not in FSK_ORDERS:
+        raise ValueError(f"order must be one of {', '.join(map(str, FSK_ORDERS))}")
+    return order
+
+
+def max_baud(order: int, profile: str) -> float:
+    """Highest baud at which ``order`` orthogonal carriers fit the profile band."""
+    lo, hi = PROFILE_BANDS[profile]
+    return (hi - lo) / (order - 1)
+
+
+def carrier_freqs(order: int, profile: str, baud: float) -> List[float]:
+    """Carrier frequencies for ``order``-FSK at ``baud``.
+
+    4 and 8 carriers are the fixed Gibberlink sets of :func:`freq_profile`.
+    16 and 32 carriers start at the bottom of the profile band and are
+    spaced by the largest whole multiple of ``baud`` that fits, so any two
+    carriers differ by a whole number of cycles per symbol and stay
+    orthogonal to the detector.
+    """
+    if order in (4, 8):
+        return freq_profile(order == 8, profile)
+    order = fsk_order(True, order)
+    if profile not in PROFILE_BANDS:
+        raise ValueError("mix-profile must be 'streaming' or 'studio'")
+    steps = int(max_baud(order, profile) // baud)
+    if steps < 1:
+        raise ValueError(f"{order}-FSK needs baud <= {max_baud(order, profile):.0f} on the {profile} profile")
+    lo = PROFILE_BANDS[profile][0]
+    return [lo + i * steps * baud for i in range(order)]
+
+
+def preamble_samples(n_freqs: int, preamble_s: float, sr: int) -> int:
+    """Samples in the encoder's preamble: one tone per carrier."""
+    if preamble_s <= 0.0:
+        return 0
+    per = max(PREAMBLE_MIN_TONE_S, preamble_s / n_freqs)
+    return n_freqs * max(1, int(round(per * sr)))
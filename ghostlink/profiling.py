@@ -0,0 +1,67 @@
+"""Named timing spans with pluggable listeners.
+
+Code under measurement wraps its steps in ``with span("name"):``. With no
+listener registered :func:`span` returns a shared no-op context manager,
+so the instrumentation can stay in place in production. Listeners are
+registered for the current thread/context with :func:`listen` and are
+called as ``listener(name, seconds)`` when each span ends.
+"""
+
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, ContextManager, Dict, Iterator, Tuple
+
+SpanListener = Callable[[str, float], None]
+
+_LISTENERS: ContextVar[Tuple[SpanListener, ...]] = ContextVar("ghostlink_span_listeners", default=())
+_NULL_SPAN = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "listeners", "t0")
+
+    def __init__(self, name: str, listeners: Tuple[SpanListener, ...]) -> None:
+        self.name = name
+        self.listeners = listeners
+
+    def __enter__(self) -> None:
+        self.t0 = time.perf_counter()
+
+    def __exit__(self, *exc: Any) -> None:
+        elapsed = time.perf_counter() - self.t0
+        for listener in self.listeners:
+            listener(self.name, elapsed)
+
+
+def span(name: str) -> ContextManager[None]:
+    """Time the enclosed block as ``name`` if anyone is listening."""
+    listeners = _LISTENERS.get()
+    if not listeners:
+        return _NULL_SPAN
+    return _Span(name, listeners)
+
+
+@contextmanager
+def listen(listener: SpanListener) -> Iterator[SpanListener]:
+    """Deliver every span ended inside the block to ``listener``."""
+    token = _LISTENERS.set(_LISTENERS.get() + (listener,))
+    try:
+        yield listener
+    finally:
+        _LISTENERS.reset(token)
+
+
+class SpanRecorder:
+    """Listener that totals calls and seconds per span name."""
+
+    def __init__(self) -> None:
+        self.spans: Dict[str, Dict[str, float]] = {}
+
+    def __call__(self, name: str, seconds: float) -> None:
+        entry = self.spans.setdefault(name, {"calls": 0, "seconds": 0.0})
+        entry["calls"] += 1
+        entry["seconds"] += seconds
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        return {name: dict(entry) for name, entry in self.spans.items()}
@@ -0,0 +1,60 @@
+"""Result objects returned by the GhostLink encoder and decoder."""
+
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class EncodeResult:
+    """Outcome of encoding one input.
+
+    All paths are exact, so callers never need to scan the output
+    directory to find what an encode produced. ``spans`` holds the calls
+    and seconds per encoder step when the encode was profiled.
+    """
+
+    input_ref: str
+    wav_path: str = ""
+    midi_path: Optional[str] = None
+    variants: Dict[str, str] = field(default_factory=dict)
+    sha256: str = ""
+    crc32_hex: str = ""
+    skipped: bool = False
+    frames: int = 1
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    spans: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+@dataclass
+class DecodeResult:
+    """Outcome of decoding one input.
+
+    ``repeat`` is the 1-based repeat whose CRC passed; ``symbols`` is
+    the number of symbols detected before decoding stopped. For multi-frame
+    messages ``frames`` is the frame count and ``missing`` lists the
+    sequence numbers still needed (``repeat`` stays ``None``).
+    """
+
+    payload: Optional[bytes] = None
+    crc_ok: bool = False
+    repeat: Optional[int] = None
+    symbols: int = 0
+    frames: int = 0
+    missing: List[int] = field(default_factory=list)
+    error: Optional[str] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.crc_ok
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
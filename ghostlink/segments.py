@@ -0,0 +1,139 @@
+"""Multi-frame transmissions for payloads larger than one frame.
+
+A message whose compressed body exceeds ``frame_size`` bytes is split into
+v3 segment frames (see :mod:`ghostlink.frame`): every frame carries the
+message's CRC32 as its id, a sequence number, the frame count and its own
+CRC, and all frames of a message have the same length on air. Each frame
+is FEC-coded and interleaved on its own, so a decoder can validate frames
+one at a time, in any order and in parallel, and a damaged frame costs
+only that frame. :class:`FrameAssembler` collects frames (across repeats
+or separate resends) until the message is complete.
+"""
+
+import binascii
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from .fec import encoded_bits
+from .frame import (
+    CODEC_NAMES,
+    SEGMENT_HEADER_LEN,
+    V2_HEADER_LEN,
+    V2_OVERHEAD,
+    best_codec,
+    build_frame,
+    build_v3,
+    codec_applies,
+    compress,
+    decompress,
+    parse_segment,
+)
+from .profiles import FSK_ORDERS
+
+DEFAULT_FRAME_SIZE = 256
+MAX_FRAMES = 0xFFFF
+
+
+def bits_per_symbol(order: int) -> int:
+    if order not in FSK_ORDERS:
+        raise ValueError(f"order must be one of {', '.join(map(str, FSK_ORDERS))}")
+    return order.bit_length() - 1
+
+
+def segment_frame_len(frame_size: int) -> int:
+    """Bytes in one v3 frame carrying ``frame_size`` bytes of message."""
+    return V2_OVERHEAD + SEGMENT_HEADER_LEN + frame_size
+
+
+def frame_bit_count(frame_len: int, fec: str, interleave_depth: int) -> int:
+    """Coded, interleaved bits the encoder emits for one frame of ``frame_len`` bytes."""
+    if fec == "hamming74":
+        bits = frame_len * 14
+    else:
+        bits = V2_HEADER_LEN * 14 + encoded_bits(fec, frame_len - V2_HEADER_LEN)
+    if interleave_depth > 1:
+        bits = -(-bits // interleave_depth) * interleave_depth
+    return bits
+
+
+def frame_symbol_count(frame_len: int, fec: str, order: int, interleave_depth: int) -> int:
+    """FSK symbols the encoder emits for one frame of ``frame_len`` bytes."""
+    return -(-frame_bit_count(frame_len, fec, interleave_depth) // bits_per_symbol(order))
+
+
+def split_message(message: bytes, frame_size: int = DEFAULT_FRAME_SIZE, codec: str = "auto",
+                  fec: str = "hamming74") -> List[bytes]:
+    """Frames for ``message``: a single v1/v2 frame when its body fits in
+    ``frame_size`` (or segmentation is off), otherwise v3 segments."""
+    if frame_size <= 0 or codec == "v1":
+        return [build_frame(message, codec, fec)]
+    if codec == "auto":
+        chosen, body = best_codec(message)
+    else:
+        if not codec_applies(message, codec):
+            raise ValueError(f"{codec} codec cannot carry this payload")
+        chosen, body = codec, compress(message, codec)
+    if len(body) <= frame_size:
+        return [build_frame(message, codec, fec)]
+    total = -(-len(body) // frame_size)
+    if total > MAX_FRAMES:
+        raise ValueError("payload needs too many frames; raise the frame size")
+    msg_id = binascii.crc32(message) & 0xFFFFFFFF
+    return [build_v3(body[i * frame_size:(i + 1) * frame_size], frame_size, chosen, fec,
+                     len(message), msg_id, i, total)
+            for i in range(total)]
+
+
+def select_frames(frames: Sequence[bytes], seqs: Optional[Iterable[int]]) -> List[bytes]:
+    """The frames listed in ``seqs`` (all of them if ``None``), in order."""
+    if seqs is None:
+        return list(frames)
+    wanted = sorted(set(seqs))
+    bad = [s for s in wanted if not 0 <= s < len(frames)]
+    if bad:
+        raise ValueError(f"no such frame: {', '.join(map(str, bad))} (message has {len(frames)})")
+    return [frames[s] for s in wanted]
+
+
+class FrameAssembler:
+    """Collects the segment frames of one message.
+
+    Frames may arrive in any order and more than once (repeats, resends);
+    the first valid copy of each sequence number is kept.
+    """
+
+    def __init__(self) -> None:
+        self.msg_id: Optional[int] = None
+        self.total = 0
+        self.codec = 0
+        self.raw_len = 0
+        self.chunks: Dict[int, bytes] = {}
+
+    def add(self, frame: bytes) -> bool:
+        """Validate and store ``frame``; ``True`` if it was new."""
+        header, info, chunk = parse_segment(frame)
+        if self.msg_id is None:
+            self.msg_id, self.total = info.msg_id, info.total
+            self.codec, self.raw_len = header.codec, header.raw_len
+        elif (info.msg_id, info.total) != (self.msg_id, self.total):
+            raise ValueError("frame belongs to a different message")
+        if info.seq in self.chunks:
+            return False
+        self.chunks[info.seq] = chunk
+        return True
+
+    @property
+    def complete(self) -> bool:
+        return self.msg_id is not None and len(self.chunks) == self.total
+
+    def missing(self) -> List[int]:
+        return [s for s in range(self.total) if s not in self.chunks]
+
+    def message(self) -> bytes:
+        if not self.complete:
+            missing = self.missing()
+            raise ValueError(f"missing frames: {','.join(map(str, missing))}" if missing else "no frames")
+        body = b"".join(self.chunks[s] for s in range(self.total))
+        data = decompress(body, self.codec, self.raw_len)
+        if binascii.crc32(data) & 0xFFFFFFFF != self.msg_id:
+            raise ValueError(f"message CRC mismatch after reassembly ({CODEC_NAMES.get(self.codec)})")
+        return data
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+GhostLink tuner: find the fastest settings that survive a given channel.
+
+Every candidate (baud x interleave x repeats x carriers x FEC) is
+ranked by throughput — message bytes per second of audio, computed
+without synthesis. Candidates are then tried fastest first: each one is
+rendered in memory, pushed through the simulated channel (see
+:mod:`ghostlink.channel`) with ``trials`` different noise seeds and
+decoded by the real decoder. The first candidate that decodes in every
+trial is the answer, so slow configurations are only rendered when all
+faster ones fail.
+
+Examples:
+  ghostlink tune
+  ghostlink tune --file lyrics.txt --snr 6 --lowpass 6000 --resample 44100 --save radio
+  ghostlink text "msg" out/ --preset radio
+  python -m ghostlink.tune --carriers 8,16,32 --fec hamming74,rs,conv --trials 5 --all
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import sys
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .channel import ChannelConfig, run_trial
+from .encoder import build_frames, frames_symbols, pcm_frame_count
+from .fec import FEC_SCHEMES
+from .presets import save_preset
+from .profiles import FSK_ORDERS, carrier_freqs
+
+DEFAULT_MESSAGE = "The quick brown fox jumps over the lazy dog"
+
+
+@dataclass
+class Candidate:
+    """One encoder configuration under test."""
+
+    baud: float
+    interleave: int
+    repeats: int
+    order: int
+    fec: str = "hamming74"
+    audio_s: float = 0.0
+
+    def throughput(self, n_bytes: int) -> float:
+        """Message bits per second of audio."""
+        return 8.0 * n_bytes / self.audio_s if self.audio_s else 0.0
+
+
+@dataclass
+class TuneResult:
+    """Every candidate tried, in order, and the winner (if any)."""
+
+    tried: List[Dict[str, Any]]
+    best: Optional[Candidate] = None
+
+
+def candidates(message: bytes, bauds: Iterable[float], interleaves: Iterable[int],
+               repeats: Iterable[int], orders: Iterable[int], fecs: Iterable[str],
+               samplerate: int = 48000, preamble_s: float = 0.8,
+               mix_profile: str = "streaming") -> List[Candidate]:
+    """The full grid, fastest first (deeper interleaving first on ties).
+
+    Bauds too fast for a carrier count's orthogonal spacing are left out.
+    """
+    out = []
+    for fec, order in itertools.product(fecs, orders):
+        frames = build_frames(message, fec=fec)
+        for depth in interleaves:
+            n_symbols = len(frames_symbols(frames, order, depth))
+            for baud, rep in itertools.product(bauds, repeats):
+                try:
+                    n_freqs = len(carrier_freqs(order, mix_profile, baud))
+                except ValueError:
+                    continue
+                n = pcm_frame_count(n_symbols, n_freqs, samplerate, baud, preamble_s, 0.0, rep)
+                out.append(Candidate(baud, depth, rep, order, fec, n / samplerate))
+    out.sort(key=lambda c: (c.audio_s, -c.interleave))
+    return out
+
+
+def evaluate(message: bytes, cand: Candidate, channel: ChannelConfig, trials: int,
+             samplerate: int = 48000, preamble_s: float = 0.8, mix_profile: str = "streaming",
+             amp: float = 0.06) -> Dict[str, Any]:
+    """Run ``cand`` through ``channel`` with ``trials`` seeds; stops at the first failure."""
+    passed = 0
+    error = None
+    for i in range(trials):
+        trial = ChannelConfig(**dict(asdict(channel), seed=channel.seed + i))
+        res = run_trial(message, trial, samplerate=samplerate, baud=cand.baud, mix_profile=mix_profile,
+                        preamble_s=preamble_s, interleave_depth=cand.interleave, repeats=cand.repeats,
+                        amp=amp, fec=cand.fec, order=cand.order)
+        if not res.crc_ok:
+            error = res.error or "payload mismatch"
+            break
+        passed += 1
+    row = dict(asdict(cand), bps=round(cand.throughput(len(message)), 2), passed=passed, trials=trials,
+               ok=passed == trials)
+    if error:
+        row["error"] = error
+    return row
+
+
+def tune(message: bytes, grid: Sequence[Candidate], channel: ChannelConfig, trials: int = 3,
+         samplerate: int = 48000, preamble_s: float = 0.8, mix_profile: str = "streaming",
+         amp: float = 0.06, exhaustive: bool = False) -> TuneResult:
+    """Try ``grid`` in order; the first candidate passing every trial wins.
+
+    With ``exhaustive`` every candidate is tried (for a full report); the
+    winner is still the fastest one that passed.
+    """
+    result = TuneResult(tried=[])
+    for cand in grid:
+        row = evaluate(message, cand, channel, trials, samplerate, preamble_s, mix_profile, amp)
+        result.tried.append(row)
+        logging.debug(f"[i] {json.dumps(row)}")
+        if row["ok"] and result.best is None:
+            result.best = cand
+            if not exhaustive:
+                break
+    return result
+
+
+def preset_params(cand: Candidate, samplerate: int, preamble_s: float, mix_profile: str) -> Dict[str, Any]:
+    """``cand`` as CLI option values, ready for :func:`ghostlink.presets.save_preset`."""
+    return {
+        "samplerate": samplerate,
+        "baud": cand.baud,
+        "sparse": cand.order == 4,
+        "carriers": cand.order if cand.order > 8 else None,
+        "mix_profile": mix_profile,
+        "preamble": preamble_s,
+        "interleave": cand.interleave,
+        "repeats": cand.repeats,
+        "fec": cand.fec,
+    }
+
+# ------------------------
+# CLI
+# ------------------------
+def _floats(value: str) -> List[float]:
+    return [float(v) for v in value.split(",") if v.strip()]
+
+def _ints(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+def _orders(value: str) -> List[int]:
+    orders = _ints(value)
+    bad = [o for o in orders if o not in FSK_ORDERS]
+    if bad:
+        raise argparse.ArgumentTypeError(f"carrier counts must be among {FSK_ORDERS}, got {bad}")
+    return orders
+
+def _fecs(value: str) -> List[str]:
+    names = [v.strip() for v in value.split(",") if v.strip()]
+    bad = [n for n in names if n not in FEC_SCHEMES]
+    if bad:
+        raise argparse.ArgumentTypeError(f"unknown FEC scheme: {', '.join(bad)}")
+    return names
+
+DESCRIPTION = "Find the highest-throughput settings that decode reliably through a simulated channel."
+
+def add_arguments(p: argparse.ArgumentParser) -> None:
+    src = p.add_mutually_exclusive_group()
+    src.add_argument("--message", default=DEFAULT_MESSAGE, help="Sample text to tune for.")
+    src.add_argument("--file", help="UTF-8 file to use as the sample message instead.")
+    p.add_argument("--samplerate", type=int, default=48000, help="Encoder sample rate (Hz).")
+    p.add_argument("--mix-profile", choices=["streaming", "studio"], default="streaming")
+    p.add_argument("--preamble", type=float, default=0.8, help="Preamble seconds.")
+    p.add_argument("--amp", type=float, default=0.06, help="Encoder amplitude.")
+    # Search space
+    p.add_argument("--bauds", type=_floats, default="60,90,120,180,240,360", help="Symbol rates to try.")
+    p.add_argument("--interleaves", type=_ints, default="1,2,4,8", help="Interleave depths to try.")
+    p.add_argument("--repeats", type=_ints, default="1,2,3", help="Repeat counts to try.")
+    p.add_argument("--carriers", type=_orders, default="4,8,16,32",
+                   help="Carrier counts (FSK orders) to try.")
+    p.add_argument("--fec", type=_fecs, default="hamming74", help="FEC schemes to try.")
+    # Channel
+    p.add_argument("--snr", type=float, default=10.0, help="Noise SNR (dB).")
+    p.add_argument("--lowpass", type=float, default=8000.0, help="Low-pass cutoff (Hz); 0 = off.")
+    p.add_argument("--highpass", type=float, default=300.0, help="High-pass cutoff (Hz); 0 = off.")
+    p.add_argument("--resample", type=int, default=44100, help="Resample to this rate (Hz); 0 = off.")
+    p.add_argument("--trials", type=int, default=3, help="Noise seeds a candidate must survive.")
+    p.add_argument("--seed", type=int, default=0, help="First noise seed.")
+    # Output
+    p.add_argument("--all", action="store_true",
+                   help="Try every candidate instead of stopping at the first pass.")
+    p.add_argument("--save", metavar="NAME", help="Save the winner as a preset for --preset NAME.")
+    p.add_argument("--verbose", "-v", action="store_true", help="Verbose logging.")
+
+def check_args(p: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    if args.trials < 1:
+        p.error("--trials must be >= 1")
+    if not (args.bauds and args.interleaves and args.repeats and args.carriers and args.fec):
+        p.error("the search space is empty")
+    if any(b <= 10 or b > 2000 for b in args.bauds):
+        p.error("bauds must be in (10,2000]")
+    if any(d < 1 or d > 64 for d in args.interleaves) or any(r < 1 or r > 16 for r in args.repeats):
+        p.error("interleave depths must be 1..64 and repeats 1..16")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="ghostlink tune", description=DESCRIPTION,
+                                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    add_arguments(p)
+    args = p.parse_args(argv)
+    check_args(p, args)
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return main_with_args(parse_args(argv))
+
+def main_with_args(args: argparse.Namespace) -> int:
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format="%(message)s")
+    if args.file:
+        with open(args.file, "rb") as fh:
+            message = fh.read()
+    else:
+        message = args.message.encode("utf-8")
+    channel = ChannelConfig(snr_db=args.snr, lowpass_hz=args.lowpass or None,
+                            highpass_hz=args.highpass or None, resample_to=args.resample or None,
+                            seed=args.seed)
+    grid = candidates(message, args.bauds, args.interleaves, args.repeats, args.carriers, args.fec,
+                      args.samplerate, args.preamble, args.mix_profile)
+    logging.info(f"[i] {len(grid)} candidates for {len(message)} bytes; trying fastest first")
+    result = tune(message, grid, channel, args.trials, args.samplerate, args.preamble,
+                  args.mix_profile, args.amp, exhaustive=args.all)
+    for row in result.tried:
+        print(json.dumps(row))
+    best = result.best
+    if best is None:
+        logging.error(f"[x] No candidate decoded in all {args.trials} trials; "
+                      "widen the search or ease the channel.")
+        return 1
+    logging.info(f"[i] Best: --baud {best.baud:g} --interleave {best.interleave} --repeats {best.repeats} "
+                 f"--carriers {best.order} --fec {best.fec} "
+                 f"({best.throughput(len(message)):.1f} bit/s, {best.audio_s:.2f}s)")
+    if args.save:
+        save_preset(args.save, preset_params(best, args.samplerate, args.preamble, args.mix_profile))
+        logging.info(f"[i] Saved preset '{args.save}'; use it with --preset {args.save}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+GhostLink watch: encode text files as they land in a directory.
+
+Changes are picked up through Linux inotify (via ctypes, no extra
+dependency) or, where that is unavailable, by polling the directory with
+``os.scandir``. A file is only encoded once its size and mtime have stayed
+the same for ``--settle`` seconds, so files still being written are left
+alone. Encodes run on a small process pool; a file that changes while it
+is being encoded is encoded again afterwards, and one whose encode failed
+is retried once its size or mtime changes. Dedupe and the history DB
+work as in dir mode.
+
+Examples:
+  ghostlink watch ./incoming/ out/
+  ghostlink watch ./incoming/ out/ --jobs 4 --settle 2 --preset radio
+  python -m ghostlink.watch ./incoming/ out/ --poll 5 --no-inotify
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import logging
+import os
+import select
+import struct
+import sys
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from .__main__ import (
+    TEXT_EXTENSIONS, add_encode_options, encode_kwargs, read_utf8_bytes, resolve_mode_flags,
+    setup_logging, validate_args,
+)
+from .encoder import encode_bytes
+from .presets import parse_with_preset
+from .results import EncodeResult
+
+# (size, mtime_ns): a file is unchanged while this stays the same
+Signature = Tuple[int, int]
+
+# ------------------------
+# inotify
+# ------------------------
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_EVENT = struct.Struct("iIII")
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+class Inotify:
+    """Non-recursive inotify watch on one directory."""
+
+    def __init__(self, path: str) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1: {os.strerror(err)}")
+        if libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK) < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, f"inotify_add_watch: {os.strerror(err)}")
+
+    def read(self, timeout: float) -> Optional[List[str]]:
+        """Names touched within ``timeout`` seconds; ``None`` if events were lost."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        if not ready:
+            return []
+        try:
+            buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+        names = []
+        pos = 0
+        while pos + _EVENT.size <= len(buf):
+            _, mask, _, length = _EVENT.unpack_from(buf, pos)
+            pos += _EVENT.size
+            name = buf[pos:pos + length].rstrip(b"\0")
+            pos += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            if name and not mask & IN_ISDIR:
+                names.append(os.fsdecode(name))
+        return names
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+# ------------------------
+# Watcher
+# ------------------------
+def _encode_path(path: str, out_dir: str, settings: Dict[str, Any]) -> EncodeResult:
+    # Module level so a process pool can pickle it
+    name = os.path.basename(path)
+    try:
+        return encode_bytes(read_utf8_bytes(path, is_literal=False), out_dir, name, **settings)
+    except Exception as e:
+        return EncodeResult(input_ref=name, error=str(e))
+
+
+class Watcher:
+    """Debounced, pooled encoding of the text files in ``in_dir``.
+
+    :meth:`step` waits up to ``timeout`` for changes, submits files that
+    have settled and returns the results of encodes that finished. With
+    ``use_inotify=False`` (or when inotify is unavailable) the directory is
+    rescanned every ``poll_s`` seconds instead.
+    """
+
+    def __init__(self, in_dir: str, out_dir: str, settings: Dict[str, Any], jobs: int = 2,
+                 settle_s: float = 1.0, poll_s: float = 1.0, use_inotify: bool = True) -> None:
+        if jobs < 1:
+            raise ValueError("jobs must be >= 1")
+        self.in_dir = in_dir
+        self.out_dir = out_dir
+        self.settings = settings
+        self.settle_s = settle_s
+        self.poll_s = poll_s
+        self.inotify: Optional[Inotify] = None
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                self.inotify = Inotify(in_dir)
+            except OSError as e:
+                logging.warning(f"[!] inotify unavailable ({e}); polling every {poll_s:g}s.")
+        self.pool = ProcessPoolExecutor(max_workers=jobs)
+        self.pending: Dict[str, Tuple[Signature, float]] = {}
+        self.running: Dict[Future, Tuple[str, Signature]] = {}
+        self.done: Dict[str, Signature] = {}
+        # Failed encodes are retried only once the file changes again
+        self.failed: Dict[str, Signature] = {}
+        self._last_scan = 0.0
+
+    @property
+    def mode(self) -> str:
+        return "inotify" if self.inotify is not None else "polling"
+
+    @property
+    def idle(self) -> bool:
+        return not self.pending and not self.running
+
+    def scan(self) -> None:
+        """Look at every candidate file in the directory."""
+        self._last_scan = time.monotonic()
+        try:
+            with os.scandir(self.in_dir) as it:
+                for entry in it:
+                    if entry.name.lower().endswith(TEXT_EXTENSIONS) and entry.is_file():
+                        self._touch(entry.path)
+        except OSError as e:
+            logging.error(f"[x] Failed to scan '{self.in_dir}': {e}")
+
+    def _touch(self, path: str) -> None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            self.pending.pop(path, None)
+            return
+        sig = (st.st_size, st.st_mtime_ns)
+        if sig in (self.done.get(path), self.failed.get(path)) or (path, sig) in self.running.values():
+            return
+        prior = self.pending.get(path)
+        if prior is None or prior[0] != sig:
+            self.pending[path] = (sig, time.monotonic())
+
+    def step(self, timeout: float = 0.5) -> List[EncodeResult]:
+        if self.inotify is not None:
+            names = self.inotify.read(timeout)
+            if names is None:
+                logging.warning("[!] inotify queue overflowed; rescanning.")
+                self.scan()
+            else:
+                for name in names:
+                    if name.lower().endswith(TEXT_EXTENSIONS):
+                        self._touch(os.path.join(self.in_dir, name))
+        else:
+            time.sleep(max(0.0, min(timeout, self._last_scan + self.poll_s - time.monotonic())))
+            if time.monotonic() - self._last_scan >= self.poll_s:
+                self.scan()
+        self._submit_settled()
+        return self._collect()
+
+    def _submit_settled(self) -> None:
+        now = time.monotonic()
+        busy = {path for path, _ in self.running.values()}
+        for path, (sig, since) in list(self.pending.items()):
+            if now - since < self.settle_s or path in busy:
+                continue
+            self._touch(path)  # still the same size and mtime?
+            if self.pending.get(path, (None, 0.0))[0] != sig:
+                continue
+            del self.pending[path]
+            logging.info(f"[i] Encoding {os.path.basename(path)}")
+            self.running[self.pool.submit(_encode_path, path, self.out_dir, self.settings)] = (path, sig)
+
+    def _collect(self) -> List[EncodeResult]:
+        results = []
+        for future in [f for f in self.running if f.done()]:
+            path, sig = self.running.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                result = EncodeResult(input_ref=os.path.basename(path), error=str(e))
+            if result.ok:
+                self.done[path] = sig
+                self.failed.pop(path, None)
+            else:
+                self.failed[path] = sig
+                logging.error(f"[x] Encode failed for '{path}': {result.error}")
+            results.append(result)
+        return results
+
+    def drain(self, timeout: float = 0.5) -> List[EncodeResult]:
+        """Step until nothing is pending or running."""
+        results: List[EncodeResult] = []
+        while not self.idle:
+            results.extend(self.step(timeout))
+        return results
+
+    def close(self) -> None:
+        for future in self.running:
+            future.cancel()
+        self.pool.shutdown(wait=True)
+        if self.inotify is not None:
+            self.inotify.close()
+
+# ------------------------
+# CLI
+# ------------------------
+DESCRIPTION = "Encode .txt/.md/.log files as they land in a directory."
+
+def add_arguments(p: argparse.ArgumentParser) -> None:
+    p.add_argument("indir", help="Directory to watch.")
+    p.add_argument("outdir", help="Directory to write output WAV(s).")
+    add_encode_options(p)
+    p.add_argument("--jobs", type=int, default=2, help="Files encoded at once.")
+    p.add_argument("--settle", type=float, default=1.0,
+                   help="Seconds a file's size and mtime must stay unchanged before it is encoded.")
+    p.add_argument("--poll", type=float, default=1.0, help="Rescan interval (s) when polling.")
+    p.add_argument("--no-inotify", action="store_true", help="Always poll, e.g. on network filesystems.")
+    p.add_argument("--once", action="store_true",
+                   help="Encode what is there (once it settles), then exit.")
+
+def check_args(p: argparse.ArgumentParser, args: argparse.Namespace) -> None:
+    resolve_mode_flags(args)
+    # validate_args checks encoder settings as for dir mode
+    args.mode, args.input, args.out_name = "dir", args.indir, None
+    if args.jobs < 1 or args.settle < 0 or args.poll <= 0:
+        p.error("--jobs must be >= 1, --settle >= 0 and --poll > 0")
+    if not os.path.isdir(args.indir):
+        p.error(f"not a directory: {args.indir}")
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(prog="ghostlink watch", description=DESCRIPTION,
+                                formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    add_arguments(p)
+    args = parse_with_preset(p, argv)
+    check_args(p, args)
+    return args
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return main_with_args(parse_args(argv))
+
+def main_with_args(args: argparse.Namespace) -> int:
+    setup_logging(args.verbose)
+    validate_args(args)
+    os.makedirs(args.outdir, exist_ok=True)
+    watcher = Watcher(args.indir, args.outdir, encode_kwargs(args), jobs=args.jobs,
+                      settle_s=args.settle, poll_s=args.poll, use_inotify=not args.no_inotify)
+    made = failed = 0
+    try:
+        logging.info(f"[i] Watching {os.path.abspath(args.indir)} ({watcher.mode}); Ctrl-C to stop.")
+        watcher.scan()
+        while True:
+            results = watcher.drain() if args.once else watcher.step()
+            made += sum(1 for r in results if r.ok and not r.skipped)
+            failed += sum(1 for r in results if not r.ok)
+            if args.once:
+                break
+    except KeyboardInterrupt:
+        logging.info("[i] Stopping.")
+        return 130
+    finally:
+        watcher.close()
+        logging.info(f"[i] Encoded={made} Failed={failed}")
+    return 1 if failed and args.once else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
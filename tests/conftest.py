@@ -21,6 +21,25 @@ def install_cli() -> None:
     )
 
 
+# Quick-to-render encoder settings for tests that go through the CLI parser
+FAST_ENCODE_OPTIONS = ["--samplerate", "16000", "--baud", "200", "--amp", "0.1", "--preamble", "0.5",
+                       "--interleave", "2", "--repeats", "1"]
+
+
+@pytest.fixture
+def encode_args(tmp_path):
+    """Build encoder args with the real ``ghostlink`` parser.
+
+    ``encode_args(mode, input, *options)`` writes to ``tmp_path / "out"``;
+    ``options`` come after :data:`FAST_ENCODE_OPTIONS`, so they win.
+    """
+    from ghostlink.__main__ import parse_args
+
+    def make(mode, input, *options):
+        return parse_args([mode, str(input), str(tmp_path / "out"), *FAST_ENCODE_OPTIONS, *options])
+    return make
+
+
 @pytest.fixture(autouse=True)
 def clean_history_db() -> None:
     db_path = Path.cwd() / HISTORY_DB
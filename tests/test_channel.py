@@ -0,0 +1,32 @@
+from ghostlink.channel import (ChannelConfig, add_noise, clip, resample, run_trial,
+                               symbol_errors, time_offset)
+
+FAST = dict(samplerate=16000, baud=200.0, preamble_s=0.5, interleave_depth=4, repeats=1)
+
+
+def test_impairments_are_deterministic():
+    samples = [0.1, -0.2, 0.3, -0.4] * 50
+    assert add_noise(samples, 10.0, seed=7) == add_noise(samples, 10.0, seed=7)
+    assert add_noise(samples, 10.0, seed=7) != add_noise(samples, 10.0, seed=8)
+    assert max(clip(samples, 0.25)) == 0.25
+    assert len(resample([0.0] * 4800, 48000, 44100)) == 4410
+    assert time_offset([1.0, 2.0], 1000, 0.002) == [0.0, 0.0, 1.0, 2.0]
+    assert time_offset([1.0, 2.0, 3.0], 1000, -0.001) == [2.0, 3.0]
+
+
+def test_clean_and_resampled_channels_decode():
+    clean = run_trial(b"channel", ChannelConfig(), **FAST)
+    assert clean.crc_ok and clean.ser == 0.0
+    resampled = run_trial(b"channel", ChannelConfig(resample_to=22050, gain_db=-6.0, snr_db=10.0), **FAST)
+    assert resampled.crc_ok
+
+
+def test_destroyed_channel_reports_errors():
+    res = run_trial(b"channel", ChannelConfig(snr_db=-30.0, seed=1), **FAST)
+    assert not res.crc_ok
+    assert res.error
+    assert res.symbol_errors > 0
+
+
+def test_symbol_errors_counts_missing_symbols():
+    assert symbol_errors([1, 2, 3, 4], [1, 0, 3]) == 2
@@ -0,0 +1,18 @@
+import pytest
+
+from ghostlink.__main__ import parse_args
+
+
+def test_options_before_the_mode(tmp_path):
+    before = parse_args(["--samplerate", "16000", "--sparse", "--gap=2", "text", "hi", "out"])
+    after = parse_args(["text", "hi", "out", "--samplerate", "16000", "--sparse", "--gap=2"])
+    assert vars(before) == vars(after)
+    assert before.mode == "text" and before.samplerate == 16000 and before.sparse and before.gap == 2.0
+
+    watch = parse_args(["--baud", "200", "watch", str(tmp_path), str(tmp_path / "out")])
+    assert watch.command == "watch" and watch.baud == 200.0
+
+
+def test_unknown_option_before_the_mode_is_rejected():
+    with pytest.raises(SystemExit):
+        parse_args(["--bogus", "text", "hi", "out"])
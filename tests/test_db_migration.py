@@ -1,6 +1,8 @@
 from ghostlink import encode_bytes_to_wav
 from ghostlink.constants import HISTORY_DB
+from ghostlink.history import db_has_hash, db_init, db_insert
 import sqlite3
+import threading
 from pathlib import Path
 
 
@@ -30,3 +32,18 @@ def test_db_in_project_root(tmp_path):
     finally:
         conn.close()
     assert count == 1
+
+
+def test_db_uses_wal_and_waits_for_locks(tmp_path):
+    db_path = str(tmp_path / HISTORY_DB)
+    db_init(db_path)
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    try:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        conn.execute("BEGIN IMMEDIATE")  # hold the write lock briefly, as another worker would
+        threading.Timer(0.3, conn.rollback).start()
+        db_insert(db_path, "text", "msg", "a" * 64, 2, 16000, 200.0, 0.1, True, "streaming",
+                  [1000.0], "x.wav", "00000000")
+    finally:
+        conn.close()
+    assert db_has_hash(db_path, "a" * 64)[0]
@@ -0,0 +1,26 @@
+import io
+
+from ghostlink import stream_wav
+from ghostlink.decoder import decode_wav, read_wav
+
+
+def _wav_bytes(message: bytes) -> bytes:
+    _, chunks = stream_wav(message, samplerate=16000, baud=200.0, amp=0.1, dense=True,
+                           mix_profile="streaming", gap_ms=0.0, preamble_s=0.5,
+                           interleave_depth=4, repeats=1, ramp_ms=5.0)
+    return b"".join(chunks)
+
+
+def test_read_wav_accepts_file_objects(tmp_path):
+    data = _wav_bytes(b"hi")
+    path = tmp_path / "hi.wav"
+    path.write_bytes(data)
+    assert read_wav(io.BytesIO(data)) == read_wav(str(path))
+
+
+def test_decode_wav_from_buffer_leaves_it_open():
+    buf = io.BytesIO(_wav_bytes(b"in memory"))
+    decoded = decode_wav(buf, baud=200.0, dense=True, mix_profile="streaming",
+                         preamble_s=0.5, interleave_depth=4, repeats=1)
+    assert decoded == b"in memory"
+    assert not buf.closed
@@ -0,0 +1,48 @@
+import io
+
+from ghostlink import Decoder, Encoder
+from ghostlink.decoder import read_wav
+
+SETTINGS = dict(baud=200.0, preamble_s=0.5, interleave_depth=4, repeats=2)
+
+
+def _wav(msg, **overrides):
+    params = dict(SETTINGS, **overrides)
+    return Encoder(samplerate=16000, amp=0.1, **params).encode_wav(msg)
+
+
+def test_decodes_every_source_type(tmp_path):
+    wav = _wav(b"sources")
+    path = tmp_path / "m.wav"
+    path.write_bytes(wav)
+    samples, sr = read_wav(io.BytesIO(wav))
+    dec = Decoder(**SETTINGS)
+    for source, kwargs in ((str(path), {}), (path, {}), (wav, {}), (io.BytesIO(wav), {}),
+                           (samples, {"samplerate": sr})):
+        res = dec.decode(source, **kwargs)
+        assert res.crc_ok and res.payload == b"sources" and res.repeat == 1
+    assert set(res.timings) == {"read", "detect", "fec", "crc", "total"}
+
+
+def test_reports_repeat_used():
+    samples, sr = read_wav(io.BytesIO(_wav(b"second")))
+    dec = Decoder(**SETTINGS)
+    start = dec.plan(sr)[2]
+    half = start + (len(samples) - start) // 2
+    samples[start:half] = [0.0] * (half - start)  # wipe the first repeat
+    res = dec.decode(samples, samplerate=sr)
+    assert res.crc_ok and res.repeat == 2
+
+
+def test_failure_is_reported_not_raised():
+    res = Decoder(**dict(SETTINGS, dense=False)).decode(_wav(b"mismatch"))
+    assert not res.crc_ok and res.payload is None
+    assert res.error == "all repeats failed"
+
+
+def test_interleave_depth_below_symbol_padding():
+    # These leave 2 symbol padding bits after the interleaved block, which
+    # look like a valid length at depth 2
+    for msg in (b"hey", b"in memory"):
+        res = Decoder(**dict(SETTINGS, interleave_depth=2)).decode(_wav(msg, interleave_depth=2))
+        assert res.payload == msg
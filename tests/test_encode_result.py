@@ -0,0 +1,60 @@
+from pathlib import Path
+
+from ghostlink import encode_bytes, encode_with_args
+
+
+def _encode(tmp_path):
+    return encode_bytes(
+        user_bytes=b"hi",
+        out_dir=str(tmp_path),
+        base_name_hint="msg",
+        samplerate=16000,
+        baud=200.0,
+        amp=0.1,
+        dense=True,
+        mix_profile="streaming",
+        gap_ms=0.0,
+        preamble_s=0.5,
+        interleave_depth=2,
+        repeats=1,
+        ramp_ms=5.0,
+    )
+
+
+def test_encode_bytes_reports_exact_paths(tmp_path):
+    result = _encode(tmp_path)
+    assert result.ok and not result.skipped
+    assert Path(result.wav_path).exists()
+    assert Path(result.midi_path).exists()
+    assert set(result.variants) == {"slow25", "slow50", "slow100", "slow1000"}
+    assert all(Path(p).exists() for p in result.variants.values())
+    assert result.sha256[:12] in Path(result.wav_path).name
+    assert result.timings["total"] >= result.timings["synth"] > 0
+
+
+def test_duplicate_encode_returns_prior_outputs(tmp_path):
+    first = _encode(tmp_path)
+    second = _encode(tmp_path)
+    assert second.skipped
+    assert second.wav_path == first.wav_path
+    assert second.midi_path == first.midi_path
+    assert second.variants == first.variants
+
+
+def test_encode_with_args_reports_failures_per_input(tmp_path, monkeypatch, encode_args):
+    in_dir = tmp_path / "inp"
+    in_dir.mkdir()
+    (in_dir / "a.txt").write_text("alpha")
+    (in_dir / "b.txt").write_text("beta")
+    real = encode_bytes
+
+    def flaky(**kwargs):
+        if kwargs["base_name_hint"] == "b.txt":
+            raise RuntimeError("boom")
+        return real(**kwargs)
+
+    monkeypatch.setattr("ghostlink.__main__.encode_bytes", flaky)
+    results = encode_with_args(encode_args("dir", in_dir))
+    assert [r.input_ref for r in results] == ["a.txt", "b.txt"]
+    assert results[0].ok and Path(results[0].wav_path).exists()
+    assert results[1].error == "boom"
@@ -0,0 +1,34 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from ghostlink import Encoder, stream_wav
+from ghostlink.constants import HISTORY_DB
+from ghostlink.decoder import decode_wav
+
+
+@pytest.mark.parametrize("bit_depth,channels,gap_ms", [(16, 1, 0.0), (24, 2, 0.0), (32, 1, 2.0)])
+def test_matches_stream_wav(bit_depth, channels, gap_ms):
+    enc = Encoder(samplerate=16000, baud=200.0, amp=0.1, preamble_s=0.5, interleave_depth=4,
+                  repeats=2, bit_depth=bit_depth, channels=channels, gap_ms=gap_ms)
+    for msg in (b"one", b"and another"):
+        _, chunks = stream_wav(msg, 16000, 200.0, 0.1, True, "streaming", gap_ms, 0.5, 4, 2, 5.0,
+                               bit_depth=bit_depth, channels=channels)
+        assert enc.encode_wav(msg) == b"".join(chunks)
+        assert len(enc.encode_pcm(msg)) == enc.frame_count(msg) * channels * (bit_depth // 8)
+
+
+def test_in_memory_round_trip_has_no_side_effects(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    enc = Encoder(samplerate=16000, baud=200.0, amp=0.1, preamble_s=0.5, interleave_depth=4, repeats=1)
+    wav = enc.encode_wav(b"memory only")
+    assert decode_wav(io.BytesIO(wav), baud=200.0, dense=True, mix_profile="streaming",
+                      preamble_s=0.5, interleave_depth=4, repeats=1) == b"memory only"
+    assert list(tmp_path.iterdir()) == []
+    assert not Path(HISTORY_DB).exists()
+
+
+def test_rejects_invalid_settings():
+    with pytest.raises(ValueError):
+        Encoder(baud=5.0)
@@ -0,0 +1,52 @@
+import io
+import random
+
+import pytest
+
+from ghostlink.decoder import decode_wav, fec_decode_bits
+from ghostlink.encoder import build_payload, fec_encode_bytes, stream_wav
+from ghostlink.fec import encoded_bits, fec_decode, fec_encode, rs_decode, rs_encode
+
+MESSAGE = b"GhostLink hides structured text inside audio using band-placed FSK tones."
+
+
+def test_rs_corrects_up_to_eight_bytes_per_block():
+    rng = random.Random(7)
+    data = bytes(rng.randrange(256) for _ in range(300))  # two blocks
+    coded = bytearray(rs_encode(data))
+    for start, size in ((0, 255), (255, len(coded) - 255)):
+        for pos in rng.sample(range(size), 8):
+            coded[start + pos] ^= rng.randrange(1, 256)
+    assert rs_decode(bytes(coded), len(data)) == data
+
+
+def test_rs_reports_uncorrectable_block():
+    coded = bytearray(rs_encode(MESSAGE))
+    for pos in range(0, 18, 2):
+        coded[pos] ^= 0xA5
+    with pytest.raises(ValueError):
+        rs_decode(bytes(coded), len(MESSAGE))
+
+
+def test_conv_corrects_scattered_bit_errors():
+    bits = fec_encode("conv", MESSAGE)
+    assert len(bits) == encoded_bits("conv", len(MESSAGE))
+    for i in range(3, len(bits), 20):
+        bits[i] ^= 1
+    assert fec_decode("conv", bits, len(MESSAGE)) == MESSAGE
+
+
+@pytest.mark.parametrize("fec", ["rs", "conv"])
+def test_fec_frames_shorter_than_hamming(fec):
+    hamming = fec_encode_bytes(build_payload(MESSAGE))
+    coded = fec_encode_bytes(build_payload(MESSAGE, fec=fec))
+    assert len(coded) < len(hamming)
+    assert fec_decode_bits(coded + [0, 0, 0])[:3] == b"GIV"
+
+
+@pytest.mark.parametrize("fec", ["rs", "conv"])
+def test_fec_round_trip_through_audio(fec):
+    args = dict(baud=200.0, dense=True, mix_profile="streaming", preamble_s=0.5,
+                interleave_depth=3, repeats=1)
+    _, chunks = stream_wav(MESSAGE, 16000, amp=0.1, gap_ms=0.0, ramp_ms=5.0, fec=fec, **args)
+    assert decode_wav(io.BytesIO(b"".join(chunks)), **args) == MESSAGE
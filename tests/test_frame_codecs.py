@@ -0,0 +1,60 @@
+import io
+
+import pytest
+
+from ghostlink.decoder import decode_wav, parse_payload
+from ghostlink.encoder import build_frames, build_payload, sha256_hex, stream_wav
+from ghostlink.frame import CODECS, build_v1, frame_codec
+
+TEXT = (b"GhostLink hides structured text inside audio. GhostLink hides structured "
+        b"text inside audio using band-placed FSK tones. " * 3)
+
+
+@pytest.mark.parametrize("codec", sorted(CODECS))
+def test_codecs_round_trip(codec):
+    frame = build_payload(TEXT, codec)
+    assert frame_codec(frame) == codec
+    # decoded frames carry trailing symbol padding
+    assert parse_payload(frame + b"\x00\x00") == TEXT
+
+
+def test_auto_picks_shortest():
+    frame = build_payload(TEXT)
+    assert frame_codec(frame) != "v1"
+    assert len(frame) < len(build_v1(TEXT)) // 2
+    assert all(len(frame) <= len(build_payload(TEXT, c)) for c in CODECS)
+
+
+def test_short_messages_keep_v1_frame():
+    assert build_payload(b"hi") == build_v1(b"hi")
+    assert parse_payload(build_v1(b"hi")) == b"hi"
+
+
+def test_v1_codec_keeps_legacy_frame_for_any_message():
+    frames = build_frames(TEXT * 4, codec="v1", frame_size=32)
+    assert frames == [build_v1(TEXT * 4)]
+    # Auto frames compressible text differently, so its dedupe hash differs from v1
+    assert sha256_hex(build_payload(TEXT)) != sha256_hex(build_payload(TEXT, "v1"))
+
+
+def test_ascii7_rejects_non_ascii():
+    with pytest.raises(ValueError):
+        build_payload("naïve".encode(), "ascii7")
+    assert frame_codec(build_payload("naïve text ".encode() * 20)) != "ascii7"
+
+
+def test_corrupt_body_detected():
+    frame = bytearray(build_payload(TEXT, "zlib"))
+    frame[20] ^= 0x40
+    with pytest.raises(ValueError, match="CRC mismatch"):
+        parse_payload(bytes(frame))
+
+
+def test_compressed_frame_decodes_from_audio():
+    args = dict(samplerate=16000, baud=200.0, dense=True, mix_profile="streaming",
+                preamble_s=0.5, interleave_depth=2, repeats=1)
+    plain, _ = stream_wav(TEXT, amp=0.1, gap_ms=0.0, ramp_ms=5.0, codec="v1", **args)
+    total, chunks = stream_wav(TEXT, amp=0.1, gap_ms=0.0, ramp_ms=5.0, **args)
+    assert total < plain
+    args.pop("samplerate")
+    assert decode_wav(io.BytesIO(b"".join(chunks)), **args) == TEXT
@@ -0,0 +1,82 @@
+import array
+import io
+import math
+import random
+
+from ghostlink import Decoder, Encoder
+from ghostlink import decoder
+from ghostlink.channel import to_wav_bytes
+from ghostlink.decoder import read_wav
+from ghostlink.frontend import decimation_factor, front_end, halfband_decimate, halfband_rejection
+
+SR = 48000
+SETTINGS = dict(baud=200.0, preamble_s=0.5, interleave_depth=4, repeats=2)
+
+
+def _pcm(message, amp, sr=SR):
+    return list(array.array("f", Encoder(samplerate=sr, amp=amp, bit_depth=32, **SETTINGS).encode_pcm(message)))
+
+
+def _errors(wav, reference, band_limit):
+    samples, sr = read_wav(io.BytesIO(wav))
+    dec = Decoder(band_limit=band_limit, **SETTINGS)
+    symbols = dec.detect(samples, sr)
+    return sum(a != b for a, b in zip(symbols, reference)), dec.decode(wav).crc_ok
+
+
+def test_factor_and_halfband_decimate():
+    freqs = tuple(Decoder(**SETTINGS).freqs)
+    assert halfband_rejection(48000, 1300, 5200) >= 60 > halfband_rejection(24000, 1300, 5200)
+    assert decimation_factor(48000, 1300, 5200, 240) == 2
+    assert decimation_factor(96000, 1300, 5200, 480) == 4
+    assert decimation_factor(96000, 1300, 5200, 24) == 2  # keeps 8 samples per symbol
+    assert front_end(freqs, 16000, 80) is None
+    fe = front_end(freqs, 96000, 480)
+    assert fe.factor == 4 and fe.rate == 24000 and len(fe.gains) == len(freqs)
+
+    out = halfband_decimate([1.0] * 10001)
+    assert len(out) == 5001 and all(abs(x - 1.0) < 1e-9 for x in out[5:-5])
+    # Output j is centred on input 2 * j
+    impulse = [0.0] * 40
+    impulse[22] = 1.0
+    assert max(range(20), key=halfband_decimate(impulse).__getitem__) == 11
+
+
+def test_band_limited_detection_matches_full_band(monkeypatch):
+    samples = _pcm(b"decimated front end", 0.1)
+    full = Decoder(**SETTINGS)
+    limited = Decoder(band_limit=True, **SETTINGS)
+    assert limited.front_end(SR).factor == 2 and full.front_end(SR) is None
+    assert limited.detect(samples, SR) == full.detect(samples, SR)
+    result = limited.decode(samples, samplerate=SR)
+    assert result.crc_ok and result.payload == b"decimated front end"
+
+    monkeypatch.setattr(decoder, "PARALLEL_DETECT_MIN_WINDOWS", 8)
+    assert Decoder(workers=2, band_limit=True, **SETTINGS).detect(samples, SR) == limited.detect(samples, SR)
+
+
+def test_band_limit_not_worse_above_band_or_in_noise():
+    signal = _pcm(b"not worse than full band", 0.02)
+    reference = Decoder(**SETTINGS).detect(signal, SR)
+    tones = [0.08 * sum(math.sin(2 * math.pi * f * i / SR + f) for f in (7000, 8100, 9000, 10300, 11000))
+             for i in range(len(signal))]
+    wav = to_wav_bytes([s + t for s, t in zip(signal, tones)], SR)
+    assert _errors(wav, reference, True) == _errors(wav, reference, False) == (0, True)
+
+    for seed in range(3):
+        rng = random.Random(seed)
+        wav = to_wav_bytes([s + rng.gauss(0, 0.04) for s in signal], SR)
+        full_errors, full_ok = _errors(wav, reference, False)
+        errors, ok = _errors(wav, reference, True)
+        assert errors <= full_errors and ok >= full_ok
+
+
+def test_band_limit_rejects_host_bass():
+    message = b"under a bass line"
+    signal = _pcm(message, 0.02)
+    bass = [0.8 * (0.6 * math.sin(2 * math.pi * 55 * i / SR) + 0.3 * math.sin(2 * math.pi * 110.3 * i / SR + 1)
+                   + 0.15 * math.sin(2 * math.pi * 441.7 * i / SR)) for i in range(len(signal))]
+    mixed = [s + b for s, b in zip(signal, bass)]
+    assert not Decoder(**SETTINGS).decode(mixed, samplerate=SR).crc_ok
+    result = Decoder(band_limit=True, **SETTINGS).decode(mixed, samplerate=SR)
+    assert result.crc_ok and result.payload == message
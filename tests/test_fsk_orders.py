@@ -0,0 +1,46 @@
+import pytest
+
+from ghostlink import Encoder, Decoder, bits_to_symbols
+from ghostlink.decoder import symbols_to_bits
+from ghostlink.profiles import PROFILE_BANDS, carrier_freqs, freq_profile
+
+
+@pytest.mark.parametrize("order,baud", [(16, 90.0), (16, 200.0), (32, 100.0)])
+@pytest.mark.parametrize("profile", ["streaming", "studio"])
+def test_high_order_carriers_are_orthogonal_and_in_band(order, baud, profile):
+    freqs = carrier_freqs(order, profile, baud)
+    lo, hi = PROFILE_BANDS[profile]
+    assert len(freqs) == order
+    assert freqs[0] == lo and freqs[-1] <= hi
+    spacing = freqs[1] - freqs[0]
+    assert spacing % baud == 0
+    assert all(b - a == spacing for a, b in zip(freqs, freqs[1:]))
+
+
+def test_carrier_limits():
+    assert carrier_freqs(8, "studio", 500.0) == freq_profile(True, "studio")
+    with pytest.raises(ValueError, match="baud <= 113"):
+        carrier_freqs(32, "streaming", 120.0)
+    with pytest.raises(ValueError):
+        carrier_freqs(64, "streaming", 90.0)
+
+
+@pytest.mark.parametrize("order", [16, 32])
+def test_symbol_mapping_round_trip(order):
+    bits = [1, 0, 1, 1, 0, 1, 1, 1, 0]
+    symbols = bits_to_symbols(bits, order)
+    assert max(symbols) < order
+    k = order.bit_length() - 1
+    assert len(symbols) == -(-len(bits) // k)
+    assert symbols_to_bits(symbols, order)[:len(bits)] == bits
+
+
+@pytest.mark.parametrize("order,baud", [(16, 200.0), (32, 100.0)])
+def test_high_order_round_trip(order, baud):
+    msg = b"sixteen and thirty-two carriers"
+    settings = dict(baud=baud, preamble_s=0.5, interleave_depth=4, repeats=1, order=order)
+    enc = Encoder(samplerate=16000, amp=0.1, **settings)
+    result = Decoder(**settings).decode(enc.encode_wav(msg))
+    assert result.crc_ok and result.payload == msg
+    dense = Encoder(samplerate=16000, amp=0.1, **dict(settings, order=None))
+    assert len(enc.symbols(msg)) < len(dense.symbols(msg))
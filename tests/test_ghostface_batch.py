@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+pytest.importorskip("flask")
+from ghostFace import ghostlink_api  # noqa: E402
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(ghostlink_api, "BATCH_WORKERS", 1)
+    monkeypatch.setattr(ghostlink_api, "_batch_pool", None)
+    yield ghostlink_api.app.test_client()
+    if ghostlink_api._batch_pool is not None:
+        ghostlink_api._batch_pool.shutdown()
+
+
+def test_batch_with_missing_file_ends_with_summary(client, tmp_path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    (src / "here.txt").write_text("hi")
+    resp = client.post("/api/batch", json={
+        "mode": "encode", "input_dir": str(src), "output_dir": str(out), "ghostlink_dir": str(tmp_path),
+        "files": ["here.txt", "gone.txt"], "samplerate": 16000, "baud": 200, "preamble": 0.5, "repeats": 1,
+    })
+    records = [json.loads(line) for line in resp.get_data(as_text=True).splitlines()]
+    summary = records[-1]
+    assert summary["done"] and summary["total"] == 2
+    assert summary["failed"] == [str(src / "gone.txt")] and summary["succeeded"] == 1
+    missing = next(r for r in records[:-1] if r["file"] == str(src / "gone.txt"))
+    assert missing["error"] == "File not found"
+
+
+def test_batch_progress_counts_finished_files(client):
+    events = []
+    plan = [("a.txt", None, ()), ("b.txt", None, ())]
+    ghostlink_api._collect_batch(plan, lambda event, info: events.append((event, info["index"])))
+    assert events == [("file_done", 1), ("file_done", 2)]
+
+    manager = ghostlink_api.JobManager(workers=1)
+    job = ghostlink_api.Job("batch-encode")
+    manager._on_progress(job, "file_done", {"index": 1, "total": 2, "input": "a.txt"})
+    assert job.progress["percent"] == 50.0
+    manager.shutdown()
@@ -0,0 +1,28 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pytest
+
+pytest.importorskip("flask")
+from ghostFace import ghostlink_api  # noqa: E402
+
+
+def test_unfinished_jobs_of_exited_processes_are_failed_on_startup(tmp_path):
+    db = str(tmp_path / "jobs.db")
+    ghostlink_api.JobManager(workers=1, state_db=db).shutdown()
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with sqlite3.connect(db) as conn:
+        for job_id, status, owner in [("gone", "running", dead.pid), ("old", "queued", None),
+                                      ("sibling", "running", os.getppid())]:
+            conn.execute("INSERT INTO jobs (id, kind, status, created, progress, owner) "
+                         "VALUES (?, 'encode', ?, 0, '{}', ?)", (job_id, status, owner))
+
+    manager = ghostlink_api.JobManager(workers=1, state_db=db)
+    try:
+        assert manager.get("gone").status == manager.get("old").status == "failed"
+        assert manager.get("sibling").status == "running" and manager._active_count() == 1
+    finally:
+        manager.shutdown()
@@ -0,0 +1,62 @@
+"""What importing the package and the CLI entry modules loads.
+
+Import cost is kept down by keeping modules out of the import graph, so
+that is what is checked: each import runs in a fresh interpreter and the
+modules it adds to ``sys.modules`` are compared against what it may load.
+"""
+
+import json
+import subprocess
+import sys
+
+import pytest
+
+_CORE = {"ghostlink", "ghostlink.constants", "ghostlink.fec", "ghostlink.frame", "ghostlink.metrics",
+         "ghostlink.profiles", "ghostlink.results", "ghostlink.segments"}
+
+# Every ghostlink module each import loads
+GHOSTLINK_MODULES = {
+    "ghostlink": {"ghostlink"},
+    "ghostlink.decoder": _CORE | {"ghostlink.decoder", "ghostlink.frontend"},
+    "ghostlink.encoder": _CORE | {"ghostlink.encoder", "ghostlink.midi", "ghostlink.profiling"},
+}
+
+# Other modules each import must not pull in
+FORBIDDEN = {
+    "ghostlink": {"argparse", "sqlite3", "wave"},
+    "ghostlink.decoder": {"argparse", "sqlite3", "concurrent.futures"},
+    "ghostlink.encoder": {"argparse", "sqlite3", "concurrent.futures"},
+}
+
+
+def _loaded(module):
+    """Names ``import module`` adds to ``sys.modules`` in a fresh interpreter."""
+    code = ("import json, sys; before = set(sys.modules); import " + module
+            + "; print(json.dumps(sorted(set(sys.modules) - before)))")
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True).stdout
+    return set(json.loads(out))
+
+
+@pytest.mark.parametrize("module", sorted(GHOSTLINK_MODULES))
+def test_import_loads_only_what_it_needs(module):
+    loaded = _loaded(module)
+    assert {name for name in loaded if name.split(".")[0] == "ghostlink"} == GHOSTLINK_MODULES[module]
+    assert not FORBIDDEN[module] & loaded
+
+
+def test_lazy_exports_resolve():
+    import ghostlink
+    from ghostlink import encoder
+
+    assert ghostlink.encode_bytes is encoder.encode_bytes
+    assert "encode_with_args" in dir(ghostlink)
+    with pytest.raises(AttributeError):
+        ghostlink.not_a_name
+
+
+def test_encoder_all_matches_lazy_exports():
+    import ghostlink
+    from ghostlink import __main__, encoder
+
+    assert set(encoder.__all__) == set(ghostlink._EXPORTS[".encoder"])
+    assert all(hasattr(__main__, name) for name in encoder.__all__)
@@ -1,3 +1,5 @@
+import os
+
 from ghostlink import list_text_files
 
 def test_list_text_files_returns_sorted_paths(tmp_path):
@@ -8,3 +10,18 @@ def test_list_text_files_returns_sorted_paths(tmp_path):
     result = list_text_files(str(tmp_path))
     expected = sorted(str(tmp_path / n) for n in ["a.txt", "b.txt", "c.md", "d.log"])
     assert result == list(expected)
+
+
+def test_list_text_files_recurses_with_globs(tmp_path):
+    for rel in ["a.txt", "sub/b.MD", "sub/deep/c.log", "archive/old.txt", "sub/skip.bin", "sub/draft.txt"]:
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text("data")
+
+    def rel(paths):
+        return [os.path.relpath(p, tmp_path).replace(os.sep, "/") for p in paths]
+
+    assert rel(list_text_files(str(tmp_path), exclude=["archive/", "*draft*"])) == [
+        "a.txt", "sub/b.MD", "sub/deep/c.log"]
+    assert rel(list_text_files(str(tmp_path), include=["sub/*.txt", "*.bin"])) == [
+        "sub/draft.txt", "sub/skip.bin"]
+    assert rel(list_text_files(str(tmp_path), recursive=False)) == ["a.txt"]
@@ -0,0 +1,53 @@
+import pytest
+
+from ghostlink import encode_with_args
+from ghostlink.decoder import decode_wav
+from ghostlink.metrics import METRICS, Metrics, call_with_metrics
+
+
+def _counter(name, **labels):
+    return METRICS.counters.get((name, tuple(sorted(labels.items()))), 0)
+
+
+def test_encode_and_decode_record_stage_timings(tmp_path, encode_args):
+    METRICS.reset()
+    args = encode_args("text", "metrics", "--interleave", "4")
+    res = encode_with_args(args)[0]
+    assert {"payload", "synth", "wav", "variants", "total"} <= set(res.timings)
+
+    timings = {}
+    assert decode_wav(res.wav_path, baud=200.0, dense=True, mix_profile="streaming",
+                      preamble_s=0.5, interleave_depth=4, repeats=1, timings=timings) == b"metrics"
+    assert set(timings) == {"read", "detect", "fec", "crc", "total"}
+
+    encode_with_args(args)  # duplicate payload
+    assert _counter("ghostlink_encodes_total", result="created") == 1
+    assert _counter("ghostlink_encodes_total", result="skipped") == 1
+    assert _counter("ghostlink_dedupe_total", result="hit") == 1
+    assert _counter("ghostlink_decodes_total", result="ok") == 1
+
+    text = METRICS.render_prometheus()
+    assert "# TYPE ghostlink_stage_seconds histogram" in text
+    assert 'ghostlink_stage_seconds_count{op="encode",stage="synth"} 1' in text
+    assert 'ghostlink_stage_seconds_bucket{op="decode",stage="total",le="+Inf"} 1' in text
+
+
+def test_snapshots_merge_across_processes():
+    METRICS.reset()
+    _, snap = call_with_metrics(METRICS.observe, "ghostlink_stage_seconds", 0.02, {"op": "encode", "stage": "wav"})
+    merged = Metrics()
+    merged.merge(snap)
+    merged.merge(snap)
+    text = merged.render_prometheus()
+    assert 'ghostlink_stage_seconds_count{op="encode",stage="wav"} 2' in text
+    assert 'ghostlink_stage_seconds_bucket{op="encode",stage="wav",le="0.01"} 0' in text
+    assert 'ghostlink_stage_seconds_bucket{op="encode",stage="wav",le="0.025"} 2' in text
+
+
+def test_worker_exit_becomes_an_error():
+    def bail():
+        raise SystemExit(2)
+
+    with pytest.raises(RuntimeError, match="exited with status 2") as info:
+        call_with_metrics(bail)
+    assert info.value.metrics is not None
@@ -0,0 +1,47 @@
+import io
+
+import mido
+
+from ghostlink.midi import carrier_notes, freq_to_note, smf_bytes, symbol_notes, vlq
+from ghostlink.profiles import freq_profile
+
+
+def _mido_bytes(notes, baud):
+    """What the encoder produced when it built the file with mido."""
+    mid = mido.MidiFile()
+    track = mido.MidiTrack()
+    mid.tracks.append(track)
+    track.append(mido.MetaMessage("set_tempo", tempo=1_000_000))
+    dur_ticks = max(1, round(mid.ticks_per_beat / baud))
+    for note in notes:
+        track.append(mido.Message("note_on", note=note, velocity=64, time=0))
+        track.append(mido.Message("note_off", note=note, velocity=64, time=dur_ticks))
+    buf = io.BytesIO()
+    mid.save(file=buf)
+    return buf.getvalue()
+
+
+def test_vlq():
+    assert vlq(0) == b"\x00"
+    assert vlq(0x7F) == b"\x7f"
+    assert vlq(0x80) == b"\x81\x00"
+    assert vlq(0x0FFFFFFF) == b"\xff\xff\xff\x7f"
+
+
+def test_matches_mido_output():
+    freqs = freq_profile(True, "streaming")
+    notes = symbol_notes([0, 7, 3, 3, 5, 1], freqs, repeats=2)
+    for baud in (2.0, 90.0, 1000.0):
+        assert smf_bytes(notes, baud) == _mido_bytes(notes, baud)
+
+
+def test_carrier_notes_match_per_symbol_formula():
+    freqs = freq_profile(False, "studio")
+    assert carrier_notes(tuple(freqs)) == tuple(freq_to_note(f) for f in freqs)
+    assert freq_to_note(440.0) == 69
+
+
+def test_merge_repeats_joins_runs():
+    merged = mido.MidiFile(file=io.BytesIO(smf_bytes([90, 90, 90, 95], 90.0, merge_repeats=True)))
+    events = [(m.type, m.note, m.time) for m in merged.tracks[0] if m.type.startswith("note")]
+    assert events == [("note_on", 90, 0), ("note_off", 90, 15), ("note_on", 95, 0), ("note_off", 95, 5)]
@@ -0,0 +1,82 @@
+import array
+import math
+import wave
+
+import pytest
+
+from ghostlink import Decoder, Encoder
+from ghostlink.channel import to_wav_bytes
+from ghostlink.mix import main, mix_wav
+
+SR = 16000
+SIGNAL = dict(baud=200.0, preamble_s=0.5, interleave_depth=4, repeats=1)
+
+
+def _host(path, seconds, amp, channels=2, freq=220.0):
+    n = int(seconds * SR)
+    mono = [int(round(amp * 32767 * math.sin(2 * math.pi * freq * i / SR))) for i in range(n)]
+    frames = array.array("h", [s for s in mono for _ in range(channels)])
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(2)
+        wf.setframerate(SR)
+        wf.writeframes(frames.tobytes())
+
+
+def _frames(path):
+    with wave.open(str(path), "rb") as wf:
+        return wf.getparams(), array.array("h", wf.readframes(wf.getnframes()))
+
+
+def test_mix_adds_signal_at_offset_and_decodes(tmp_path):
+    host, out = tmp_path / "host.wav", tmp_path / "mixed.wav"
+    _host(host, 3.0, 0.2)
+    res = mix_wav(str(host), str(out), b"under the music", level_db=-6.0, offset_s=0.5, **SIGNAL)
+    assert res.inserts_s == [0.5] and res.limited == 0
+
+    (params, host_pcm), (out_params, mixed) = _frames(host), _frames(out)
+    assert out_params[:4] == params[:4] and len(mixed) == len(host_pcm)
+    start, end = int(0.5 * SR) * 2, (int(0.5 * SR) + int(round(res.signal_s * SR))) * 2
+    assert mixed[:start] == host_pcm[:start] and mixed[end:] == host_pcm[end:]
+
+    # The difference is the encoder's own signal, on both channels
+    signal = Encoder(samplerate=SR, amp=res.amp, bit_depth=32, **SIGNAL).encode_pcm(b"under the music")
+    expected = array.array("f", signal)
+    left = [mixed[i] - host_pcm[i] for i in range(start, end, 2)]
+    right = [mixed[i] - host_pcm[i] for i in range(start + 1, end, 2)]
+    assert left == right
+    assert max(abs(d - s * 32767) for d, s in zip(left, expected)) <= 1.0
+
+    # The decoder expects the transmission to fill the file, so cut the copy out
+    samples = [x / 32768.0 for x in mixed[start:end:2]]
+    result = Decoder(**SIGNAL).decode(to_wav_bytes(samples, SR))
+    assert result.crc_ok and result.payload == b"under the music"
+
+
+def test_mix_repeats_limits_and_streams_in_chunks(tmp_path):
+    host = tmp_path / "loud.wav"
+    _host(host, 6.0, 0.88, channels=1)
+    outs = []
+    for chunk in (65536, 777):
+        out = tmp_path / f"mixed_{chunk}.wav"
+        res = mix_wav(str(host), str(out), b"again", level_db=-12.0, offset_s=0.25, every_s=2.0,
+                      ceiling_db=-1.0, chunk_frames=chunk, **SIGNAL)
+        outs.append(out.read_bytes())
+    assert outs[0] == outs[1]
+    assert res.inserts_s == [0.25, 2.25, 4.25]
+    assert res.limited > 0
+    _, mixed = _frames(tmp_path / "mixed_777.wav")
+    assert max(abs(x) for x in mixed) <= 10 ** (-1.0 / 20) * 32767 + 1
+
+    with pytest.raises(ValueError, match="signal length"):
+        mix_wav(str(host), str(tmp_path / "x.wav"), b"again", every_s=0.1, **SIGNAL)
+    with pytest.raises(ValueError, match="does not fit"):
+        mix_wav(str(host), str(tmp_path / "x.wav"), b"again", offset_s=5.9, **SIGNAL)
+
+
+def test_mix_cli(tmp_path):
+    host, out = tmp_path / "host.wav", tmp_path / "out.wav"
+    _host(host, 2.0, 0.1)
+    args = [str(host), str(out), "--message", "cli", "--baud", "200", "--preamble", "0.5", "--repeats", "1"]
+    assert main(args) == 0 and out.exists()
+    assert main(args + ["--offset", "10"]) == 2
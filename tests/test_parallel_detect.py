@@ -0,0 +1,21 @@
+import io
+
+from ghostlink import Decoder, Encoder
+from ghostlink import decoder
+from ghostlink.decoder import detect_windows, goertzel_coeffs, read_wav
+
+SETTINGS = dict(baud=200.0, preamble_s=0.5, interleave_depth=4, repeats=2)
+
+
+def test_sharded_detection_matches_serial(monkeypatch):
+    monkeypatch.setattr(decoder, "PARALLEL_DETECT_MIN_WINDOWS", 8)
+    wav = Encoder(samplerate=16000, amp=0.1, **SETTINGS).encode_wav(b"shared memory shards")
+    samples, sr = read_wav(io.BytesIO(wav))
+    coeffs = goertzel_coeffs(tuple(Decoder(**SETTINGS).freqs), sr)
+    serial = detect_windows(samples, 8000, 80, coeffs)
+    assert len(serial) > 8
+    for workers in (2, 3):
+        assert detect_windows(samples, 8000, 80, coeffs, workers) == serial
+
+    result = Decoder(workers=2, **SETTINGS).decode(wav)
+    assert result.crc_ok and result.payload == b"shared memory shards"
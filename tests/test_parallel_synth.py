@@ -0,0 +1,43 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from ghostlink import encoder
+from ghostlink.encoder import Encoder, boundary_phases, iter_pcm, symbols_to_audio
+
+
+def test_boundary_phases_match_serial_rendering():
+    freqs = [1500.0, 2000.0, 2750.0, 3100.5]
+    symbols = [0, 3, 1, 2, 2, 0, 3] * 5
+    for gap_ms in (0.0, 3.0):
+        phases = boundary_phases(symbols, freqs, 16000, 120.0, 0.3, gap_ms)
+        _, end = symbols_to_audio(symbols, freqs, 16000, 120.0, 0.1, 0.3, gap_ms=gap_ms)
+        assert phases[-1] == end
+        _, mid = symbols_to_audio(symbols[:9], freqs, 16000, 120.0, 0.1, 0.3, gap_ms=gap_ms)
+        assert mid == phases[9]
+
+
+@pytest.mark.parametrize("bit_depth,channels,gap_ms", [(16, 1, 0.0), (24, 2, 2.0), (32, 1, 0.0)])
+def test_parallel_synthesis_is_identical(monkeypatch, bit_depth, channels, gap_ms):
+    monkeypatch.setattr(encoder, "PARALLEL_SYNTH_MIN_SYMBOLS", 16)
+    settings = dict(samplerate=16000, baud=200.0, amp=0.1, preamble_s=0.5, repeats=2,
+                    bit_depth=bit_depth, channels=channels, gap_ms=gap_ms)
+    msg = b"rendered in segments on a pool"
+    serial = Encoder(**settings).encode_wav(msg)
+    assert Encoder(workers=3, **settings).encode_wav(msg) == serial
+
+
+def test_parallel_streaming_stays_chunked_on_one_pool(monkeypatch):
+    monkeypatch.setattr(encoder, "PARALLEL_SYNTH_MIN_SYMBOLS", 16)
+    freqs = [1500.0, 2000.0, 2750.0, 3100.5]
+    symbols = [0, 3, 1, 2, 2, 0, 3] * 20
+    args = (symbols, freqs, 16000, 200.0, 0.1, 0.5, 0.0, 5.0, 2)
+    serial = list(iter_pcm(*args))
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        chunks = list(iter_pcm(*args, chunk_symbols=8, workers=2, pool=pool))
+        assert b"".join(chunks) == b"".join(serial)
+        # Preamble, then at most 2 * 16 symbols per chunk
+        assert max(len(c) for c in chunks[1:]) == 32 * 80 * 2
+        msg = b"rendered on the caller's pool"
+        serial_wav = Encoder(samplerate=16000).encode_wav(msg)
+        assert Encoder(samplerate=16000, workers=2, pool=pool).encode_wav(msg) == serial_wav
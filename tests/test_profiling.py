@@ -0,0 +1,40 @@
+import json
+
+from ghostlink import encode_with_args, main_with_args
+from ghostlink.profiling import SpanRecorder, listen, span
+
+
+def test_span_is_noop_without_listener():
+    assert span("a") is span("b")
+
+
+def test_listeners_receive_nested_spans():
+    seen = []
+    with listen(lambda name, seconds: seen.append(name)):
+        with span("outer"):
+            with span("inner"):
+                pass
+    with span("ignored"):
+        pass
+    assert seen == ["inner", "outer"]
+
+
+def test_profile_returns_spans_and_cli_prints_them(capsys, encode_args):
+    spans = encode_with_args(encode_args("text", "profile", "--profile"))[0].spans
+    assert capsys.readouterr().out == ""
+    for name in ("fec", "interleave", "symbols", "synth", "write_wav", "midi",
+                 "readback", "db_lookup", "db_insert"):
+        assert spans[name]["calls"] == 1
+    assert spans["stretch"]["calls"] == 4
+    assert encode_with_args(encode_args("text", "profile"))[0].spans == {}
+
+    assert main_with_args(encode_args("text", "printed", "--profile")) == 0
+    report = json.loads(capsys.readouterr().out.strip())
+    assert report["input"] == "msg" and report["spans"]["synth"]["calls"] == 1
+
+
+def test_recorder_totals_repeated_spans():
+    rec = SpanRecorder()
+    rec("stretch", 0.5)
+    rec("stretch", 0.25)
+    assert rec.to_dict() == {"stretch": {"calls": 2, "seconds": 0.75}}
@@ -0,0 +1,31 @@
+import pytest
+
+from ghostlink import ENCODE_STAGES, EncodeCancelled, encode_with_args
+
+
+def test_progress_reports_files_and_stages(tmp_path, encode_args):
+    in_dir = tmp_path / "inp"
+    in_dir.mkdir()
+    (in_dir / "a.txt").write_text("alpha")
+    (in_dir / "b.txt").write_text("beta")
+    events = []
+    encode_with_args(encode_args("dir", in_dir), progress=lambda e, info: events.append((e, info)))
+
+    files = [info for e, info in events if e == "file"]
+    assert [(f["index"], f["total"], f["input"]) for f in files] == [(1, 2, "a.txt"), (2, 2, "b.txt")]
+    stages = [info["stage"] for e, info in events if e == "stage" and info["input"] == "a.txt"]
+    assert tuple(stages) == ENCODE_STAGES
+
+
+def test_progress_callback_can_cancel(tmp_path, encode_args):
+    in_dir = tmp_path / "inp"
+    in_dir.mkdir()
+    (in_dir / "a.txt").write_text("alpha")
+
+    def cancel(event, info):
+        if event == "stage" and info["stage"] == "synth":
+            raise EncodeCancelled("stop")
+
+    with pytest.raises(EncodeCancelled):
+        encode_with_args(encode_args("dir", in_dir), progress=cancel)
+    assert not list((tmp_path / "out").glob("*.wav"))
@@ -0,0 +1,74 @@
+import io
+import random
+
+import pytest
+
+from ghostlink import decoder
+from ghostlink.decoder import Decoder, read_wav
+from ghostlink.encoder import Encoder, build_frames, build_payload, payload_symbols
+from ghostlink.segments import FrameAssembler, frame_symbol_count, segment_frame_len
+
+rng = random.Random(11)
+MESSAGE = bytes(rng.randrange(256) for _ in range(150))  # incompressible
+SETTINGS = dict(baud=400.0, dense=True, mix_profile="streaming", preamble_s=0.8,
+                interleave_depth=4, repeats=1)
+
+
+def test_small_messages_stay_single_frame():
+    assert build_frames(b"hello") == [build_payload(b"hello")]
+
+
+def test_frames_reassemble_in_any_order():
+    frames = build_frames(MESSAGE, frame_size=32)
+    assert len(frames) == 5
+    assert len({len(f) for f in frames}) == 1
+    asm = FrameAssembler()
+    for frame in reversed(frames[1:]):
+        asm.add(frame)
+    assert asm.missing() == [0]
+    with pytest.raises(ValueError, match="missing frames: 0"):
+        asm.message()
+    assert asm.add(frames[0]) and not asm.add(frames[0])
+    assert asm.message() == MESSAGE
+
+
+@pytest.mark.parametrize("fec", ["hamming74", "rs", "conv"])
+def test_frame_symbol_count_matches_encoder(fec):
+    frame = build_frames(MESSAGE, fec=fec, frame_size=32)[0]
+    assert len(frame) == segment_frame_len(32)
+    assert len(payload_symbols(frame, 8, 4)) == frame_symbol_count(len(frame), fec, 8, 4)
+
+
+def test_lost_frame_recovered_from_resend():
+    enc = Encoder(samplerate=16000, amp=0.1, frame_size=32, **SETTINGS)
+    dec = Decoder(frame_size=32, **SETTINGS)
+    samples, sr = read_wav(io.BytesIO(enc.encode_wav(MESSAGE)))
+    start = int(0.8 * sr)
+    per = (len(samples) - start) // 5
+    for i in range(start + 3 * per + per // 4, start + 3 * per + per // 2):
+        samples[i] = 0.0
+
+    asm = FrameAssembler()
+    first = dec.decode(samples, sr, assembler=asm)
+    assert not first.crc_ok
+    assert first.frames == 5 and first.missing == [3]
+
+    second = dec.decode(enc.encode_wav(MESSAGE, resend=first.missing), assembler=asm)
+    assert second.crc_ok and second.payload == MESSAGE
+
+
+def test_decode_detects_only_what_it_needs(monkeypatch):
+    enc = Encoder(samplerate=16000, amp=0.1, frame_size=32, **dict(SETTINGS, repeats=2))
+    dec = Decoder(frame_size=32, **dict(SETTINGS, repeats=2))
+    samples, sr = read_wav(io.BytesIO(enc.encode_wav(MESSAGE)))
+    stream = dec.stream(samples, sr)
+    result = dec.decode(samples, sr)
+    assert result.crc_ok and result.payload == MESSAGE
+    assert result.symbols <= stream.count // 2  # the second repeat is never detected
+
+    # Single-frame messages are recognised from frame headers, not trial decodes
+    calls = []
+    monkeypatch.setattr(decoder, "decode_segment_frame", lambda *a: calls.append(a))
+    samples, sr = read_wav(io.BytesIO(enc.encode_wav(b"short")))
+    result = dec.decode(samples, sr)
+    assert result.crc_ok and result.repeat == 1 and calls == []
@@ -0,0 +1,44 @@
+import os
+
+from ghostlink import encode_with_args
+from ghostlink import __main__ as ghostlink_main
+
+
+def test_unchanged_files_are_skipped_without_reading(tmp_path, monkeypatch, encode_args):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "inp" / "sub").mkdir(parents=True)
+    (tmp_path / "inp" / "a.txt").write_text("alpha")
+    (tmp_path / "inp" / "sub" / "b.txt").write_text("beta")
+    writes = []
+    real_put = ghostlink_main.db_put_stats
+    monkeypatch.setattr(ghostlink_main, "db_put_stats",
+                        lambda db, settings, rows: writes.append(len(rows)) or real_put(db, settings, rows))
+    first = encode_with_args(encode_args("dir", tmp_path / "inp"))
+    assert [r.skipped for r in first] == [False, False]
+    assert writes == [2]  # one transaction for the batch
+
+    reads = []
+    real_open = open
+
+    def tracking_open(path, *a, **kw):
+        if str(tmp_path / "inp") in os.path.abspath(str(path)):
+            reads.append(os.path.basename(path))
+        return real_open(path, *a, **kw)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    again = encode_with_args(encode_args("dir", tmp_path / "inp"))
+    assert reads == []
+    assert [r.skipped for r in again] == [True, True]
+    assert [r.wav_path for r in again] == [os.path.abspath(r.wav_path) for r in first]
+    assert [r.sha256 for r in again] == [r.sha256 for r in first]
+
+    (tmp_path / "inp" / "a.txt").write_text("alpha, edited")
+    changed = encode_with_args(encode_args("dir", tmp_path / "inp"))
+    assert reads == ["a.txt"] and [r.skipped for r in changed] == [False, True]
+
+    reads.clear()
+    encode_with_args(encode_args("dir", tmp_path / "inp", "--rehash"))
+    assert sorted(reads) == ["a.txt", "b.txt"]
+    reads.clear()
+    encode_with_args(encode_args("dir", tmp_path / "inp", "--baud", "100"))  # other settings: not trusted
+    assert sorted(reads) == ["a.txt", "b.txt"]
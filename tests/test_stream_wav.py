@@ -0,0 +1,49 @@
+import pytest
+
+from ghostlink import encode_bytes_to_wav, stream_wav
+from ghostlink.decoder import decode_wav
+
+
+PARAMS = dict(
+    samplerate=16000,
+    baud=200.0,
+    amp=0.1,
+    dense=True,
+    mix_profile="streaming",
+    gap_ms=0.0,
+    preamble_s=0.5,
+    interleave_depth=2,
+    repeats=2,
+    ramp_ms=5.0,
+)
+
+
+@pytest.mark.parametrize("bit_depth,channels", [(16, 1), (24, 1), (32, 2)])
+def test_stream_matches_written_wav(tmp_path, bit_depth, channels):
+    path, _ = encode_bytes_to_wav(b"stream me", str(tmp_path), "msg",
+                                  bit_depth=bit_depth, channels=channels, **PARAMS)
+    total, chunks = stream_wav(b"stream me", bit_depth=bit_depth, channels=channels,
+                               chunk_symbols=7, **PARAMS)
+    chunks = list(chunks)
+    data = b"".join(chunks)
+    assert len(data) == total
+    assert data == open(path, "rb").read()
+    assert len(chunks) > 3
+
+
+def test_stream_raw_pcm_and_decode(tmp_path):
+    total, chunks = stream_wav(b"hi", raw=True, **PARAMS)
+    pcm = b"".join(chunks)
+    assert len(pcm) == total
+    wav_total, wav_chunks = stream_wav(b"hi", **PARAMS)
+    assert wav_total == total + 44
+    out = tmp_path / "streamed.wav"
+    out.write_bytes(b"".join(wav_chunks))
+    decoded = decode_wav(str(out), baud=200.0, dense=True, mix_profile="streaming",
+                         preamble_s=0.5, interleave_depth=2, repeats=2)
+    assert decoded == b"hi"
+
+
+def test_stream_gap_frame_count():
+    total, chunks = stream_wav(b"gap", raw=True, **dict(PARAMS, gap_ms=3.0))
+    assert len(b"".join(chunks)) == total
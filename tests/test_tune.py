@@ -0,0 +1,64 @@
+import argparse
+import sys
+
+import pytest
+
+from ghostlink import decoder
+from ghostlink.__main__ import parse_args
+from ghostlink.channel import ChannelConfig
+from ghostlink.presets import load_preset, parse_with_preset, save_preset
+from ghostlink.tune import candidates, preset_params, tune
+
+FAST = dict(samplerate=16000, preamble_s=0.5)
+
+
+def test_candidates_are_ranked_fastest_first():
+    grid = candidates(b"tune me", [100.0, 200.0], [1, 4], [1, 2], [8, 4], ["hamming74"], **FAST)
+    assert len(grid) == 16
+    assert [c.audio_s for c in grid] == sorted(c.audio_s for c in grid)
+    assert (grid[0].baud, grid[0].repeats, grid[0].order) == (200.0, 1, 8)
+    assert grid[0].throughput(7) > grid[-1].throughput(7)
+
+
+def test_tune_picks_fastest_reliable_candidate():
+    grid = candidates(b"tune me", [100.0, 200.0], [4], [1, 2], [8], ["hamming74"], **FAST)
+    clean = tune(b"tune me", grid, ChannelConfig(snr_db=20.0), trials=2, **FAST)
+    assert clean.best is grid[0]
+    assert len(clean.tried) == 1 and clean.tried[0]["ok"]
+
+    hopeless = tune(b"tune me", grid[:2], ChannelConfig(snr_db=-30.0), trials=2, **FAST)
+    assert hopeless.best is None
+    assert [row["passed"] for row in hopeless.tried] == [0, 0]
+
+
+def test_preset_round_trip_and_explicit_options_win(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    grid = candidates(b"x", [120.0], [2], [1], [4], ["rs"], **FAST)
+    save_preset("radio", preset_params(grid[0], 16000, 0.5, "studio"))
+    assert load_preset("radio")["fec"] == "rs"
+    with pytest.raises(ValueError, match="radio"):
+        load_preset("missing")
+
+    p = argparse.ArgumentParser()
+    p.add_argument("--baud", type=float, default=90.0)
+    p.add_argument("--repeats", type=int, default=2)
+    p.add_argument("--sparse", action="store_true")
+    p.add_argument("--preset")
+    args = parse_with_preset(p, ["--preset", "radio", "--repeats", "3"])
+    assert (args.baud, args.repeats, args.sparse) == (120.0, 3, True)
+
+
+def test_preset_fills_only_options_each_command_has(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    grid = candidates(b"x", [120.0], [2], [1], [4], ["rs"], **FAST)
+    save_preset("radio", preset_params(grid[0], 16000, 0.5, "studio"))
+
+    encode = parse_args(["text", "hi", "out", "--preset", "radio"])
+    assert (encode.mode, encode.samplerate, encode.fec, encode.baud) == ("text", 16000, "rs", 120.0)
+    mix = parse_args(["mix", "host.wav", "out.wav", "--message", "hi", "--preset", "radio", "--baud", "90"])
+    assert (mix.command, mix.fec, mix.baud) == ("mix", "rs", 90.0)
+    assert not hasattr(mix, "samplerate")
+
+    monkeypatch.setattr(sys, "argv", ["ghostlink-decode", "in.wav", "--preset", "radio"])
+    decode = decoder.parse_args()
+    assert decode.baud == 120.0 and not hasattr(decode, "samplerate") and not hasattr(decode, "fec")
@@ -0,0 +1,79 @@
+import os
+import time
+
+import pytest
+
+from ghostlink.__main__ import encode_kwargs
+from ghostlink.watch import Watcher, main, parse_args
+
+FAST = ["--samplerate", "16000", "--baud", "200", "--preamble", "0.5", "--repeats", "1"]
+
+
+def _wavs(path):
+    return sorted(p.name for p in path.glob("*.wav") if "slow" not in p.stem)
+
+
+@pytest.mark.parametrize("use_inotify", [False, True])
+def test_watcher_encodes_new_and_changed_files(tmp_path, monkeypatch, use_inotify):
+    monkeypatch.chdir(tmp_path)
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    out.mkdir()
+    (src / "old.txt").write_text("already here")
+    (src / "skip.bin").write_bytes(b"\0")
+    settings = encode_kwargs(parse_args([str(src), str(out)] + FAST))
+    watcher = Watcher(str(src), str(out), settings, jobs=1, settle_s=0.2, poll_s=0.1,
+                      use_inotify=use_inotify)
+    try:
+        watcher.scan()
+        assert [r.input_ref for r in watcher.drain(0.1)] == ["old.txt"]
+
+        new = src / "new.md"
+        with open(new, "w") as fh:
+            fh.write("half")
+            fh.flush()
+            watcher.step(0.1)  # seen, but not yet settled
+            assert not watcher.running and str(new) in watcher.pending
+            fh.write(" and the rest")
+        results = watcher.drain(0.1)
+        assert [r.input_ref for r in results] == ["new.md"] and results[0].ok
+
+        (src / "old.txt").write_text("edited")
+        os.utime(src / "old.txt", ns=(time.time_ns(), time.time_ns() + 10**9))
+        watcher.step(0.1)
+        assert [r.input_ref for r in watcher.drain(0.1)] == ["old.txt"]
+    finally:
+        watcher.close()
+    assert len(_wavs(out)) == 3
+
+
+def test_watch_once_cli(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "a.txt").write_text("alpha")
+    (tmp_path / "b.log").write_text("beta")
+    out = tmp_path / "out"
+    assert main([str(tmp_path), str(out), "--once", "--settle", "0", "--jobs", "2"] + FAST) == 0
+    assert len(_wavs(out)) == 2
+
+
+def test_failed_encode_is_retried_only_after_a_change(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    src = tmp_path / "in"
+    src.mkdir()
+    (src / "a.txt").write_text("alpha")
+    out = tmp_path / "not_a_dir"
+    out.write_text("")  # every encode fails
+    settings = encode_kwargs(parse_args([str(src), str(out)] + FAST))
+    watcher = Watcher(str(src), str(out), settings, jobs=1, settle_s=0.0, poll_s=0.05, use_inotify=False)
+    try:
+        watcher.scan()
+        results = watcher.drain(0.05)
+        assert [r.input_ref for r in results] == ["a.txt"] and not results[0].ok
+        for _ in range(5):
+            assert watcher.step(0.05) == [] and watcher.idle
+
+        os.utime(src / "a.txt", ns=(time.time_ns(), time.time_ns() + 10**9))
+        watcher.step(0.1)
+        assert [r.input_ref for r in watcher.drain(0.05)] == ["a.txt"]
+    finally:
+        watcher.close()